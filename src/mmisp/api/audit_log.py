@@ -0,0 +1,120 @@
+"""
+Modern MISP API - mmisp.api.audit_log
+
+Background writer for the database log entries collected during a request.
+
+Requests hand their entries to a bounded queue, a single task inserts them in batches.
+Request latency therefore no longer includes the commit of the audit log.
+"""
+
+import asyncio
+import logging
+from collections.abc import Sequence
+from typing import Self
+
+from mmisp.api.config import config
+from mmisp.db.database import sessionmanager
+from mmisp.db.models.log import Log
+
+logger = logging.getLogger("mmisp")
+
+
+class AuditLogWriter:
+    """
+    Inserts log entries in batches on a background task.
+
+    At most `queue_size` entries are buffered, further requests wait until the writer catches up.
+    A `queue_size` of zero, or a writer that has not been started, writes the entries during the request.
+    """
+
+    def __init__(self: Self, queue_size: int, batch_size: int) -> None:
+        self.queue_size = queue_size
+        self.batch_size = max(batch_size, 1)
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self._queue: asyncio.Queue[Log | None] | None = None
+        self._task: asyncio.Task | None = None
+
+    async def enqueue(self: Self, entries: Sequence[Log]) -> None:
+        """
+        Hands the entries to the background task.
+
+        args:
+            entries: the log entries of a request
+        """
+        if not entries:
+            return
+
+        if self._queue is None or self.queue_size <= 0:
+            await self._write(list(entries))
+            return
+
+        for entry in entries:
+            await self._queue.put(entry)
+
+    async def _write(self: Self, batch: list[Log]) -> None:
+        assert sessionmanager is not None
+        try:
+            async with sessionmanager.session() as db:
+                db.add_all(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.error("Could not write %d audit log entries", len(batch), exc_info=True)
+            return
+
+        self.written += len(batch)
+        self.batches += 1
+
+    async def _run(self: Self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        stopping = False
+        while not stopping:
+            entry = await queue.get()
+            batch = []
+            while True:
+                if entry is None:
+                    stopping = True
+                else:
+                    batch.append(entry)
+                if stopping or len(batch) >= self.batch_size or queue.empty():
+                    break
+                entry = queue.get_nowait()
+
+            if batch:
+                await self._write(batch)
+
+    def start(self: Self) -> None:
+        """
+        Starts the background task on the running event loop.
+        """
+        if self.queue_size > 0 and self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self: Self) -> None:
+        """
+        Writes all queued entries and stops the background task.
+        """
+        if self._task is None or self._queue is None:
+            return
+
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    def pending(self: Self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def statistics(self: Self) -> dict[str, int]:
+        return {
+            "pending": self.pending(),
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
+
+
+audit_log_writer = AuditLogWriter(config.AUDIT_LOG_QUEUE_SIZE, config.AUDIT_LOG_BATCH_SIZE)
@@ -5,25 +5,36 @@ Handlers to manage authentication and authorization to the modern misp api.
 
 """
 
-from collections.abc import Sequence
+import hashlib
+import hmac
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import StrEnum
-from time import time
-from typing import Annotated, Awaitable, Callable
+from time import monotonic, time
+from typing import Annotated, Awaitable, Callable, Self
 
-import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
-from sqlalchemy import or_, select
+from sqlalchemy import event, or_, select
+from sqlalchemy.orm import Session as ORMSession
 from sqlalchemy.orm import joinedload, selectinload
 
+from mmisp.api.bookkeeping import access_timestamps
+from mmisp.api.cache import TTLCache
 from mmisp.api.config import config
-from mmisp.db.database import Session, get_db
+from mmisp.api.crypto import verify_secret
+from mmisp.api.explain import allow_explain
+from mmisp.api.lazy_imports import lazy_import
+from mmisp.api.server_timing import timed
+from mmisp.api.slow_queries import record_slow_query_user
+from mmisp.db.database import Session, get_db, sessionmanager
 from mmisp.db.models.auth_key import AuthKey
+from mmisp.db.models.role import Role
 from mmisp.db.models.user import User
 from mmisp.lib.permissions import Permission
-from mmisp.util.crypto import verify_secret
+
+jwt = lazy_import("jwt")
 
 
 class AuthStrategy(StrEnum):
@@ -57,19 +68,134 @@ class Auth:
     role_id: int | None = None
     auth_key_id: int | None = None
     is_worker: bool | None = False
+    permission_mask: int | None = None
+    """The permissions of the user's role as bitmask, see `role_permission_mask`."""
+
+
+PERMISSION_BITS: dict[Permission, int] = {
+    permission: 1 << index for index, permission in enumerate(Permission.__members__.values())
+}
+# the names of the mapped permission columns of `Role`, a permission without column fails on import
+_ROLE_PERMISSION_COLUMNS: tuple[tuple[str, int], ...] = tuple(
+    (getattr(Role, f"perm_{permission.value}").key, bit) for permission, bit in PERMISSION_BITS.items()
+)
+
+
+def permission_mask(permissions: Iterable[Permission]) -> int:
+    """
+    Compiles a list of permissions into a bitmask.
+
+    args:
+        permissions: the permissions
+
+    returns:
+        the bitmask with the bits of all given permissions set
+    """
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS[permission]
+    return mask
+
+
+def role_permission_mask(role: Role) -> int:
+    """
+    Compiles the permissions granted by a role into a bitmask.
+
+    args:
+        role: the role
+
+    returns:
+        the bitmask with the bits of all permissions of the role set
+    """
+    mask = 0
+    for column, bit in _ROLE_PERMISSION_COLUMNS:
+        if getattr(role, column):
+            mask |= bit
+    return mask
+
+
+@dataclass(frozen=True)
+class VerifiedAPIKey:
+    """
+    An api key whose secret has already been verified against the stored hash.
+    """
+
+    user_id: int
+    auth_key_id: int
+    read_only: bool
+    expiration: int
+
+
+class AuthKeyPrefixFilter:
+    """
+    Knows the start and end of every stored api key, so tokens matching no key can be rejected without a query.
+
+    The known prefixes are reloaded when a token is not found, but at most once per `reload_interval` seconds,
+    which bounds the delay until a key added by another worker is accepted.
+    """
+
+    def __init__(self: Self, reload_interval: float) -> None:
+        self.reload_interval = reload_interval
+        self.rejections = 0
+        self._pairs: frozenset[tuple[str, str]] | None = None
+        self._loaded_at = 0.0
+
+    def invalidate(self: Self) -> None:
+        self._pairs = None
+
+    async def might_match(self: Self, db: Session, authorization: str) -> bool:
+        pair = (authorization[:4], authorization[-4:])
+        if self._pairs is not None and pair in self._pairs:
+            return True
+
+        if self._pairs is None or monotonic() - self._loaded_at >= self.reload_interval:
+            result = await db.execute(select(AuthKey.authkey_start, AuthKey.authkey_end))
+            self._pairs = frozenset((start, end) for start, end in result.all())
+            self._loaded_at = monotonic()
+            if pair in self._pairs:
+                return True
+
+        self.rejections += 1
+        return False
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authentication relevant state of a user.
+
+    The user is detached from any session and shared between requests, it must not be modified.
+    """
+
+    user: User
+    user_id: int
+    org_id: int
+    role_id: int
+    permission_mask: int | None
+    disabled: bool
+    force_logout: bool
+
+
+api_key_cache: TTLCache[bytes, VerifiedAPIKey] = TTLCache(config.API_KEY_CACHE_SIZE, config.API_KEY_CACHE_TTL)
+rejected_token_cache: TTLCache[tuple[bytes, AuthStrategy], bool] = TTLCache(
+    config.REJECTED_TOKEN_CACHE_SIZE, config.REJECTED_TOKEN_CACHE_TTL
+)
+auth_key_prefix_filter = AuthKeyPrefixFilter(config.API_KEY_PREFIX_RELOAD_INTERVAL)
+principal_cache: TTLCache[int, Principal] = TTLCache(config.PRINCIPAL_CACHE_SIZE, config.PRINCIPAL_CACHE_TTL)
+# bumped by every invalidation, principals loaded across an invalidation are not cached
+_principal_generation = 0
 
 
 async def _get_user(
-    db: Session, authorization: str, strategy: AuthStrategy, permissions: list[Permission], is_readonly_route: bool
-) -> tuple[User, int | None]:
+    db: Session, authorization: str, strategy: AuthStrategy, is_readonly_route: bool
+) -> tuple[Principal, int | None]:
     """
-        Fetches the user from the database.
+        Fetches the user from the cache or the database.
 
     args:
         db: the current db
         authorization: the authorization token
         strategy: the authorization strategy
-        permissions: the list of permissions to be checked
         is_readonly_route: wether the route is read only
 
     returns:
@@ -79,6 +205,11 @@ async def _get_user(
     user_id: int | None = None
     auth_key_id: int | None = None
 
+    # reject tokens which recently failed without decoding or querying them again
+    rejected_key = (_api_key_digest(authorization), strategy)
+    if rejected_token_cache.get(rejected_key):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+
     # check for JWT
     if strategy in [AuthStrategy.JWT, AuthStrategy.HYBRID, AuthStrategy.ALL]:
         user_id = _decode_token(authorization)
@@ -92,29 +223,110 @@ async def _get_user(
 
         if res:
             user_id, auth_key_id = res
-
-            # only users with this permission are allowed to use api keys
-            permissions.append(Permission.AUTH)
-
             return await user_login_allowed(db, user_id, True), auth_key_id
 
+    rejected_token_cache.set(rejected_key, True)
     raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
 
-async def user_login_allowed(db: Session, user_id: int, api_login: bool) -> User:
+async def user_login_allowed(db: Session, user_id: int, api_login: bool) -> Principal:
+    principal = principal_cache.get(user_id)
+
+    if principal is None:
+        generation = _principal_generation
+        principal = await _load_principal(db, user_id)
+        if principal is None:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+        # a principal loaded while a change was committed may be stale, it is used but not cached
+        if generation == _principal_generation:
+            principal_cache.set(user_id, principal)
+
+    if not api_login and principal.force_logout:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="User has been logged out")
+    if principal.disabled:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="User has been disabled")
+
+    return principal
+
+
+async def _load_principal(db: Session, user_id: int) -> Principal | None:
+    if not principal_cache.enabled:
+        return await _query_principal(db, user_id)
+
+    # the cached user outlives the request, so it must not belong to the session of the request
+    assert sessionmanager is not None
+    async with sessionmanager.session() as principal_db:
+        return await _query_principal(principal_db, user_id)
+
+
+async def _query_principal(db: Session, user_id: int) -> Principal | None:
     result = await db.execute(
         select(User).options(joinedload(User.role), selectinload(User.org)).filter(User.id == user_id).limit(1)
     )
     user = result.scalars().one_or_none()
-    if user is not None:
-        if not api_login and user.force_logout:
-            raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="User has been logged out")
-        if user.disabled:
-            raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="User has been disabled")
-
-        return user
-    else:
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+    if user is None:
+        return None
+
+    return Principal(
+        user=user,
+        user_id=user.id,
+        org_id=user.org_id,
+        role_id=user.role_id,
+        permission_mask=role_permission_mask(user.role) if user.role else None,
+        disabled=bool(user.disabled),
+        force_logout=bool(user.force_logout),
+    )
+
+
+def invalidate_principal_cache(
+    user_id: int | None = None, org_id: int | None = None, role_id: int | None = None
+) -> None:
+    """
+    Removes cached principals, so the next request of the affected users loads them from the database again.
+    Without arguments, all principals are removed.
+
+    args:
+        user_id: drop the principal of this user
+        org_id: drop the principals of all users of this organisation
+        role_id: drop the principals of all users with this role
+    """
+    global _principal_generation
+    _principal_generation += 1
+    if user_id is None and org_id is None and role_id is None:
+        principal_cache.clear()
+        return
+
+    principal_cache.invalidate(
+        lambda _, principal: principal.user_id == user_id or principal.org_id == org_id or principal.role_id == role_id
+    )
+
+
+def invalidate_principal_cache_on_commit(
+    db: Session, user_id: int | None = None, org_id: int | None = None, role_id: int | None = None
+) -> None:
+    """
+    Removes cached principals once the transaction of the session is committed,
+    so concurrent requests cannot cache the state before the commit again.
+    Nothing is removed if the transaction is rolled back.
+
+    args:
+        db: the session of the change
+        user_id: drop the principal of this user
+        org_id: drop the principals of all users of this organisation
+        role_id: drop the principals of all users with this role
+    """
+    db.info.setdefault("principal_cache_invalidations", []).append((user_id, org_id, role_id))
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _after_commit(session: ORMSession) -> None:
+    for user_id, org_id, role_id in session.info.pop("principal_cache_invalidations", []):
+        invalidate_principal_cache(user_id=user_id, org_id=org_id, role_id=role_id)
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _after_rollback(session: ORMSession) -> None:
+    session.info.pop("principal_cache_invalidations", None)
 
 
 def authorize(
@@ -133,9 +345,11 @@ def authorize(
 
     """
 
-    if permissions is None:
-        permissions = []
+    required_mask = permission_mask(permissions or [])
+    # only users with this permission are allowed to use api keys
+    api_key_required_mask = required_mask | PERMISSION_BITS[Permission.AUTH]
 
+    @timed("auth")
     async def authorizer(
         db: Annotated[Session, Depends(get_db)],
         authorization: Annotated[str, Depends(APIKeyHeader(name="authorization"))],
@@ -162,13 +376,27 @@ def authorize(
         if strategy in [AuthStrategy.WORKER_KEY, AuthStrategy.ALL] and authorization == config.WORKER_KEY:
             return Auth(is_worker=True)
 
-        user, auth_key_id = await _get_user(db, authorization, strategy, permissions, is_readonly_route)
+        principal, auth_key_id = await _get_user(db, authorization, strategy, is_readonly_route)
 
-        auth = Auth(user=user, user_id=user.id, org_id=user.org_id, role_id=user.role_id, auth_key_id=auth_key_id)
+        auth = Auth(
+            user=principal.user,
+            user_id=principal.user_id,
+            org_id=principal.org_id,
+            role_id=principal.role_id,
+            auth_key_id=auth_key_id,
+            permission_mask=principal.permission_mask,
+        )
 
-        if not check_permissions(auth, permissions):
+        required = required_mask if auth_key_id is None else api_key_required_mask
+        if principal.permission_mask is None or principal.permission_mask & required != required:
             raise HTTPException(status.HTTP_403_FORBIDDEN)
 
+        if auth_key_id is not None:
+            access_timestamps.record_api_access(principal.user_id)
+
+        allow_explain(principal.permission_mask & PERMISSION_BITS[Permission.SITE_ADMIN] != 0)
+        record_slow_query_user(principal.user_id)
+
         return auth
 
     return authorizer
@@ -188,18 +416,18 @@ def check_permissions(auth: Auth, permissions: list[Permission] = []) -> bool:
 
     if auth.user is None:
         raise ValueError
-    role = auth.user.role
-
-    if not role:
-        return False
 
-    permission_roles = role.get_permissions()
+    mask = auth.permission_mask
+    if mask is None:
+        role = auth.user.role
 
-    for permission in permissions:
-        if permission not in permission_roles:
+        if not role:
             return False
 
-    return True
+        mask = role_permission_mask(role)
+
+    required = permission_mask(permissions)
+    return mask & required == required
 
 
 def encode_token(user_id: str) -> str:
@@ -240,6 +468,10 @@ def decode_exchange_token(token: str) -> str | None:
 def _decode_token(token: str) -> int | None:
     payload: dict
 
+    # api keys and other garbage can never be a jwt
+    if token.count(".") != 2:
+        return None
+
     try:
         payload = jwt.decode(token, config.HASH_SECRET, ["HS256"])
     except jwt.InvalidTokenError:
@@ -251,7 +483,77 @@ def _decode_token(token: str) -> int | None:
     return int(payload["user_id"])
 
 
+def invalidate_api_key_cache(auth_key_id: int | None = None, user_id: int | None = None) -> None:
+    """
+    Removes verified api keys from the cache, so the next request using them is verified again.
+    Rejected tokens and known key prefixes are always forgotten, so new or changed keys are accepted immediately.
+
+    args:
+        auth_key_id: drop the entry belonging to this auth key
+        user_id: drop all entries belonging to this user
+    """
+    rejected_token_cache.clear()
+    auth_key_prefix_filter.invalidate()
+    api_key_cache.invalidate(
+        lambda _, key: (
+            (auth_key_id is not None and key.auth_key_id == auth_key_id)
+            or (user_id is not None and key.user_id == user_id)
+        )
+    )
+
+
+def clear_auth_caches() -> None:
+    """
+    Forgets everything the authentication caches of this worker know.
+    """
+    api_key_cache.clear()
+    principal_cache.clear()
+    invalidate_api_key_cache()
+
+
+def auth_cache_statistics() -> dict[str, dict[str, int]]:
+    """
+    Returns the hit and miss counters of the authentication caches of this worker.
+
+    returns:
+        the counters per cache
+    """
+    return {
+        "api_key_cache": api_key_cache.statistics(),
+        "rejected_token_cache": rejected_token_cache.statistics(),
+        "auth_key_prefix_filter": {"rejections": auth_key_prefix_filter.rejections},
+        "principal_cache": principal_cache.statistics(),
+    }
+
+
+def _api_key_digest(authorization: str) -> bytes:
+    return hmac.digest(config.HASH_SECRET.encode(), authorization.encode(), hashlib.sha256)
+
+
+def _epoch(value: datetime | float | None) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value or 0)
+
+
+def _check_verified_api_key(verified: VerifiedAPIKey, is_readonly_route: bool) -> tuple[int, int]:
+    if verified.read_only and not is_readonly_route:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="API Key is readonly, but requested route is not")
+    return verified.user_id, verified.auth_key_id
+
+
 async def _check_api_key(db: Session, authorization: str, is_readonly_route: bool) -> tuple[int, int] | None:
+    digest = _api_key_digest(authorization)
+    verified = api_key_cache.get(digest)
+
+    if verified is not None:
+        if verified.expiration == 0 or verified.expiration > int(time()):
+            return _check_verified_api_key(verified, is_readonly_route)
+        api_key_cache.pop(digest)
+
+    if not await auth_key_prefix_filter.might_match(db, authorization):
+        return None
+
     result = await db.execute(
         select(AuthKey).filter(
             AuthKey.authkey_start == authorization[:4],
@@ -263,8 +565,13 @@ async def _check_api_key(db: Session, authorization: str, is_readonly_route: boo
     potential_auth_keys: Sequence[AuthKey] = result.scalars().all()
 
     for auth_key in potential_auth_keys:
-        if verify_secret(authorization, auth_key.authkey):
-            if auth_key.read_only and not is_readonly_route:
-                raise HTTPException(status.HTTP_403_FORBIDDEN, detail="API Key is readonly, but requested route is not")
-            return auth_key.user_id, auth_key.id
+        if await verify_secret(authorization, auth_key.authkey):
+            verified = VerifiedAPIKey(
+                user_id=auth_key.user_id,
+                auth_key_id=auth_key.id,
+                read_only=bool(auth_key.read_only),
+                expiration=_epoch(auth_key.expiration),
+            )
+            api_key_cache.set(digest, verified)
+            return _check_verified_api_key(verified, is_readonly_route)
     return None
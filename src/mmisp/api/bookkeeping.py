@@ -0,0 +1,122 @@
+"""
+Modern MISP API - mmisp.api.bookkeeping
+
+Write-behind buffer for the access timestamps of users.
+
+Recording `last_api_access` and `last_login` inline would add a database write to every request.
+Instead the timestamps are collected in memory, coalesced per user and written in bulk on an interval
+and when the application shuts down.
+"""
+
+import asyncio
+import logging
+from time import time
+from typing import Self
+
+from sqlalchemy import bindparam, update
+
+from mmisp.api.config import config
+from mmisp.db.database import sessionmanager
+from mmisp.db.models.user import User
+
+logger = logging.getLogger("mmisp")
+
+
+class AccessTimestampBuffer:
+    """
+    Collects the latest api access and login timestamp of every user until the next flush.
+
+    Only the newest timestamp per user and column is kept, so the number of pending updates is bounded by the
+    number of active users.
+    """
+
+    def __init__(self: Self, interval: float) -> None:
+        self.interval = interval
+        self.flushes = 0
+        self._pending: dict[str, dict[int, int]] = {"last_api_access": {}, "last_login": {}}
+        self._task: asyncio.Task | None = None
+
+    def record_api_access(self: Self, user_id: int, timestamp: int | None = None) -> None:
+        self._record("last_api_access", user_id, timestamp)
+
+    def record_login(self: Self, user_id: int, timestamp: int | None = None) -> None:
+        self._record("last_login", user_id, timestamp)
+
+    def _record(self: Self, column: str, user_id: int, timestamp: int | None) -> None:
+        if timestamp is None:
+            timestamp = int(time())
+        pending = self._pending[column]
+        if pending.get(user_id, 0) < timestamp:
+            pending[user_id] = timestamp
+
+    def pending(self: Self) -> int:
+        return sum(len(updates) for updates in self._pending.values())
+
+    async def flush(self: Self) -> int:
+        """
+        Writes all pending timestamps to the database.
+
+        Updates that could not be written are kept and retried on the next flush.
+
+        returns:
+            the number of written updates
+        """
+        pending = {column: updates for column, updates in self._pending.items() if updates}
+        if not pending or sessionmanager is None:
+            return 0
+
+        self._pending = {column: {} for column in self._pending}
+        try:
+            async with sessionmanager.session() as session:
+                for column, updates in pending.items():
+                    target = getattr(User, column)
+                    statement = (
+                        update(User.__table__)
+                        .where(User.id == bindparam("user_id"), target < bindparam("timestamp"))
+                        .values({column: bindparam("timestamp")})
+                    )
+                    await session.execute(
+                        statement,
+                        [{"user_id": user_id, "timestamp": timestamp} for user_id, timestamp in updates.items()],
+                    )
+        except Exception:
+            logger.exception("Could not write access timestamps")
+            for column, updates in pending.items():
+                for user_id, timestamp in updates.items():
+                    self._record(column, user_id, timestamp)
+            return 0
+
+        self.flushes += 1
+        return sum(len(updates) for updates in pending.values())
+
+    async def _run(self: Self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self: Self) -> None:
+        """
+        Starts flushing periodically on the running event loop. An interval of zero only flushes on shutdown.
+        """
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self: Self) -> None:
+        """
+        Stops the periodic flush and writes the remaining timestamps.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def clear(self: Self) -> None:
+        for updates in self._pending.values():
+            updates.clear()
+
+
+access_timestamps = AccessTimestampBuffer(config.ACCESS_TIMESTAMP_FLUSH_INTERVAL)
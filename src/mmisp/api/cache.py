@@ -0,0 +1,88 @@
+"""
+Modern MISP API - mmisp.api.cache
+
+Small in-process caches used to avoid repeated work on hot request paths.
+
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable
+from time import monotonic
+from typing import Generic, Self, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    A bounded least-recently-used cache whose entries expire after a fixed time to live.
+
+    The cache is local to the worker process, so entries may be stale for at most `ttl` seconds
+    when the underlying data is changed by another process.
+    A `ttl` of zero or a `maxsize` of zero disables the cache.
+    """
+
+    def __init__(self: Self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self: Self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self: Self, key: K) -> V | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires, value = entry
+        if expires <= monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self: Self, key: K, value: V) -> None:
+        if not self.enabled:
+            return
+
+        self._data[key] = (monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self: Self, key: K) -> V | None:
+        entry = self._data.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def invalidate(self: Self, predicate: Callable[[K, V], bool]) -> int:
+        """
+        Removes all entries matching the predicate.
+
+        args:
+            predicate: called with key and value of every entry
+
+        returns:
+            the number of removed entries
+        """
+        keys = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self: Self) -> None:
+        self._data.clear()
+
+    def statistics(self: Self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+    def __len__(self: Self) -> int:
+        return len(self._data)
@@ -0,0 +1,147 @@
+"""
+Modern MISP API - mmisp.api.conditional
+
+Conditional requests (`ETag`, `If-None-Match`) for entity endpoints.
+
+The entity tag of a response is derived from the version of the entity,
+e.g. its timestamp and the timestamps and counts of its attributes, and from the access scope of the requester,
+so users with different access never share an entity tag.
+The tags are weak, as equal tags promise equivalent but not byte-identical content.
+No `Last-Modified` header is sent, as the version also covers changes not reflected by any timestamp,
+e.g. removed tags, so `If-Modified-Since` could not be answered reliably.
+
+Only conditional requests run a cheap version query of the entity up front. If the tag sent by the client
+matches, the endpoint answers `304 Not Modified` before loading relationships or serializing the entity.
+All other requests derive the same version from the rows loaded for the response.
+"""
+
+import hashlib
+from collections.abc import Iterable
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Self
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from mmisp.db.models.user import User
+from mmisp.lib.permissions import Permission
+
+
+def access_scope(user: User | None) -> str:
+    """
+    returns:
+        a key for everything deciding which content the user may see
+    """
+    if user is None:
+        return "worker"
+    if user.role.check_permission(Permission.SITE_ADMIN):
+        return "site_admin"
+    return f"user:{user.id}:org:{user.org_id}:role:{user.role_id}"
+
+
+def _epoch(value: Any) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, date):
+        return int(datetime.combine(value, datetime.min.time()).timestamp())
+    return int(value or 0)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, date):
+        return _epoch(value)
+    if isinstance(value, Decimal):
+        # aggregates like SUM are returned as decimal by some databases
+        return int(value)
+    return value
+
+
+def maximum(values: Iterable[Any]) -> Any:
+    """
+    args:
+        values: the values to aggregate
+
+    returns:
+        the maximum of the values ignoring None like the SQL aggregate, None if there is no value
+    """
+    return max((value for value in values if value is not None), default=None)
+
+
+def conditional_request(request: Request) -> bool:
+    """
+    args:
+        request: the request
+
+    returns:
+        whether the request carries a precondition worth a version query
+    """
+    return "if-none-match" in request.headers
+
+
+def _etag_values(header: str) -> Iterable[str]:
+    for value in header.split(","):
+        value = value.strip()
+        yield value.removeprefix("W/")
+
+
+class Validators:
+    """
+    The validators of an entity response.
+
+    args:
+        etag: the weak entity tag
+    """
+
+    def __init__(self: Self, etag: str) -> None:
+        self.etag = etag
+
+    @classmethod
+    def of(cls: type[Self], user: User | None, kind: str, version: Iterable[Any]) -> Self:
+        """
+        args:
+            user: the requesting user
+            kind: the kind of the entity, e.g. the route
+            version: values changing with every modification of the entity
+
+        returns:
+            the validators of the entity as seen by the user
+        """
+        key = repr((kind, access_scope(user), [_normalize(value) for value in version]))
+        return cls('W/"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"')
+
+    @property
+    def headers(self: Self) -> dict[str, str]:
+        return {"ETag": self.etag}
+
+    def matches(self: Self, request: Request) -> bool:
+        """
+        Evaluates the `If-None-Match` precondition of the request.
+
+        args:
+            request: the request
+
+        returns:
+            whether the client's copy is still up to date
+        """
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is None:
+            return False
+        etag = self.etag.removeprefix("W/")
+        return any(value in ("*", etag) for value in _etag_values(if_none_match))
+
+    def not_modified(self: Self) -> Response:
+        return Response(status_code=304, headers=self.headers)
+
+    def apply(self: Self, response: Response) -> Response:
+        """
+        Adds the validators to a response.
+
+        args:
+            response: the response
+
+        returns:
+            the response
+        """
+        response.headers.update(self.headers)
+        return response
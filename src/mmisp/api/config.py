@@ -4,16 +4,21 @@ Database related settings are part of mmisp.db of the lib repository.
 """
 
 import logging
+import tempfile
 from enum import StrEnum
 from os import getenv
+from pathlib import Path
+from typing import Self
 
 from dotenv import load_dotenv
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
 class Runner(StrEnum):
     GUNICORN = "gunicorn"
     GRANIAN = "granian"
+    UVICORN = "uvicorn"
 
 
 class APIConfig(BaseSettings):
@@ -24,13 +29,62 @@ class APIConfig(BaseSettings):
     DASHBOARD_URL: str = ""
     READONLY_MODE: bool = False
     ENABLE_PROFILE: bool = False
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_STORE_SIZE: int = 100
+    PROFILE_DIRECTORY: str = ""
+    ENABLE_METRICS: bool = True
+    # shared by the workers of a host, an empty value keeps the metrics of every worker to itself
+    METRICS_DIRECTORY: str = str(Path(tempfile.gettempdir()) / "mmisp-metrics")
+    METRICS_FLUSH_INTERVAL: int = 5
+    SQL_REPEAT_THRESHOLD: int | None = None
+    SQL_STATEMENT_BUDGET: int | None = None
+    SERVER_TIMING: bool = False
+    EXPLAIN_SLOWEST_STATEMENTS: int = 3
+    EXPLAIN_STORE_SIZE: int = 50
+    EXPLAIN_STORE_TTL: int = 600
+    SLOW_QUERY_THRESHOLD_MS: float = 250
+    SLOW_QUERY_BUFFER_SIZE: int = 1000
+    SLOW_QUERY_DIRECTORY: str = ""
+    SLOW_QUERY_FLUSH_INTERVAL: int = 5
+    RESPONSE_CACHE_TTL: int = 300
+    RESPONSE_CACHE_SIZE: int = 256
+    RESPONSE_CACHE_DIRECTORY: str = ""
+    REST_SEARCH_BATCH_SIZE: int = 100
+    LAZY_IMPORTS: bool = True
     DEBUG: bool = False
     ENABLE_TEST_ENDPOINTS: bool = False
 
+    API_KEY_CACHE_TTL: int = 60
+    API_KEY_CACHE_SIZE: int = 1024
+    REJECTED_TOKEN_CACHE_TTL: int = 10
+    REJECTED_TOKEN_CACHE_SIZE: int = 4096
+    API_KEY_PREFIX_RELOAD_INTERVAL: int = 5
+    PRINCIPAL_CACHE_TTL: int = 30
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    HASHING_THREADS: int = 2
+    HASHING_QUEUE_SIZE: int = 32
+    ACCESS_TIMESTAMP_FLUSH_INTERVAL: int = 30
+    AUDIT_LOG_QUEUE_SIZE: int = 10000
+    AUDIT_LOG_BATCH_SIZE: int = 500
+
     RUNNER: Runner = Runner.GUNICORN
     PORT: int = 4000
     BIND_HOST: str = "0.0.0.0"
     WORKER_COUNT: int = 4
+    PRELOAD_APP: bool = False
+    WARM_UP: bool = False
+    WORKER_MAX_RSS_MB: int = 0
+    WORKER_MAX_REQUESTS: int = 0
+    WORKER_MAX_REQUESTS_JITTER: int = 0
+
+    @model_validator(mode="after")
+    def _query_detection_defaults(self: Self) -> Self:
+        # the query detection is a development aid, it is off outside of debug mode unless configured
+        if self.SQL_REPEAT_THRESHOLD is None:
+            self.SQL_REPEAT_THRESHOLD = 10 if self.DEBUG else 0
+        if self.SQL_STATEMENT_BUDGET is None:
+            self.SQL_STATEMENT_BUDGET = 200 if self.DEBUG else 0
+        return self
 
 
 load_dotenv(getenv("ENV_FILE", ".env"))
@@ -0,0 +1,108 @@
+"""
+Modern MISP API - mmisp.api.crypto
+
+Asynchronous wrappers around the password and API key hashing functions of mmisp.util.crypto.
+
+Hashing with bcrypt or argon2 takes tens of milliseconds and would block the event loop,
+so it is run on a small dedicated thread pool.
+The number of waiting hashing operations is limited, further requests are rejected with 503.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Self, TypeVar
+
+from fastapi import HTTPException, status
+
+from mmisp.api.config import config
+from mmisp.api.lazy_imports import lazy_import
+
+crypto = lazy_import("mmisp.util.crypto")
+
+T = TypeVar("T")
+
+
+class HashingExecutor:
+    """
+    Runs hashing functions on a bounded thread pool with admission control.
+
+    At most `threads` operations run at the same time and at most `queue_size` further operations wait for a thread.
+    The thread pool is created on first use, so it is not inherited by forked worker processes.
+    """
+
+    def __init__(self: Self, threads: int, queue_size: int) -> None:
+        self.threads = max(threads, 1)
+        self.queue_size = max(queue_size, 0)
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def limit(self: Self) -> int:
+        return self.threads + self.queue_size
+
+    async def run(self: Self, func: Callable[..., T], *args: str) -> T:
+        """
+        Runs the function on the thread pool.
+
+        args:
+            func: the blocking function
+            args: the arguments of the function
+
+        returns:
+            the result of the function
+        """
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests",
+                headers={"Retry-After": "1"},
+            )
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="mmisp-hashing")
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self: Self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def statistics(self: Self) -> dict[str, int]:
+        return {"in_flight": self.in_flight, "rejected": self.rejected, "limit": self.limit}
+
+
+hashing_executor = HashingExecutor(config.HASHING_THREADS, config.HASHING_QUEUE_SIZE)
+
+
+async def verify_secret(secret: str, secret_hash: str) -> bool:
+    """
+    Verifies a secret against its hash without blocking the event loop.
+
+    args:
+        secret: the secret in clear text
+        secret_hash: the stored hash
+
+    returns:
+        whether the secret matches the hash
+    """
+    return await hashing_executor.run(crypto.verify_secret, secret, secret_hash)
+
+
+async def hash_secret(secret: str) -> str:
+    """
+    Hashes a secret without blocking the event loop.
+
+    args:
+        secret: the secret in clear text
+
+    returns:
+        the hash of the secret
+    """
+    return await hashing_executor.run(crypto.hash_secret, secret)
@@ -1,12 +1,63 @@
+import os
+from pathlib import Path
+
 from mmisp.api.config import Runner, config
 
 
+def available_cores() -> int:
+    """
+    returns:
+        the number of cores the process may use, limited by its CPU affinity and the CPU quota of its cgroup
+    """
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: the quota is -1 if unlimited
+            quota = Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text().strip()
+            period = Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text().strip()
+        except OSError:
+            return cores
+
+    if quota in ("max", "-1"):
+        return cores
+    return max(1, min(cores, -(-int(quota) // int(period))))
+
+
+def worker_count() -> int:
+    """
+    returns:
+        `WORKER_COUNT`, or one worker per available core if it is 0
+    """
+    if config.WORKER_COUNT > 0:
+        return config.WORKER_COUNT
+    return available_cores()
+
+
 def main() -> None:
+    workers = worker_count()
+    # recycled workers exit and have to be replaced by the runner
+    recycling = config.WORKER_MAX_RSS_MB > 0 or config.WORKER_MAX_REQUESTS > 0
+    if recycling and config.RUNNER == Runner.UVICORN:
+        # uvicorn does not replace exited workers, every recycle would remove a worker for good
+        raise SystemExit(
+            "WORKER_MAX_RSS_MB and WORKER_MAX_REQUESTS require RUNNER=gunicorn or RUNNER=granian, "
+            "uvicorn does not replace recycled workers"
+        )
+
     if config.RUNNER == Runner.GUNICORN:
         from gunicorn.app.base import BaseApplication  # type: ignore
 
         from mmisp.api.main import app
 
+        if config.PRELOAD_APP:
+            from mmisp.api.warm_up import preload
+
+            preload()
+
         class StandaloneApplication(BaseApplication):
             def __init__(self, app, options=None):  # noqa
                 self.options = options or {}
@@ -26,8 +77,9 @@ def main() -> None:
 
         options = {
             "bind": f"{config.BIND_HOST}:{config.PORT}",
-            "workers": config.WORKER_COUNT,
+            "workers": workers,
             "worker_class": "uvicorn.workers.UvicornWorker",
+            "preload_app": config.PRELOAD_APP,
         }
 
         StandaloneApplication(app, options).run()
@@ -37,10 +89,24 @@ def main() -> None:
         Granian(
             "mmisp.api.main:app",
             interface="asgi",  # type:ignore
-            workers=config.WORKER_COUNT,
+            workers=workers,
             address=config.BIND_HOST,
             port=config.PORT,
+            respawn_failed_workers=recycling,
         ).serve()  # type:ignore
+    elif config.RUNNER == Runner.UVICORN:
+        import uvicorn
+
+        # uvicorn spawns its workers, every worker imports the app itself;
+        # "auto" selects uvloop and httptools where they are installed with uvicorn[standard]
+        uvicorn.run(
+            "mmisp.api.main:app",
+            host=config.BIND_HOST,
+            port=config.PORT,
+            workers=workers,
+            loop="auto",
+            http="auto",
+        )
 
 
 if __name__ == "__main__":
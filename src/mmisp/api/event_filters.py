@@ -0,0 +1,420 @@
+"""
+Modern MISP API - mmisp.api.event_filters
+
+Compilation of the filters of event searches into SQL.
+
+Every filter becomes a predicate on the events table or a semi-join, e.g. `events.id IN (SELECT event_id FROM ...)`,
+so the database selects the matching events using its indexes instead of the API loading and discarding events.
+As in MISP, values of the tag and organisation filters can be lists separated by `|`, values prefixed with `!`
+exclude events, tags joined with `&&` are all required, and tags are matched by id, by name or by a name pattern
+containing `%`.
+The attribute filters of a restSearch, e.g. `type`, `category`, `value` and `to_ids`, have to match the same
+attribute, which the user has to be allowed to see, just like the attributes whose tags match a tag filter.
+`timestamp` and `publish_timestamp` accept a unix timestamp, an ISO 8601 date and time or a time relative to now,
+e.g. `7d`, as lower bound, or a `[from, to]` pair of them; the request bodies accepting these are defined here.
+Dates, e.g. `from` and `to`, are given as `YYYY-MM-DD` or as unix timestamp.
+"""
+
+import uuid
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Self
+
+from fastapi import HTTPException, status
+from pydantic import field_serializer
+from sqlalchemy import ColumnElement, and_, false, or_, select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from mmisp.api_schemas.events import IndexEventsBody, SearchEventsBody
+from mmisp.db.models.attribute import Attribute, AttributeTag
+from mmisp.db.models.event import Event, EventTag
+from mmisp.db.models.organisation import Organisation
+from mmisp.db.models.shadow_attribute import ShadowAttribute
+from mmisp.db.models.tag import Tag
+from mmisp.db.models.user import User
+
+
+def split_values(values: str | Iterable[str] | None, separator: str = "|") -> tuple[list[str], list[str]]:
+    """
+    args:
+        values: a value, values separated by `separator` or a list of values, each optionally prefixed with `!`
+        separator: the separator of values in a string
+
+    returns:
+        the included and the excluded values
+    """
+    if values is None:
+        return [], []
+    if isinstance(values, str):
+        values = values.split(separator)
+
+    included: list[str] = []
+    excluded: list[str] = []
+    for value in values:
+        value = value.strip()
+        if value.startswith("!"):
+            value = value[1:].strip()
+            if value:
+                excluded.append(value)
+        elif value:
+            included.append(value)
+    return included, excluded
+
+
+TimestampFilter = int | str | list[int | str]
+_TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+class SearchEventsFilterBody(SearchEventsBody):
+    """
+    The body of an event restSearch, whose timestamp filters also accept ranges and relative times.
+    """
+
+    publish_timestamp: TimestampFilter | None = None  # type:ignore[assignment]
+    timestamp: TimestampFilter | None = None  # type:ignore[assignment]
+
+    @field_serializer("timestamp", "publish_timestamp")
+    def serialize_timestamp(self: Self, timestamp: TimestampFilter | None, _: Any) -> TimestampFilter | None:
+        return timestamp
+
+
+class IndexEventsFilterBody(IndexEventsBody):
+    """
+    The body of an event index, whose timestamp filters also accept ranges and relative times.
+    """
+
+    timestamp: TimestampFilter | None = None  # type:ignore[assignment]
+    publish_timestamp: TimestampFilter | None = None  # type:ignore[assignment]
+
+    @field_serializer("timestamp", "publish_timestamp")
+    def serialize_timestamp(self: Self, timestamp: TimestampFilter | None, _: Any) -> TimestampFilter | None:
+        return timestamp
+
+
+def parse_date(value: str, name: str) -> date:
+    """
+    args:
+        value: a date as `YYYY-MM-DD` or as unix timestamp
+        name: the name of the filter, for the error message
+
+    returns:
+        the date
+    """
+    try:
+        if value.isdigit():
+            return datetime.fromtimestamp(int(value), timezone.utc).date()
+        return date.fromisoformat(value)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid date in {name}.")
+
+
+def parse_timestamp(value: datetime | int | str, name: str) -> datetime:
+    """
+    args:
+        value: a unix timestamp, an ISO 8601 date and time, or a time relative to now like `7d`,
+            with the units `s`, `m`, `h`, `d` and `w`
+        name: the name of the filter, for the error message
+
+    returns:
+        the point in time
+    """
+    if isinstance(value, datetime):
+        return value
+    try:
+        if isinstance(value, int) or value.isdigit():
+            return datetime.fromtimestamp(int(value), timezone.utc)
+        if value[:-1].isdigit() and value[-1:] in _TIME_UNITS:
+            return datetime.now(timezone.utc) - timedelta(seconds=int(value[:-1]) * _TIME_UNITS[value[-1]])
+        return datetime.fromisoformat(value)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid timestamp in {name}.")
+
+
+def timestamp_filters(
+    column: InstrumentedAttribute, value: TimestampFilter | datetime | None, name: str
+) -> list[ColumnElement[bool]]:
+    """
+    args:
+        column: the timestamp column of the events, e.g. `Event.timestamp`
+        value: the lower bound, or a `[from, to]` pair of bounds
+        name: the name of the filter, for the error message
+
+    returns:
+        the conditions on the events
+    """
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        return [column >= parse_timestamp(value, name)]
+    if len(value) != 2:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid range in {name}.")
+    start, end = value
+    return [column >= parse_timestamp(start, name), column <= parse_timestamp(end, name)]
+
+
+def _tag_matches(values: list[str]) -> ColumnElement[bool]:
+    ids = [int(value) for value in values if value.isdigit()]
+    patterns = [value for value in values if not value.isdigit() and "%" in value]
+    names = [value for value in values if not value.isdigit() and "%" not in value]
+    conditions: list[ColumnElement[bool]] = [Tag.name.like(pattern) for pattern in patterns]
+    if ids:
+        conditions.append(Tag.id.in_(ids))
+    if names:
+        conditions.append(Tag.name.in_(names))
+    return or_(false(), *conditions)
+
+
+def event_ids_with_tags(values: list[str], user: User | None, attribute_tags: bool = False) -> ColumnElement[bool]:
+    """
+    args:
+        values: tag ids, names or name patterns
+        user: the searching user, only the tags of attributes the user can access count
+        attribute_tags: whether tags of the attributes of an event count as well
+
+    returns:
+        the semi-join of the events having at least one of the tags
+    """
+    condition = Event.id.in_(
+        select(EventTag.event_id).join(Tag, Tag.id == EventTag.tag_id).filter(_tag_matches(values))
+    )
+    if not attribute_tags:
+        return condition
+    return or_(
+        condition,
+        Event.id.in_(
+            select(AttributeTag.event_id)
+            .join(Tag, Tag.id == AttributeTag.tag_id)
+            .join(Attribute, Attribute.id == AttributeTag.attribute_id)
+            .filter(_tag_matches(values), Attribute.can_access(user))
+        ),
+    )
+
+
+def tag_filters(
+    values: str | Iterable[str] | None, user: User | None, attribute_tags: bool = False
+) -> list[ColumnElement[bool]]:
+    """
+    args:
+        values: the tags of a filter, events need one of the included tags or all tags of an entry joined with `&&`,
+            and none of the excluded tags
+        user: the searching user, only the tags of attributes the user can access count
+        attribute_tags: whether included tags of the attributes of an event count as well,
+            excluded tags are matched on the event only
+
+    returns:
+        the conditions on the events
+    """
+    included, excluded = split_values(values)
+    alternatives = [value for value in included if "&&" not in value]
+    required = [[tag for tag in value.split("&&") if tag] for value in included if "&&" in value]
+
+    matches = [event_ids_with_tags(alternatives, user, attribute_tags)] if alternatives else []
+    for tags in required:
+        matches.append(and_(*[event_ids_with_tags([tag], user, attribute_tags) for tag in tags]))
+
+    conditions: list[ColumnElement[bool]] = []
+    if matches:
+        conditions.append(or_(*matches))
+    if excluded:
+        conditions.append(~event_ids_with_tags(excluded, user))
+    return conditions
+
+
+def _organisation_ids(values: list[str]) -> ColumnElement[bool]:
+    ids = [int(value) for value in values if value.isdigit()]
+    others = [value for value in values if not value.isdigit()]
+    return or_(
+        Organisation.id.in_(ids),
+        Organisation.name.in_(others),
+        Organisation.uuid.in_(others),
+    )
+
+
+def organisation_filters(
+    column: InstrumentedAttribute, values: str | Iterable[str] | None
+) -> list[ColumnElement[bool]]:
+    """
+    args:
+        column: the organisation id column of the events, e.g. `Event.orgc_id`
+        values: organisation ids, names or uuids
+
+    returns:
+        the conditions on the events
+    """
+    included, excluded = split_values(values)
+    conditions: list[ColumnElement[bool]] = []
+    if included:
+        conditions.append(column.in_(select(Organisation.id).filter(_organisation_ids(included))))
+    if excluded:
+        conditions.append(column.not_in(select(Organisation.id).filter(_organisation_ids(excluded))))
+    return conditions
+
+
+def _integer(value: str | int, name: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid {name}.")
+
+
+def _events_with_attributes(conditions: list[ColumnElement[bool]], user: User | None) -> ColumnElement[bool]:
+    return Event.id.in_(select(Attribute.event_id).filter(Attribute.can_access(user), *conditions))
+
+
+def index_events_filters(body: IndexEventsBody, user: User | None) -> list[ColumnElement[bool]]:
+    """
+    Compiles the filters of an event index.
+
+    args:
+        body: the request body
+        user: the searching user, the attribute filter only matches attributes the user can access
+
+    returns:
+        the conditions on the events, all of which have to match
+    """
+    conditions: list[ColumnElement[bool]] = []
+
+    if body.eventid is not None:
+        conditions.append(Event.id == body.eventid)
+    if body.eventinfo:
+        conditions.append(Event.info.like(f"%{body.eventinfo}%"))
+    if body.published is not None:
+        conditions.append(Event.published == body.published)
+    if body.distribution is not None:
+        conditions.append(Event.distribution == body.distribution)
+    if body.sharinggroup:
+        conditions.append(Event.sharing_group_id == _integer(body.sharinggroup, "sharinggroup"))
+    if body.analysis is not None and body.analysis != "":
+        conditions.append(Event.analysis == _integer(body.analysis, "analysis"))
+    if body.threatlevel:
+        conditions.append(Event.threat_level_id == _integer(body.threatlevel, "threatlevel"))
+    conditions.extend(timestamp_filters(Event.timestamp, body.timestamp, "timestamp"))
+    conditions.extend(timestamp_filters(Event.publish_timestamp, body.publish_timestamp, "publish_timestamp"))
+
+    for name, value in (("datefrom", body.datefrom), ("searchDatefrom", body.searchDatefrom)):
+        if value:
+            conditions.append(Event.date >= parse_date(value, name))
+    for name, value in (("dateuntil", body.dateuntil), ("searchDateuntil", body.searchDateuntil)):
+        if value:
+            conditions.append(Event.date <= parse_date(value, name))
+
+    conditions.extend(organisation_filters(Event.orgc_id, body.org))
+    conditions.extend(tag_filters(body.tag, user))
+    conditions.extend(tag_filters(body.tags, user))
+
+    if body.attribute:
+        pattern = f"%{body.attribute}%"
+        conditions.append(
+            _events_with_attributes(
+                [Attribute.deleted.is_(False), or_(Attribute.value1.like(pattern), Attribute.value2.like(pattern))],
+                user,
+            )
+        )
+    if body.email:
+        conditions.append(Event.user_id.in_(select(User.id).filter(User.email.like(f"%{body.email}%"))))
+    if body.hasproposal:
+        with_proposals = Event.id.in_(select(ShadowAttribute.event_id).filter(ShadowAttribute.deleted.is_(False)))
+        conditions.append(with_proposals if body.hasproposal not in ("0", "false") else ~with_proposals)
+
+    return conditions
+
+
+def _value_matches(value: str) -> ColumnElement[bool]:
+    if "%" in value:
+        return or_(Attribute.value1.like(value), Attribute.value2.like(value))
+    return or_(Attribute.value1 == value, Attribute.value2 == value)
+
+
+def _column_filters(column: InstrumentedAttribute, values: str | None) -> list[ColumnElement[bool]]:
+    included, excluded = split_values(values)
+    conditions: list[ColumnElement[bool]] = []
+    if included:
+        conditions.append(column.in_(included))
+    if excluded:
+        conditions.append(column.not_in(excluded))
+    return conditions
+
+
+def rest_search_events_filters(body: SearchEventsBody, user: User | None) -> list[ColumnElement[bool]]:
+    """
+    Compiles the filters of an event restSearch.
+    Options of the output, e.g. `metadata` or `includeContext`, are not filters and are not handled here.
+
+    args:
+        body: the request body
+        user: the searching user, attribute filters only match attributes the user can access
+
+    returns:
+        the conditions on the events, all of which have to match
+    """
+    conditions: list[ColumnElement[bool]] = []
+
+    if body.eventid is not None:
+        conditions.append(Event.id == body.eventid)
+    if body.published is not None:
+        conditions.append(Event.published == body.published)
+    if body.threat_level_id is not None:
+        conditions.append(Event.threat_level_id == body.threat_level_id)
+    conditions.extend(timestamp_filters(Event.timestamp, body.timestamp, "timestamp"))
+    conditions.extend(timestamp_filters(Event.publish_timestamp, body.publish_timestamp, "publish_timestamp"))
+    if body.last:
+        conditions.append(Event.publish_timestamp >= datetime.now() - timedelta(seconds=body.last))
+    if body.from_:
+        conditions.append(Event.date >= parse_date(body.from_, "from"))
+    if body.to:
+        conditions.append(Event.date <= parse_date(body.to, "to"))
+
+    if body.uuid:
+        try:
+            event_uuid = uuid.UUID(body.uuid)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid uuid.")
+        # the uuid of the event or of one of its attributes, as in MISP
+        conditions.append(or_(Event.uuid == event_uuid, _events_with_attributes([Attribute.uuid == event_uuid], user)))
+
+    if body.sharinggroup:
+        included, excluded = split_values(body.sharinggroup)
+        if included:
+            conditions.append(Event.sharing_group_id.in_([_integer(value, "sharinggroup") for value in included]))
+        if excluded:
+            conditions.append(Event.sharing_group_id.not_in([_integer(value, "sharinggroup") for value in excluded]))
+
+    conditions.extend(organisation_filters(Event.orgc_id, body.org))
+    conditions.extend(tag_filters(body.tag, user, attribute_tags=True))
+    conditions.extend(tag_filters(body.tags, user, attribute_tags=True))
+    conditions.extend(tag_filters(body.event_tags, user))
+
+    attribute_conditions = [
+        *_column_filters(Attribute.type, body.type),
+        *_column_filters(Attribute.category, body.category),
+        *_column_filters(Attribute.object_relation, body.object_relation),
+    ]
+    if body.value is not None:
+        attribute_conditions.append(_value_matches(body.value))
+    if body.to_ids is not None:
+        attribute_conditions.append(Attribute.to_ids.is_(body.to_ids))
+    if attribute_conditions:
+        if not body.deleted:
+            attribute_conditions.append(Attribute.deleted.is_(False))
+        conditions.append(_events_with_attributes(attribute_conditions, user))
+
+    if body.searchall:
+        pattern = f"%{body.searchall}%"
+        conditions.append(
+            or_(
+                Event.info.like(pattern),
+                _events_with_attributes(
+                    [
+                        Attribute.deleted.is_(False),
+                        or_(
+                            Attribute.value1.like(pattern),
+                            Attribute.value2.like(pattern),
+                            Attribute.comment.like(pattern),
+                        ),
+                    ],
+                    user,
+                ),
+            )
+        )
+
+    return conditions
@@ -0,0 +1,133 @@
+"""
+Modern MISP API - mmisp.api.explain
+
+Diagnostic mode for requests with the `explain` query parameter.
+
+All SQL statements of such a request are taken from the SQL observer with their parameters, row counts and
+durations.
+For the slowest SELECT statements the query plan is fetched with EXPLAIN after the response has been sent.
+The report is only kept if the request was authorized as site admin. It is written to the log and
+stored for a short time, so it can be fetched from the `/explain/{explainId}` endpoint.
+"""
+
+import json
+import logging
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Self
+
+from mmisp.api.cache import TTLCache
+from mmisp.api.config import config
+from mmisp.api.sql_observer import ExecutedStatement
+from mmisp.db.database import sessionmanager
+
+logger = logging.getLogger("mmisp")
+
+MAX_PARAMETER_LENGTH = 200
+
+
+@dataclass
+class ExplainedStatement:
+    statement: str
+    parameters: str
+    rowcount: int
+    duration_ms: float
+    plan: list[list[Any]] | None = None
+    _raw_parameters: Any = field(default=None, repr=False)
+
+
+@dataclass
+class ExplainReport:
+    id: str
+    method: str
+    path: str
+    duration_ms: float = 0.0
+    statements: list[ExplainedStatement] = field(default_factory=list)
+    allowed: bool = False
+
+    def add_statement(self: Self, executed: ExecutedStatement) -> None:
+        self.statements.append(
+            ExplainedStatement(
+                statement=executed.statement,
+                parameters=repr(executed.parameters)[:MAX_PARAMETER_LENGTH],
+                rowcount=executed.rowcount,
+                duration_ms=executed.duration * 1000,
+                _raw_parameters=None if executed.executemany else executed.parameters,
+            )
+        )
+
+    def summary(self: Self) -> str:
+        sql_time = sum(statement.duration_ms for statement in self.statements)
+        return f"statements={len(self.statements)};sql={sql_time:.1f}ms"
+
+    def to_dict(self: Self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": self.duration_ms,
+            "statements": [
+                {key: value for key, value in asdict(statement).items() if not key.startswith("_")}
+                for statement in self.statements
+            ],
+        }
+
+
+current_explain_report: ContextVar[ExplainReport | None] = ContextVar("current_explain_report", default=None)
+
+explain_reports: TTLCache[str, ExplainReport] = TTLCache(config.EXPLAIN_STORE_SIZE, config.EXPLAIN_STORE_TTL)
+
+
+def allow_explain(allowed: bool) -> None:
+    """
+    Records whether the authenticated user of the current request may see its explain report.
+
+    args:
+        allowed: whether the user is a site admin
+    """
+    report = current_explain_report.get()
+    if report is not None:
+        report.allowed = allowed
+
+
+async def explain_slowest(report: ExplainReport, count: int) -> None:
+    """
+    Fetches the query plans of the slowest SELECT statements of the report.
+
+    args:
+        report: the report of a finished request
+        count: the number of statements to explain
+    """
+    if count <= 0 or sessionmanager is None or sessionmanager._engine is None:
+        return
+
+    candidates = [
+        statement
+        for statement in report.statements
+        if statement.statement.lstrip().upper().startswith("SELECT") and statement._raw_parameters is not None
+    ]
+    candidates.sort(key=lambda statement: statement.duration_ms, reverse=True)
+
+    async with sessionmanager._engine.connect() as connection:
+        prefix = "EXPLAIN QUERY PLAN" if connection.dialect.name == "sqlite" else "EXPLAIN"
+        for statement in candidates[:count]:
+            try:
+                result = await connection.exec_driver_sql(f"{prefix} {statement.statement}", statement._raw_parameters)
+                statement.plan = [list(row) for row in result.all()]
+            except Exception as e:
+                statement.plan = [[f"EXPLAIN failed: {e}"]]
+
+
+async def finish_report(report: ExplainReport) -> None:
+    """
+    Explains the slowest statements of a request authorized as site admin, then logs and stores the report.
+
+    args:
+        report: the report of a finished request
+    """
+    if not report.allowed:
+        return
+
+    await explain_slowest(report, config.EXPLAIN_SLOWEST_STATEMENTS)
+    explain_reports.set(report.id, report)
+    logger.info("Explain report %s", json.dumps(report.to_dict(), default=str))
@@ -0,0 +1,364 @@
+"""
+Modern MISP API - mmisp.api.json_encoder
+
+Direct ORM-row-to-JSON encoding for large responses.
+
+Building a pydantic response model for every row, serializing it and dumping the result with `json`
+dominates the CPU time of events with many attributes.
+A `RowEncoder` is compiled once from a response model: for every field of the model, in serialization order,
+it holds the JSON key and a function encoding the value of a row.
+Rows whose values are outside of what the field encoders handle, e.g. an attribute with a sharing group,
+are reported as not encodable and have to be rendered through the response model as before,
+so the output is byte-identical to the response FastAPI would produce.
+
+Pre-encoded fragments are wrapped in `RawJSON` and can be embedded into the content passed to `json_response`.
+`json_array_response` streams a document with a large array batch by batch instead.
+"""
+
+import json
+import logging
+import re
+from collections.abc import AsyncGenerator, Callable, Iterable
+from datetime import datetime
+from enum import Enum
+from functools import cache
+from json.encoder import encode_basestring  # type:ignore[attr-defined]
+from typing import Any, Self
+
+import fastapi.routing
+from fastapi.utils import create_model_field
+from pydantic import BaseModel
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from mmisp.api.server_timing import server_timing, timed
+
+logger = logging.getLogger("mmisp")
+
+_CANONICAL_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+class NotEncodable(Exception):
+    """
+    Raised by field encoders for values which have to be rendered through the response model.
+    """
+
+
+FieldEncoder = Callable[[Any], str]
+Getter = Callable[[Any], Any]
+
+
+class RawJSON:
+    """
+    An already encoded JSON value.
+    """
+
+    __slots__ = ("json",)
+
+    def __init__(self: Self, json: str) -> None:
+        self.json = json
+
+    @classmethod
+    def array(cls: type[Self], items: Iterable[str]) -> Self:
+        return cls("[" + ",".join(items) + "]")
+
+
+def column(name: str) -> Getter:
+    """
+    returns:
+        a getter reading the loaded column `name` of a row without triggering a lazy load
+    """
+
+    def get(row: Any) -> Any:
+        try:
+            return row.__dict__[name]
+        except KeyError:
+            raise NotEncodable(name)
+
+    return get
+
+
+def integer(get: Getter, *, none_as_zero: bool = False) -> FieldEncoder:
+    def encode(row: Any) -> str:
+        value = get(row)
+        if type(value) is int:
+            return str(value)
+        if value is None and none_as_zero:
+            return "0"
+        raise NotEncodable(value)
+
+    return encode
+
+
+def optional_integer(get: Getter) -> FieldEncoder:
+    def encode(row: Any) -> str:
+        value = get(row)
+        if value is None:
+            return "null"
+        if type(value) is int:
+            return str(value)
+        raise NotEncodable(value)
+
+    return encode
+
+
+def string(get: Getter) -> FieldEncoder:
+    def encode(row: Any) -> str:
+        value = get(row)
+        if type(value) is str:
+            return encode_basestring(value)
+        raise NotEncodable(value)
+
+    return encode
+
+
+def optional_string(get: Getter) -> FieldEncoder:
+    def encode(row: Any) -> str:
+        value = get(row)
+        if value is None:
+            return "null"
+        if type(value) is str:
+            return encode_basestring(value)
+        raise NotEncodable(value)
+
+    return encode
+
+
+def boolean(get: Getter) -> FieldEncoder:
+    def encode(row: Any) -> str:
+        value = get(row)
+        if value is True:
+            return "true"
+        if value is False:
+            return "false"
+        raise NotEncodable(value)
+
+    return encode
+
+
+def choice(get: Getter, choices: Iterable[Any]) -> FieldEncoder:
+    """
+    Encodes values of an enum or literal field, values outside of `choices` are not encodable.
+    """
+    encoded = {
+        (value.value if isinstance(value, Enum) else value): json.dumps(
+            value.value if isinstance(value, Enum) else value, ensure_ascii=False
+        )
+        for value in choices
+    }
+
+    def encode(row: Any) -> str:
+        value = get(row)
+        if type(value) is int or type(value) is str:
+            encoded_value = encoded.get(value)
+            if encoded_value is not None:
+                return encoded_value
+        raise NotEncodable(value)
+
+    return encode
+
+
+def canonical_uuid(get: Getter) -> FieldEncoder:
+    """
+    Encodes uuid fields, only uuids in their canonical form are encodable.
+    """
+
+    def encode(row: Any) -> str:
+        value = get(row)
+        if type(value) is str and len(value) == 36 and _CANONICAL_UUID.fullmatch(value):
+            return f'"{value}"'
+        raise NotEncodable(value)
+
+    return encode
+
+
+def epoch(get: Getter) -> FieldEncoder:
+    """
+    Encodes datetime fields serialized as unix timestamp.
+    """
+
+    def encode(row: Any) -> str:
+        value = get(row)
+        if type(value) is datetime:
+            return str(int(value.timestamp()))
+        raise NotEncodable(value)
+
+    return encode
+
+
+def null(get: Getter) -> FieldEncoder:
+    """
+    Encodes optional fields, only `None` is encodable.
+    """
+
+    def encode(row: Any) -> str:
+        if get(row) is not None:
+            raise NotEncodable()
+        return "null"
+
+    return encode
+
+
+def empty_list(get: Getter | None = None) -> FieldEncoder:
+    """
+    Encodes list fields, only empty lists are encodable. Without `get` the field is always empty.
+    """
+
+    def encode(row: Any) -> str:
+        if get is not None and get(row):
+            raise NotEncodable()
+        return "[]"
+
+    return encode
+
+
+class RowEncoder:
+    """
+    Encodes rows to the JSON of a response model.
+
+    args:
+        model: the response model
+        fields: the encoder of every field, keyed by field name
+    """
+
+    def __init__(self: Self, model: type[BaseModel], fields: dict[str, FieldEncoder]) -> None:
+        self.model = model
+        missing = set(model.model_fields) - set(fields)
+        unknown = set(fields) - set(model.model_fields)
+        self.enabled = not missing and not unknown
+        if not self.enabled:
+            logger.warning(
+                "Direct JSON encoding of %s is disabled, fields without encoder: %s, unknown fields: %s",
+                model.__name__,
+                sorted(missing),
+                sorted(unknown),
+            )
+
+        self._fields = [
+            (encode_basestring(info.alias or name) + ":", fields[name])
+            for name, info in model.model_fields.items()
+            if name in fields
+        ]
+
+    def encode(self: Self, row: Any) -> str | None:
+        """
+        args:
+            row: the row to encode
+
+        returns:
+            the JSON of the row, or None if it has to be rendered through the response model
+        """
+        if not self.enabled:
+            return None
+        try:
+            return "{" + ",".join([key + encode(row) for key, encode in self._fields]) + "}"
+        except NotEncodable:
+            return None
+
+
+@cache
+def _response_field(model: Any) -> Any:
+    return create_model_field(
+        name="Response_" + getattr(model, "__name__", "content"), type_=model, mode="serialization"
+    )
+
+
+@timed("serialize")
+async def render_model(content: Any, response_model: Any = None) -> Any:
+    """
+    Serializes a response model the way FastAPI serializes the return value of an endpoint.
+
+    args:
+        content: the response model, or content of the type `response_model`
+        response_model: the response type, the type of `content` by default
+
+    returns:
+        the JSON compatible content
+    """
+    field = _response_field(response_model if response_model is not None else type(content))
+    return await fastapi.routing.serialize_response(field=field, response_content=content)
+
+
+def dumps(content: Any) -> str:
+    """
+    Dumps JSON compatible content exactly like `JSONResponse`, embedding `RawJSON` values as they are.
+
+    args:
+        content: the content
+
+    returns:
+        the JSON document
+    """
+    if isinstance(content, RawJSON):
+        return content.json
+    if isinstance(content, dict):
+        return "{" + ",".join([encode_basestring(key) + ":" + dumps(value) for key, value in content.items()]) + "}"
+    if isinstance(content, list):
+        return "[" + ",".join([dumps(value) for value in content]) + "]"
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def json_response(content: Any) -> Response:
+    """
+    args:
+        content: JSON compatible content which may contain `RawJSON` values
+
+    returns:
+        the content as JSON response
+    """
+    with server_timing("serialize"):
+        body = dumps(content).encode("utf-8")
+    return Response(body, media_type="application/json")
+
+
+class BatchStreamingResponse(StreamingResponse):
+    """
+    Streams the chunks of `content` and closes it and the `batches` it encodes once the response is sent,
+    even if the client disconnected or the body was not iterated to its end.
+    So a database session held open by the batches is released with the response, not by the garbage collector.
+    """
+
+    def __init__(self: Self, content: AsyncGenerator[bytes, None], batches: AsyncGenerator[Any, None]) -> None:
+        super().__init__(content, media_type="application/json")
+        self._content = content
+        self._batches = batches
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._content.aclose()
+            await self._batches.aclose()
+
+
+async def json_array_response(key: str, batches: AsyncGenerator[list[Any], None]) -> BatchStreamingResponse:
+    """
+    Streams the document `{"<key>":[...]}` with one chunk per batch, producing the same bytes as `json_response`.
+    The first batch is rendered before the response is returned, so errors while rendering it still result in an
+    error response. Once the status is sent, an error truncates the document, which is logged as such.
+    The batches are closed when the response is done, see `BatchStreamingResponse`.
+
+    args:
+        key: the key of the array
+        batches: the JSON compatible items of the array, which may contain `RawJSON` values, in batches
+
+    returns:
+        the streaming response
+    """
+    first_batch = await anext(batches, None)
+
+    async def encode() -> AsyncGenerator[bytes, None]:
+        separator = "{" + encode_basestring(key) + ":["
+        batch = first_batch
+        try:
+            while batch is not None:
+                if batch:
+                    yield (separator + ",".join([dumps(item) for item in batch])).encode("utf-8")
+                    separator = ","
+                batch = await anext(batches, None)
+        except Exception:
+            logger.exception("Streaming the %r array failed after the response was started, it is truncated", key)
+            raise
+        yield ("]}" if separator == "," else separator + "]}").encode("utf-8")
+
+    return BatchStreamingResponse(encode(), batches)
@@ -0,0 +1,54 @@
+"""
+Modern MISP API - mmisp.api.lazy_imports
+
+Deferred imports of modules which are expensive to import but only needed by a few endpoints,
+e.g. httpx for calls to the worker, the workflow engine or the hashing libraries.
+
+With `LAZY_IMPORTS` enabled, such modules are imported on first attribute access instead of on import of the API,
+which shortens the boot of every worker at the cost of a slower first request using them.
+With `LAZY_IMPORTS` disabled, they are imported immediately, e.g. to load everything before forking the workers.
+"""
+
+import importlib
+from types import ModuleType
+from typing import Any, Self
+
+from mmisp.api.config import config
+
+# the names of all modules imported with lazy_import
+deferred_modules: set[str] = set()
+
+
+class LazyModule:
+    """
+    Stand-in for a module, which is imported on first attribute access.
+
+    args:
+        name: the absolute name of the module
+    """
+
+    def __init__(self: Self, name: str) -> None:
+        self.__name = name
+        self.__module: ModuleType | None = None
+
+    def __getattr__(self: Self, attribute: str) -> Any:
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, attribute)
+
+    def __repr__(self: Self) -> str:
+        return f"<lazy module {self.__name!r}>"
+
+
+def lazy_import(name: str) -> Any:
+    """
+    args:
+        name: the absolute name of the module
+
+    returns:
+        the module, or a stand-in importing it on first use if `LAZY_IMPORTS` is enabled
+    """
+    deferred_modules.add(name)
+    if not config.LAZY_IMPORTS:
+        return importlib.import_module(name)
+    return LazyModule(name)
@@ -1,35 +1,38 @@
-import importlib.resources
-import itertools
+import importlib
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 from importlib.metadata import version
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.orm import configure_mappers
 
 import mmisp.db.all_models  # noqa: F401
+from mmisp.api.audit_log import audit_log_writer
+from mmisp.api.bookkeeping import access_timestamps
 from mmisp.api.config import config
+from mmisp.api.crypto import hashing_executor
 from mmisp.api.exception_handler import register_exception_handler
-from mmisp.api.middleware import DryRunMiddleware, LogMiddleware
+from mmisp.api.metrics import MetricsMiddleware, metrics_registry
+from mmisp.api.middleware import DryRunMiddleware, ExplainMiddleware, LogMiddleware
+from mmisp.api.query_detector import QueryDetectorMiddleware
+from mmisp.api.recycling import RecyclingMiddleware, worker_recycler
+from mmisp.api.routers import router_module_names
+from mmisp.api.server_timing import ServerTimingMiddleware
+from mmisp.api.slow_queries import SlowQueryMiddleware, slow_query_log
+from mmisp.api.sql_observer import SqlObserverMiddleware
+from mmisp.api.warm_up import warm_up
 from mmisp.db.config import config as db_config
 from mmisp.db.database import sessionmanager
 
 if config.ENABLE_PROFILE:
     from mmisp.api.profile_middleware import ProfileMiddleware
 
-router_pkg = "mmisp.api.routers"
-all_routers = (
-    resource.name[:-3]
-    for resource in importlib.resources.files(router_pkg).iterdir()
-    if resource.is_file()
-    and resource.name != "__init__.py"
-    and (resource.name != "test_endpoints.py" or config.ENABLE_TEST_ENDPOINTS)
-)
-
-router_module_names = map(".".join, zip(itertools.repeat(router_pkg), all_routers))
+if not config.LAZY_IMPORTS:
+    configure_mappers()
 
 fastapi_routers = []
-for m in router_module_names:
+for m in router_module_names():
     mod = importlib.import_module(m)
     fastapi_routers.append(mod.router)
 
@@ -39,17 +42,25 @@ def init_app(*, init_db: bool = False) -> FastAPI:
         assert sessionmanager is not None
         sessionmanager.init()
 
-    if init_db:
-
-        @asynccontextmanager
-        async def lifespan(app: FastAPI) -> AsyncGenerator:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncGenerator:
+        if init_db:
             assert sessionmanager is not None
             await sessionmanager.create_all()
-            yield
+        access_timestamps.start()
+        audit_log_writer.start()
+        if config.WARM_UP:
+            await warm_up()
+        yield
+        await audit_log_writer.stop()
+        await access_timestamps.stop()
+        hashing_executor.shutdown()
+        metrics_registry.retire()
+        slow_query_log.retire()
+        if init_db:
+            assert sessionmanager is not None
             if sessionmanager._engine is not None:
                 await sessionmanager.close()
-    else:
-        lifespan = None  # type: ignore
 
     app = FastAPI(
         title="Modern MISP API",
@@ -65,12 +76,35 @@ def init_app(*, init_db: bool = False) -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["x-result-count", "x-worker-name-header", "x-queue-name-header"],
+        expose_headers=[
+            "x-result-count",
+            "x-worker-name-header",
+            "x-queue-name-header",
+            "x-next-cursor",
+            "etag",
+            "server-timing",
+            "x-profile-id",
+            "x-explain-id",
+            "x-explain-summary",
+        ],
     )
     app.add_middleware(DryRunMiddleware)
+    # inside the LogMiddleware, so their log entries are part of the request log
+    if config.SQL_REPEAT_THRESHOLD or config.SQL_STATEMENT_BUDGET:
+        app.add_middleware(QueryDetectorMiddleware)
+    app.add_middleware(ExplainMiddleware)
+    app.add_middleware(SlowQueryMiddleware)
     app.add_middleware(LogMiddleware)
+    if worker_recycler.enabled:
+        app.add_middleware(RecyclingMiddleware)
+    if config.ENABLE_METRICS:
+        app.add_middleware(MetricsMiddleware)
+    if config.SERVER_TIMING:
+        app.add_middleware(ServerTimingMiddleware)
     if config.ENABLE_PROFILE:
         app.add_middleware(ProfileMiddleware)
+    # outside of all middlewares reading the SQL statements of a request, so they share one observation
+    app.add_middleware(SqlObserverMiddleware)
 
     # include Routes
     for r in fastapi_routers:
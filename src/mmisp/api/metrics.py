@@ -0,0 +1,362 @@
+"""
+Modern MISP API - mmisp.api.metrics
+
+Per-route request metrics in the Prometheus text format.
+
+For every route template the latency histogram, the status codes, the response size,
+the number of SQL statements and the time spent in the database are recorded.
+The SQL figures are taken from the SQL observer, see mmisp.api.sql_observer.
+
+Recycled workers are counted per reason, see mmisp.api.recycling.
+
+Every worker periodically writes its metrics to a file in the metrics directory.
+The metrics endpoint merges the files of all workers,
+so it reports the same numbers regardless of which worker answers.
+The files are named by a worker id unique per process, as a reused pid must not continue the counters
+of an exited worker. On shutdown, e.g. after being recycled, a worker folds its metrics into the file of
+the retired workers and removes its own, so the directory does not grow with every replaced worker
+and the merged counters never go backwards.
+"""
+
+import fcntl
+import json
+import os
+import secrets
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import monotonic, perf_counter
+from typing import Any, Self
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from mmisp.api.config import config
+from mmisp.api.sql_observer import RequestSql, observe_request_sql
+
+RETIRED_WORKERS_FILE = "metrics-retired.json"
+_LOCK_FILE = "metrics.lock"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "unmatched"
+
+
+@dataclass
+class RouteMetrics:
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    duration: float = 0.0
+    count: int = 0
+    status_codes: dict[str, int] = field(default_factory=dict)
+    response_bytes: int = 0
+    statements: int = 0
+    db_time: float = 0.0
+
+    def observe(self: Self, duration: float, status_code: int, response_bytes: int, request: RequestSql) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.duration += duration
+        self.count += 1
+        status = str(status_code)
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        self.response_bytes += response_bytes
+        self.statements += request.count
+        self.db_time += request.duration
+
+    def merge(self: Self, other: "RouteMetrics") -> None:
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.duration += other.duration
+        self.count += other.count
+        for status, count in other.status_codes.items():
+            self.status_codes[status] = self.status_codes.get(status, 0) + count
+        self.response_bytes += other.response_bytes
+        self.statements += other.statements
+        self.db_time += other.db_time
+
+
+class MetricsRegistry:
+    """
+    Metrics of the current worker, keyed by http method and route template.
+    """
+
+    def __init__(self: Self, directory: str = "", flush_interval: float = 5) -> None:
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.worker_recycles: dict[str, int] = {}
+        self._flushed_at = 0.0
+        self._worker_pid = 0
+        self._worker_id = ""
+
+    @property
+    def worker_id(self: Self) -> str:
+        """
+        returns:
+            the id of the current worker process, generated anew in every forked worker
+        """
+        pid = os.getpid()
+        if pid != self._worker_pid:
+            self._worker_pid = pid
+            self._worker_id = f"{pid}-{secrets.token_hex(4)}"
+        return self._worker_id
+
+    def observe(
+        self: Self,
+        method: str,
+        route: str,
+        duration: float,
+        status_code: int,
+        response_bytes: int,
+        request: RequestSql,
+    ) -> None:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        metrics.observe(duration, status_code, response_bytes, request)
+
+    def record_worker_recycle(self: Self, reason: str) -> None:
+        """
+        Counts the recycling of this worker and writes the metrics right away, as the worker is about to exit.
+
+        args:
+            reason: why the worker is recycled
+        """
+        self.worker_recycles[reason] = self.worker_recycles.get(reason, 0) + 1
+        self.flush()
+
+    def snapshot(self: Self) -> dict[str, Any]:
+        return _snapshot(self.routes, self.worker_recycles)
+
+    def flush_due(self: Self) -> bool:
+        return self.directory is not None and monotonic() - self._flushed_at >= self.flush_interval
+
+    def flush(self: Self) -> None:
+        """
+        Writes the metrics of this worker to the metrics directory.
+        The file is replaced atomically, so concurrent readers never see a partial file.
+        """
+        if self.directory is None:
+            return
+
+        self._flushed_at = monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write(self.directory / f"metrics-{self.worker_id}.json", self.snapshot())
+
+    def retire(self: Self) -> None:
+        """
+        Folds the metrics of this worker into the metrics of the retired workers and removes its file.
+        Called when the worker shuts down, metrics recorded afterwards are written to a new file.
+        """
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        retired_path = self.directory / RETIRED_WORKERS_FILE
+        with self._lock(fcntl.LOCK_EX):
+            retired = [snapshot for snapshot in [_read(retired_path)] if snapshot is not None]
+            snapshots = [*retired, self.snapshot()]
+            _write(retired_path, _snapshot(_merge_routes(snapshots), _merge_worker_recycles(snapshots)))
+            (self.directory / f"metrics-{self.worker_id}.json").unlink(missing_ok=True)
+        self.clear()
+
+    def merged(self: Self) -> dict[tuple[str, str], RouteMetrics]:
+        """
+        returns:
+            the metrics of all workers writing to the metrics directory, or of this worker if there is none
+        """
+        if self.directory is None:
+            return self.routes
+
+        self.flush()
+        return _merge_routes(self._snapshots())
+
+    def merged_worker_recycles(self: Self) -> dict[str, int]:
+        """
+        returns:
+            the recycled workers per reason of all workers writing to the metrics directory,
+            or of this worker if there is none
+        """
+        if self.directory is None:
+            return self.worker_recycles
+
+        return _merge_worker_recycles(self._snapshots())
+
+    def _snapshots(self: Self) -> list[dict[str, Any]]:
+        assert self.directory is not None
+        # a retiring worker moves its metrics from its own file to the retired workers' one
+        with self._lock(fcntl.LOCK_SH):
+            snapshots = [_read(path) for path in self.directory.glob("metrics-*.json")]
+        return [snapshot for snapshot in snapshots if snapshot is not None]
+
+    @contextmanager
+    def _lock(self: Self, operation: int) -> Iterator[None]:
+        assert self.directory is not None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / _LOCK_FILE, "a") as lock:
+            fcntl.flock(lock, operation)
+            yield
+
+    def clear(self: Self) -> None:
+        self.routes.clear()
+        self.worker_recycles.clear()
+
+
+def _snapshot(routes: dict[tuple[str, str], RouteMetrics], worker_recycles: dict[str, int]) -> dict[str, Any]:
+    return {
+        "routes": [
+            {"method": method, "route": route, **metrics.__dict__} for (method, route), metrics in routes.items()
+        ],
+        "worker_recycles": worker_recycles,
+    }
+
+
+def _merge_routes(snapshots: Iterable[dict[str, Any]]) -> dict[tuple[str, str], RouteMetrics]:
+    merged: dict[tuple[str, str], RouteMetrics] = {}
+    for snapshot in snapshots:
+        for entry in snapshot["routes"]:
+            entry = dict(entry)
+            key = (entry.pop("method"), entry.pop("route"))
+            merged.setdefault(key, RouteMetrics()).merge(RouteMetrics(**entry))
+    return merged
+
+
+def _merge_worker_recycles(snapshots: Iterable[dict[str, Any]]) -> dict[str, int]:
+    merged: dict[str, int] = {}
+    for snapshot in snapshots:
+        for reason, count in snapshot["worker_recycles"].items():
+            merged[reason] = merged.get(reason, 0) + count
+    return merged
+
+
+def _read(path: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path: Path, snapshot: dict[str, Any]) -> None:
+    temporary_path = path.with_suffix(".tmp")
+    temporary_path.write_text(json.dumps(snapshot))
+    os.replace(temporary_path, path)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics(routes: dict[tuple[str, str], RouteMetrics], worker_recycles: dict[str, int] | None = None) -> str:
+    """
+    Renders the metrics in the Prometheus text exposition format.
+
+    args:
+        routes: the metrics per http method and route template
+        worker_recycles: the number of recycled workers per reason
+
+    returns:
+        the metrics as text
+    """
+    items = sorted(routes.items())
+
+    def labels(method: str, route: str) -> str:
+        return f'method="{_label(method)}",route="{_label(route)}"'
+
+    def family(name: str, kind: str, description: str, samples: Iterable[str]) -> list[str]:
+        return [f"# HELP {name} {description}", f"# TYPE {name} {kind}", *samples]
+
+    lines = family(
+        "mmisp_http_request_duration_seconds",
+        "histogram",
+        "Request latency per route.",
+        (
+            sample
+            for (method, route), metrics in items
+            for sample in (
+                *(
+                    f'mmisp_http_request_duration_seconds_bucket{{{labels(method, route)},le="{bound}"}} '
+                    f"{sum(metrics.buckets[: index + 1])}"
+                    for index, bound in enumerate((*LATENCY_BUCKETS, "+Inf"))
+                ),
+                f"mmisp_http_request_duration_seconds_sum{{{labels(method, route)}}} {metrics.duration}",
+                f"mmisp_http_request_duration_seconds_count{{{labels(method, route)}}} {metrics.count}",
+            )
+        ),
+    )
+    lines += family(
+        "mmisp_http_requests_total",
+        "counter",
+        "Requests per route and status code.",
+        (
+            f'mmisp_http_requests_total{{{labels(method, route)},status="{status}"}} {count}'
+            for (method, route), metrics in items
+            for status, count in sorted(metrics.status_codes.items())
+        ),
+    )
+    lines += family(
+        "mmisp_http_response_bytes_total",
+        "counter",
+        "Response body bytes per route.",
+        (f"mmisp_http_response_bytes_total{{{labels(*key)}}} {metrics.response_bytes}" for key, metrics in items),
+    )
+    lines += family(
+        "mmisp_db_statements_total",
+        "counter",
+        "SQL statements executed per route.",
+        (f"mmisp_db_statements_total{{{labels(*key)}}} {metrics.statements}" for key, metrics in items),
+    )
+    lines += family(
+        "mmisp_db_duration_seconds_total",
+        "counter",
+        "Time spent executing SQL statements per route.",
+        (f"mmisp_db_duration_seconds_total{{{labels(*key)}}} {metrics.db_time}" for key, metrics in items),
+    )
+    lines += family(
+        "mmisp_worker_recycles_total",
+        "counter",
+        "Workers recycled per reason.",
+        (
+            f'mmisp_worker_recycles_total{{reason="{_label(reason)}"}} {count}'
+            for reason, count in sorted((worker_recycles or {}).items())
+        ),
+    )
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Records the metrics of every http request.
+    """
+
+    def __init__(self: Self, app: ASGIApp, registry: "MetricsRegistry | None" = None) -> None:
+        self.app = app
+        self.registry = registry if registry is not None else metrics_registry
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        response_bytes = 0
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        start = perf_counter()
+        with observe_request_sql(scope) as request:
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            finally:
+                duration = perf_counter() - start
+                # the matched route is stored in the scope by the router
+                route = scope["route"].path if "route" in scope else UNMATCHED_ROUTE
+                self.registry.observe(scope["method"], route, duration, status_code, response_bytes, request)
+                if self.registry.flush_due():
+                    self.registry.flush()
+
+
+metrics_registry = MetricsRegistry(config.METRICS_DIRECTORY, config.METRICS_FLUSH_INTERVAL)
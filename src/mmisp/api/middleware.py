@@ -1,42 +1,108 @@
 import logging
-from collections.abc import Callable
-from typing import Any, Self
+from time import perf_counter
+from typing import Self
+from uuid import uuid4
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from mmisp.db.database import dry_run, sessionmanager
-from mmisp.lib.logger import print_request_log, reset_db_log, reset_request_log, save_db_log
+from mmisp.api.audit_log import audit_log_writer
+from mmisp.api.explain import ExplainReport, current_explain_report, finish_report
+from mmisp.api.sql_observer import observe_request_sql
+from mmisp.db.database import dry_run
+from mmisp.lib.logger import db_log, print_request_log, reset_db_log, reset_request_log
 
 logger = logging.getLogger("mmisp")
 
 
-class LogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self: Self, request: Request, call_next: Callable) -> Any:
+class LogMiddleware:
+    """
+    Collects the logs of a request and emits them once the response has been sent.
+    Database log entries are written by the audit log writer in the background.
+
+    Implemented as a pure ASGI middleware, so streaming responses are passed through unchanged.
+    """
+
+    def __init__(self: Self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Reset logs for each request
         reset_request_log()
         reset_db_log()
         try:
             # Process the request
-            response = await call_next(request)
+            await self.app(scope, receive, send)
         except Exception as exc:
             logger.error("Exception occurred", exc_info=True)
             print_request_log()
             raise exc
         else:
             # Emit all logs at the end of the request if no exception
-            assert sessionmanager is not None
-            async with sessionmanager.session() as db:
-                await save_db_log(db)
+            await audit_log_writer.enqueue(db_log.get([]))
             print_request_log()
 
-        return response
 
+class DryRunMiddleware:
+    """
+    Sets the dry_run context variable for requests with the `dry_run` query parameter.
+    """
+
+    def __init__(self: Self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not QueryParams(scope["query_string"]).get("dry_run", False):
+            await self.app(scope, receive, send)
+            return
+
+        logger.info("Doing a dry-run request")
+        token = dry_run.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            dry_run.reset(token)
+
+
+class ExplainMiddleware:
+    """
+    Captures the SQL statements of requests with the `explain` query parameter.
+
+    The id of the report and a summary are returned in the `x-explain-id` and `x-explain-summary` headers,
+    if the request was authorized as site admin.
+    """
+
+    def __init__(self: Self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not QueryParams(scope["query_string"]).get("explain", False):
+            await self.app(scope, receive, send)
+            return
+
+        report = ExplainReport(id=uuid4().hex, method=scope["method"], path=scope["path"])
+        token = current_explain_report.set(report)
+        start = perf_counter()
+
+        async def send_with_explain_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and report.allowed:
+                headers = MutableHeaders(scope=message)
+                headers.append("x-explain-id", report.id)
+                headers.append("x-explain-summary", report.summary())
+            await send(message)
 
-class DryRunMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self: Self, request: Request, call_next: Callable) -> Any:
-        if request.query_params.get("dry_run", False):
-            logger.info("Doing a dry-run request")
-            dry_run.set(True)
+        with observe_request_sql(scope) as request:
+            request.subscribers.append(report.add_statement)
+            try:
+                await self.app(scope, receive, send_with_explain_headers)
+            finally:
+                # the EXPLAIN statements of the report are not part of it
+                request.subscribers.remove(report.add_statement)
+                current_explain_report.reset(token)
+                report.duration_ms = (perf_counter() - start) * 1000
 
-        return await call_next(request)
+        await finish_report(report)
@@ -0,0 +1,110 @@
+"""
+Modern MISP API - mmisp.api.pagination
+
+Keyset pagination with opaque cursors.
+
+Paging with `page` and `limit` makes the database read and discard all rows before the requested page,
+so deep pages get slower the deeper a client pages.
+A cursor holds the id of the last row of a page instead, the next page continues after this id using its index,
+so deep pages cost the same as the first page.
+Endpoints accept the cursor in the `cursor` query parameter, which takes precedence over `page`,
+and return the cursor of the next page in the `X-Next-Cursor` header as long as a page is full.
+"""
+
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Sequence
+from typing import Any, Self
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import Select
+from starlette.responses import Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Keyset:
+    """
+    The pagination of an endpoint by a unique integer column.
+
+    args:
+        scope: the name of the endpoint, cursors of other endpoints are rejected
+        column: the unique column the rows are ordered by, usually the id
+        descending: whether the rows are ordered by descending `column`
+    """
+
+    def __init__(self: Self, scope: str, column: InstrumentedAttribute, descending: bool = False) -> None:
+        self.scope = scope
+        self.column = column
+        self.descending = descending
+
+    def encode(self: Self, key: int) -> str:
+        """
+        args:
+            key: the value of the column of the last row of a page
+
+        returns:
+            the cursor of the next page
+        """
+        return urlsafe_b64encode(f"{self.scope}:{key}".encode()).decode().rstrip("=")
+
+    def decode(self: Self, cursor: str) -> int:
+        """
+        args:
+            cursor: a cursor returned by this endpoint
+
+        returns:
+            the value of the column of the last row of the previous page
+        """
+        try:
+            scope, key = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().rsplit(":", 1)
+            if scope == self.scope:
+                return int(key)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            pass
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+    def apply(self: Self, query: Select, cursor: str | None) -> Select:
+        """
+        Orders the query by the column and continues after the cursor.
+
+        args:
+            query: the query of the rows
+            cursor: the cursor of the requested page, None for the first page
+
+        returns:
+            the query of the page without its limit
+        """
+        query = query.order_by(self.column.desc() if self.descending else self.column)
+        if cursor is None:
+            return query
+
+        key = self.decode(cursor)
+        return query.filter(self.column < key if self.descending else self.column > key)
+
+    def next_cursor(self: Self, rows: Sequence[Any], limit: int | None) -> str | None:
+        """
+        args:
+            rows: the rows of the current page
+            limit: the size of a page
+
+        returns:
+            the cursor of the next page, or None if the current page is the last one
+        """
+        if limit is None or len(rows) < limit or not rows:
+            return None
+        return self.encode(getattr(rows[-1], self.column.key))
+
+    def set_next_cursor(self: Self, response: Response, rows: Sequence[Any], limit: int | None) -> None:
+        """
+        Sets the `X-Next-Cursor` header of the response if there is a next page.
+
+        args:
+            response: the response
+            rows: the rows of the current page
+            limit: the size of a page
+        """
+        cursor = self.next_cursor(rows, limit)
+        if cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -1,38 +1,69 @@
-from typing import Callable, Self
+import asyncio
+import random
+from time import perf_counter, time
+from typing import Self
+from uuid import uuid4
 
-from fastapi import FastAPI, Request, Response
 from pyinstrument import Profiler
-from pyinstrument.renderers.html import HTMLRenderer
-from pyinstrument.renderers.speedscope import SpeedscopeRenderer
-from starlette.middleware.base import BaseHTTPMiddleware
-
-
-class ProfileMiddleware(BaseHTTPMiddleware):
-    def __init__(self: Self, app: FastAPI) -> None:
-        super().__init__(app)
-        self.profile_type_to_ext = {"html": "html", "speedscope": "speedscope.json"}
-        self.profile_type_to_renderer = {
-            "html": HTMLRenderer,
-            "speedscope": SpeedscopeRenderer,
-        }
-
-    async def dispatch(self: Self, request: Request, call_next: Callable) -> Response:  # type: ignore
-        # If profiling is enabled and 'profile' query parameter is passed
-        if request.query_params.get("profile", False):
-            profile_type = request.query_params.get("profile_format", "speedscope")
-            renderer_class = self.profile_type_to_renderer.get(profile_type)
-            assert renderer_class is not None
-
-            with Profiler(interval=0.001, async_mode="enabled") as profiler:
-                response = await call_next(request)
-
-            # Write profile to file
-            extension = self.profile_type_to_ext[profile_type]
-            renderer = renderer_class()
-            with open(f"profile.{extension}", "w") as out_file:
-                out_file.write(profiler.output(renderer=renderer))
-
-            return response
-
-        # Proceed without profiling
-        return await call_next(request)
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from mmisp.api.config import config
+from mmisp.api.profile_store import ProfileInfo, ProfileStore, profile_store
+
+
+class ProfileMiddleware:
+    """
+    Profiles requests with the `profile` query parameter and a random sample of all other requests.
+
+    The profiles are kept in the profile store, the id of a profile is returned in the `x-profile-id` header.
+    """
+
+    def __init__(
+        self: Self, app: ASGIApp, store: ProfileStore = profile_store, sample_rate: float = config.PROFILE_SAMPLE_RATE
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            # Proceed without profiling
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+        status_code = 500
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("x-profile-id", profile_id)
+            await send(message)
+
+        started_at = time()
+        start = perf_counter()
+        profiler = Profiler(interval=0.001, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session = profiler.stop()
+            # the matched route is stored in the scope by the router
+            route = scope["route"].path if "route" in scope else scope["path"]
+            info = ProfileInfo(
+                id=profile_id,
+                method=scope["method"],
+                route=route,
+                path=scope["path"],
+                status_code=status_code,
+                started_at=started_at,
+                duration=perf_counter() - start,
+            )
+            await asyncio.to_thread(self.store.add, info, session)
+
+    def _should_profile(self: Self, scope: Scope) -> bool:
+        if QueryParams(scope["query_string"]).get("profile", False):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
@@ -0,0 +1,198 @@
+"""
+Modern MISP API - mmisp.api.profile_store
+
+Bounded storage for the request profiles recorded by the ProfileMiddleware.
+
+The newest profiles are kept in memory. If a directory is configured they are also written to disk,
+so that every worker sharing the directory can serve the profiles of all workers.
+"""
+
+import json
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Self
+
+from pyinstrument.renderers.html import HTMLRenderer
+from pyinstrument.renderers.speedscope import SpeedscopeRenderer
+from pyinstrument.session import Session
+
+from mmisp.api.config import config
+
+PROFILE_FORMATS = {
+    "html": (HTMLRenderer, "text/html", "html"),
+    "speedscope": (SpeedscopeRenderer, "application/json", "speedscope.json"),
+}
+
+
+@dataclass
+class ProfileInfo:
+    id: str
+    method: str
+    route: str
+    path: str
+    status_code: int
+    started_at: float
+    duration: float
+
+
+@dataclass
+class RouteProfileSummary:
+    method: str
+    route: str
+    count: int
+    mean_duration: float
+    max_duration: float
+
+
+class ProfileStore:
+    """
+    Ring buffer of the last `size` profiles.
+    """
+
+    def __init__(self: Self, size: int, directory: str = "") -> None:
+        self.size = max(size, 1)
+        self.directory = Path(directory) if directory else None
+        self._profiles: OrderedDict[str, tuple[ProfileInfo, Session]] = OrderedDict()
+        self._lock = Lock()
+
+    def add(self: Self, info: ProfileInfo, session: Session) -> None:
+        """
+        Stores a profile and evicts the oldest profiles beyond the size of the store.
+
+        Writes to disk, so it should be called from a worker thread.
+
+        args:
+            info: the metadata of the profile
+            session: the recorded pyinstrument session
+        """
+        with self._lock:
+            self._profiles[info.id] = (info, session)
+            while len(self._profiles) > self.size:
+                self._profiles.popitem(last=False)
+
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        session.save(self._session_path(info.id))
+        self._info_path(info.id).write_text(json.dumps(asdict(info)))
+
+        for outdated in self._info_files()[self.size :]:
+            self._remove(outdated.name.removesuffix(".info.json"))
+
+    def list_profiles(self: Self) -> list[ProfileInfo]:
+        """
+        returns:
+            the stored profiles, newest first
+        """
+        if self.directory is None:
+            with self._lock:
+                return [info for info, _ in reversed(self._profiles.values())]
+
+        infos = []
+        for path in self._info_files():
+            try:
+                infos.append(ProfileInfo(**json.loads(path.read_text())))
+            except (OSError, ValueError, TypeError):
+                # removed by another worker or partially written
+                continue
+        return infos
+
+    def get(self: Self, profile_id: str) -> tuple[ProfileInfo, Session] | None:
+        """
+        args:
+            profile_id: the id of the profile
+
+        returns:
+            the metadata and session of the profile, if it is still stored
+        """
+        with self._lock:
+            profile = self._profiles.get(profile_id)
+        if profile is not None or self.directory is None or not profile_id.isalnum():
+            return profile
+
+        try:
+            info = ProfileInfo(**json.loads(self._info_path(profile_id).read_text()))
+            return info, Session.load(self._session_path(profile_id))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def summarize(self: Self) -> list[RouteProfileSummary]:
+        """
+        returns:
+            the number and duration of the stored profiles per route
+        """
+        durations: dict[tuple[str, str], list[float]] = {}
+        for info in self.list_profiles():
+            durations.setdefault((info.method, info.route), []).append(info.duration)
+
+        return [
+            RouteProfileSummary(
+                method=method,
+                route=route,
+                count=len(values),
+                mean_duration=sum(values) / len(values),
+                max_duration=max(values),
+            )
+            for (method, route), values in sorted(durations.items(), key=lambda item: -sum(item[1]))
+        ]
+
+    def aggregate(self: Self, method: str, route: str) -> Session | None:
+        """
+        Combines all stored profiles of a route into one session.
+
+        args:
+            method: the http method of the route
+            route: the path template of the route
+
+        returns:
+            the combined session or None, if there are no profiles of the route
+        """
+        combined: Session | None = None
+        for info in self.list_profiles():
+            if info.method != method or info.route != route:
+                continue
+            profile = self.get(info.id)
+            if profile is None:
+                continue
+            combined = profile[1] if combined is None else Session.combine(combined, profile[1])
+        return combined
+
+    def clear(self: Self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+    def _info_files(self: Self) -> list[Path]:
+        assert self.directory is not None
+        if not self.directory.is_dir():
+            return []
+
+        files = []
+        for path in self.directory.glob("*.info.json"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        return [path for _, path in sorted(files, reverse=True)]
+
+    def _info_path(self: Self, profile_id: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{profile_id}.info.json"
+
+    def _session_path(self: Self, profile_id: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{profile_id}.pyisession"
+
+    def _remove(self: Self, profile_id: str) -> None:
+        self._info_path(profile_id).unlink(missing_ok=True)
+        self._session_path(profile_id).unlink(missing_ok=True)
+
+
+def render_profile(session: Session, profile_format: str) -> str:
+    renderer_class, _, _ = PROFILE_FORMATS[profile_format]
+    return renderer_class().render(session)
+
+
+profile_store = ProfileStore(config.PROFILE_STORE_SIZE, config.PROFILE_DIRECTORY)
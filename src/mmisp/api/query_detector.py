@@ -0,0 +1,162 @@
+"""
+Modern MISP API - mmisp.api.query_detector
+
+Detection of requests that execute too many SQL statements, in particular N+1 query patterns.
+
+The statements of every request are taken from the SQL observer and grouped by their normalized shape,
+i.e. the SQL with literals and parameter lists collapsed.
+Shapes repeated at least `SQL_REPEAT_THRESHOLD` times and requests above `SQL_STATEMENT_BUDGET` statements
+are logged as warnings with the route.
+The detection is only active if one of the thresholds is positive, by default only with `DEBUG`.
+"""
+
+import logging
+import re
+from collections import Counter
+from types import TracebackType
+from typing import Self
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from mmisp.api.config import config
+from mmisp.api.sql_observer import RequestSql, observe_request_sql, request_observers
+
+logger = logging.getLogger("mmisp")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_POSTCOMPILE = re.compile(r"\(?__\[POSTCOMPILE_\w+\]\)?")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Reduces a SQL statement to its shape, so executions with different parameters can be grouped.
+
+    args:
+        statement: the SQL statement
+
+    returns:
+        the statement with literals replaced by ? and parameter lists collapsed
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _POSTCOMPILE.sub("(?)", shape)
+    shape = _PARAMETER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def repeated_statements(request: RequestSql, threshold: int) -> list[tuple[str, int]]:
+    """
+    args:
+        request: the observation of a request collecting its statements
+        threshold: the minimal number of executions
+
+    returns:
+        the shapes executed at least `threshold` times with their count, most frequent first
+    """
+    shapes: Counter[str] = Counter()
+    for statement, count in (request.statements or {}).items():
+        shapes[normalize_statement(statement)] += count
+    return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+
+class QueryDetectorMiddleware:
+    """
+    Warns about repeated statements and exceeded budgets of http requests.
+    Only added to the app if one of `SQL_REPEAT_THRESHOLD` and `SQL_STATEMENT_BUDGET` is positive.
+    """
+
+    def __init__(
+        self: Self,
+        app: ASGIApp,
+        repeat_threshold: int = config.SQL_REPEAT_THRESHOLD or 0,
+        statement_budget: int = config.SQL_STATEMENT_BUDGET or 0,
+    ) -> None:
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.statement_budget = statement_budget
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with observe_request_sql(scope) as request:
+            request.collect_statements()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self._report(request)
+
+    def _report(self: Self, request: RequestSql) -> None:
+        if self.statement_budget > 0 and request.count > self.statement_budget:
+            logger.warning(
+                "%s %s executed %d SQL statements, the budget is %d",
+                request.method,
+                request.route,
+                request.count,
+                self.statement_budget,
+            )
+
+        if self.repeat_threshold > 0:
+            for shape, count in repeated_statements(request, self.repeat_threshold):
+                logger.warning(
+                    "Possible N+1 query in %s %s, %d executions of: %.300s",
+                    request.method,
+                    request.route,
+                    count,
+                    shape,
+                )
+
+
+class QueryCounter:
+    """
+    Collects the SQL statements of all requests handled while it is active.
+
+    Used as a context manager, e.g. by the `query_counter` test fixture::
+
+        with QueryCounter() as counter:
+            client.get("/events/1")
+        counter.assert_max_statements(10)
+    """
+
+    def __init__(self: Self) -> None:
+        self.requests: list[RequestSql] = []
+
+    def __enter__(self: Self) -> Self:
+        request_observers.append(self.requests.append)
+        return self
+
+    def __exit__(
+        self: Self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        request_observers.remove(self.requests.append)
+
+    @property
+    def count(self: Self) -> int:
+        return sum(request.count for request in self.requests)
+
+    def reset(self: Self) -> None:
+        self.requests.clear()
+
+    def assert_max_statements(self: Self, maximum: int) -> None:
+        """
+        Asserts that no recorded request executed more than `maximum` statements.
+        """
+        for request in self.requests:
+            assert request.count <= maximum, (
+                f"{request.method} {request.route} executed {request.count} SQL statements, expected at most {maximum}"
+            )
+
+    def assert_no_repeated_statements(self: Self, threshold: int) -> None:
+        """
+        Asserts that no recorded request executed a statement shape `threshold` or more times.
+        """
+        for request in self.requests:
+            repeated = repeated_statements(request, threshold)
+            assert not repeated, f"{request.method} {request.route} repeated statements: {repeated}"
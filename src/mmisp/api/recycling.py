@@ -0,0 +1,166 @@
+"""
+Modern MISP API - mmisp.api.recycling
+
+Recycling of workers which grew in memory or served many requests.
+
+Rendering large results can leave a worker with a large heap, which Python rarely returns to the system.
+After every request, the worker compares its resident set size with `WORKER_MAX_RSS_MB` and its number of
+served requests with `WORKER_MAX_REQUESTS` plus a random jitter of up to `WORKER_MAX_REQUESTS_JITTER`,
+so the workers do not all restart at the same time.
+A worker exceeding a limit sends itself SIGTERM: the server stops accepting connections, completes the requests
+in flight and exits, and the process manager, e.g. the gunicorn master, starts a new worker.
+The reason is written to the log, as system entry to the audit log and counted in the metrics.
+"""
+
+import logging
+import os
+import random
+import resource
+import signal
+import sys
+from collections.abc import Callable
+from typing import Self
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from mmisp.api.audit_log import audit_log_writer
+from mmisp.api.config import config
+from mmisp.api.metrics import metrics_registry
+from mmisp.db.models.log import Log
+from mmisp.lib.logger import db_log, print_request_log, reset_db_log, reset_request_log
+
+logger = logging.getLogger("mmisp")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def resident_set_size() -> int:
+    """
+    returns:
+        the resident set size of this process in bytes, or its peak if the current size is unknown
+    """
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on linux, bytes on macos
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _terminate() -> None:
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+class WorkerRecycler:
+    """
+    Decides when this worker is recycled.
+
+    args:
+        max_rss_mb: the resident set size in MiB above which the worker is recycled, 0 to disable
+        max_requests: the number of requests after which the worker is recycled, 0 to disable
+        max_requests_jitter: the maximum random number of requests added to `max_requests`
+        terminate: stops the worker gracefully
+    """
+
+    def __init__(
+        self: Self,
+        max_rss_mb: int,
+        max_requests: int,
+        max_requests_jitter: int = 0,
+        terminate: Callable[[], None] = _terminate,
+    ) -> None:
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.terminate = terminate
+        self.requests = 0
+        self.request_limit: int | None = None
+        self.reason: str | None = None
+
+    @property
+    def enabled(self: Self) -> bool:
+        return self.max_rss > 0 or self.max_requests > 0
+
+    async def request_finished(self: Self) -> None:
+        """
+        Counts a served request and recycles the worker if it exceeds one of the limits.
+        """
+        self.requests += 1
+        if self.reason is not None:
+            return
+
+        if self.request_limit is None:
+            # chosen on the first request, i.e. after the app was imported and the workers were forked,
+            # so every worker gets its own jitter
+            self.request_limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+        if self.max_requests > 0 and self.requests >= self.request_limit:
+            await self.recycle("requests", f"served {self.requests} requests")
+        elif self.max_rss > 0:
+            rss = resident_set_size()
+            if rss > self.max_rss:
+                await self.recycle("rss", f"resident set size of {rss // (1024 * 1024)} MiB")
+
+    async def recycle(self: Self, reason: str, detail: str) -> None:
+        """
+        Recycles the worker once.
+
+        args:
+            reason: the reason for the metrics, e.g. "rss" or "requests"
+            detail: a description of the reason for the log
+        """
+        if self.reason is not None:
+            return
+
+        self.reason = reason
+        pid = os.getpid()
+        # the request log of the last request is already written, this entry gets its own
+        reset_request_log()
+        reset_db_log()
+        logger.warning(
+            "recycling worker %d: %s",
+            pid,
+            detail,
+            extra=dict(
+                dbmodel=Log,
+                model="Worker",
+                model_id=pid,
+                action="recycle_worker",
+                user_id=0,
+                email="SYSTEM",
+                org="SYSTEM",
+                description=reason,
+                change="",
+                ip="",
+            ),
+        )
+        print_request_log()
+        # queued entries are written when the application shuts down
+        await audit_log_writer.enqueue(db_log.get([]))
+        metrics_registry.record_worker_recycle(reason)
+        self.terminate()
+
+
+class RecyclingMiddleware:
+    """
+    Checks the limits of the worker after every http request.
+    """
+
+    def __init__(self: Self, app: ASGIApp, recycler: WorkerRecycler | None = None) -> None:
+        self.app = app
+        self.recycler = recycler if recycler is not None else worker_recycler
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.recycler.request_finished()
+
+
+worker_recycler = WorkerRecycler(
+    config.WORKER_MAX_RSS_MB, config.WORKER_MAX_REQUESTS, config.WORKER_MAX_REQUESTS_JITTER
+)
@@ -0,0 +1,187 @@
+"""
+Modern MISP API - mmisp.api.response_cache
+
+Cache of the serialized responses of endpoints returning rarely changing reference data.
+
+Responses are cached per worker as JSON bytes, keyed by the endpoint and its parameters,
+together with the versions of the tables the response was built from.
+Every committed write to one of these tables bumps the version of the table,
+so cached responses of older versions are never served again.
+The versions are kept in files in `RESPONSE_CACHE_DIRECTORY`, one per table,
+so a write in one worker invalidates the cached responses of all workers sharing the directory.
+Writes by other processes, e.g. the worker, are picked up after at most `RESPONSE_CACHE_TTL` seconds.
+"""
+
+import functools
+import os
+import re
+import tempfile
+from collections.abc import Awaitable, Callable, Iterable
+from pathlib import Path
+from typing import Any, Self, TypeVar, get_type_hints
+from uuid import uuid4
+
+from fastapi.responses import Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState
+from sqlalchemy.orm import Session as ORMSession
+from starlette.requests import Request
+
+from mmisp.api.auth import Auth
+from mmisp.api.cache import TTLCache
+from mmisp.api.config import config
+from mmisp.api.json_encoder import dumps, render_model
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+_TEXT_WRITE = re.compile(r"\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+[`\"]?(\w+)", re.I)
+
+
+class TableVersions:
+    """
+    The versions of the tables responses are cached for.
+    Every version is a random token in the file `<table>.version` of the directory.
+    """
+
+    def __init__(self: Self, directory: str) -> None:
+        self.directory = Path(directory or Path(tempfile.gettempdir()) / "mmisp-response-cache")
+        self.watched: set[str] = set()
+
+    def watch(self: Self, tables: Iterable[str]) -> None:
+        self.watched.update(tables)
+
+    def current(self: Self, tables: Iterable[str]) -> tuple[str, ...]:
+        """
+        args:
+            tables: the names of the tables
+
+        returns:
+            the current version of every table
+        """
+        versions = []
+        for table in tables:
+            try:
+                versions.append((self.directory / f"{table}.version").read_text())
+            except OSError:
+                versions.append("")
+        return tuple(versions)
+
+    def bump(self: Self, tables: Iterable[str]) -> None:
+        """
+        Sets a new version for every watched table of `tables`.
+        The files are replaced atomically, so concurrent readers never see a partial version.
+
+        args:
+            tables: the names of the written tables
+        """
+        tables = [table for table in tables if table in self.watched]
+        if not tables:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for table in tables:
+            path = self.directory / f"{table}.version"
+            temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+            temporary_path.write_text(uuid4().hex)
+            os.replace(temporary_path, path)
+
+
+table_versions = TableVersions(config.RESPONSE_CACHE_DIRECTORY)
+response_cache: TTLCache[tuple, tuple[tuple[str, ...], bytes]] = TTLCache(
+    config.RESPONSE_CACHE_SIZE, config.RESPONSE_CACHE_TTL
+)
+# all endpoints decorated with cached_response, e.g. to warm up the cache
+cached_endpoints: list[Callable[..., Awaitable[Any]]] = []
+
+
+def _written_tables(session: ORMSession) -> set[str]:
+    return session.info.setdefault("response_cache_written_tables", set())
+
+
+@event.listens_for(ORMSession, "after_flush")
+def _after_flush(session: ORMSession, flush_context: Any) -> None:
+    tables = _written_tables(session)
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(type(instance), "__table__", None)
+        if table is not None:
+            tables.add(table.name)
+
+
+@event.listens_for(ORMSession, "do_orm_execute")
+def _do_orm_execute(orm_execute_state: ORMExecuteState) -> None:
+    statement = orm_execute_state.statement
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(statement, "table", None)
+        if table is not None:
+            _written_tables(orm_execute_state.session).add(table.name)
+    elif not orm_execute_state.is_select:
+        match = _TEXT_WRITE.match(str(statement))
+        if match is not None:
+            _written_tables(orm_execute_state.session).add(match.group(1))
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _after_commit(session: ORMSession) -> None:
+    # the versions are bumped after the commit, a response built from the data before the commit
+    # is stored with the old versions and never served again
+    tables = session.info.pop("response_cache_written_tables", None)
+    if tables:
+        table_versions.bump(tables)
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _after_rollback(session: ORMSession) -> None:
+    session.info.pop("response_cache_written_tables", None)
+
+
+def _cache_key(func: Callable, kwargs: dict[str, Any]) -> tuple:
+    parameters = tuple(
+        sorted(
+            (name, repr(value))
+            for name, value in kwargs.items()
+            if not isinstance(value, (Auth, AsyncSession, Request))
+        )
+    )
+    return func.__module__, func.__qualname__, parameters
+
+
+def cached_response(*models: Any) -> Callable[[F], F]:
+    """
+    Caches the responses of an endpoint whose response does not depend on the requesting user.
+
+    args:
+        models: the models of all tables the response is built from
+
+    returns:
+        the decorator
+    """
+    tables = tuple(sorted(model.__table__.name for model in models))
+    table_versions.watch(tables)
+
+    def decorator(func: F) -> F:
+        response_type = get_type_hints(func)["return"]
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not response_cache.enabled:
+                return await func(*args, **kwargs)
+
+            key = _cache_key(func, kwargs)
+            versions = table_versions.current(tables)
+            cached = response_cache.get(key)
+            if cached is not None and cached[0] == versions:
+                return Response(cached[1], media_type="application/json")
+
+            content = await func(*args, **kwargs)
+            if isinstance(content, Response):
+                return content
+
+            body = dumps(await render_model(content, response_type)).encode("utf-8")
+            response_cache.set(key, (versions, body))
+            return Response(body, media_type="application/json")
+
+        cached_endpoints.append(wrapper)
+        return wrapper  # type:ignore[return-value]
+
+    return decorator
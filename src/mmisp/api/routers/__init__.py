@@ -1 +1,20 @@
 # This package contains all routers with all fastapi endpoints for Modern MISP.
+import importlib.resources
+
+from mmisp.api.config import config
+
+
+def router_module_names() -> list[str]:
+    """
+    returns:
+        the names of all router modules enabled by the configuration
+    """
+    return [
+        f"{__name__}.{resource.name[:-3]}"
+        for resource in importlib.resources.files(__name__).iterdir()
+        if resource.is_file()
+        and resource.name != "__init__.py"
+        and (resource.name != "test_endpoints.py" or config.ENABLE_TEST_ENDPOINTS)
+        and (resource.name != "profiles.py" or config.ENABLE_PROFILE)
+        and (resource.name != "metrics.py" or config.ENABLE_METRICS)
+    ]
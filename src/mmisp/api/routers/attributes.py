@@ -5,11 +5,18 @@ from datetime import datetime
 from typing import Annotated, cast
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi.responses import Response
 from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import Select
+from starlette.requests import Request
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.conditional import Validators, conditional_request, maximum
+from mmisp.api.json_encoder import json_response, render_model
+from mmisp.api.lazy_imports import lazy_import
+from mmisp.api.pagination import Keyset
+from mmisp.api.response_cache import cached_response
 from mmisp.api_schemas.attributes import (
     AddAttributeAttributes,
     AddAttributeBody,
@@ -41,12 +48,14 @@ from mmisp.lib.attribute_search_filter import get_search_filters
 from mmisp.lib.distribution import AttributeDistributionLevels
 from mmisp.lib.logger import alog, log
 
-from ..workflow import execute_workflow
+workflow = lazy_import("mmisp.api.workflow")
 
 logger = logging.getLogger("mmisp")
 
 router = APIRouter(tags=["attributes"])
 
+_search_attributes_keyset = Keyset("attributes_rest_search", Attribute.id)
+
 
 @router.post(
     "/attributes/restSearch",
@@ -58,6 +67,8 @@ async def rest_search_attributes(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
     body: SearchAttributesBody,
+    response: Response,
+    cursor: str | None = None,
 ) -> SearchAttributesResponse:
     """Search for attributes based on various filters.
 
@@ -65,11 +76,13 @@ async def rest_search_attributes(
         auth: the user's authentification status
         db: the current database
         body: the search body
+        response: the response, for the cursor of the next page
+        cursor: the cursor of the page from the `X-Next-Cursor` header of the previous page, replaces `page`
 
     returns:
         the attributes the search finds
     """
-    return await _rest_search_attributes(db, body, auth.user)
+    return await _rest_search_attributes(db, body, auth.user, response, cursor)
 
 
 @router.post(
@@ -104,6 +117,7 @@ async def add_attribute(
     summary="Get all attribute describe types",
 )
 @alog
+@cached_response()
 async def get_attributes_describe_types(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
 ) -> GetDescribeTypesResponse:
@@ -121,6 +135,7 @@ async def get_attributes_describe_types(
 @router.get(
     "/attributes/{attributeId}",
     status_code=status.HTTP_200_OK,
+    response_model=GetAttributeResponse,
     summary="Get attribute details",
 )
 @alog
@@ -128,18 +143,20 @@ async def get_attribute_details(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
     attribute_id: Annotated[int | uuid.UUID, Path(alias="attributeId")],
-) -> GetAttributeResponse:
+    request: Request,
+) -> Response:
     """Retrieve details of a specific attribute by either by its ID or UUID.
 
     args:
         auth: the user's authentification status
         db: the current database
         attribute_id: the ID or UUID of the attribute
+        request: the request, for its conditional headers
 
     returns:
         the attribute details
     """
-    return await _get_attribute_details(db, attribute_id, auth.user)
+    return await _get_attribute_details(db, attribute_id, auth.user, request)
 
 
 @router.put(
@@ -390,7 +407,8 @@ async def get_attribute_details_depr(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
     attribute_id: Annotated[int, Path(alias="attributeId")],
-) -> GetAttributeResponse:
+    request: Request,
+) -> Response:
     """Deprecated. Retrieve details of a specific attribute by its ID using the old route.
 
     args:
@@ -401,11 +419,13 @@ async def get_attribute_details_depr(
 
     the id of the attribute
 
+    the request
+
     returns:
 
     the details of an attribute
     """
-    return await _get_attribute_details(db, attribute_id, auth.user)
+    return await _get_attribute_details(db, attribute_id, auth.user, request)
 
 
 @router.put(
@@ -515,7 +535,7 @@ async def _add_attribute(
 
     await db.refresh(new_attribute)
 
-    await execute_workflow("attribute-after-save", db, new_attribute)
+    await workflow.execute_workflow("attribute-after-save", db, new_attribute)
 
     setattr(event, "attribute_count", event.attribute_count + 1)
 
@@ -525,7 +545,14 @@ async def _add_attribute(
 
 
 @alog
-async def _get_attribute_details(db: Session, attribute_id: int | uuid.UUID, user: User | None) -> GetAttributeResponse:
+async def _get_attribute_details(
+    db: Session, attribute_id: int | uuid.UUID, user: User | None, request: Request
+) -> Response:
+    if conditional_request(request):
+        validators = await _attribute_validators(db, attribute_id, user)
+        if validators is not None and validators.matches(request):
+            return validators.not_modified()
+
     attribute: Attribute | None  # I have no idea, why this type declaration is necessary
 
     attribute = await _get_attribute(db, attribute_id, load_sharing_group=True)
@@ -536,9 +563,53 @@ async def _get_attribute_details(db: Session, attribute_id: int | uuid.UUID, use
     if not attribute.can_access(user):
         raise HTTPException(status.HTTP_403_FORBIDDEN)
 
-    attribute_data = await _prepare_get_attribute_details_response(db, attribute_id, attribute)
+    result = await db.execute(select(AttributeTag).filter(AttributeTag.attribute_id == attribute.id))
+    attribute_tags = result.scalars().all()
+    # the same values _attribute_validators queries
+    version = (
+        attribute.id,
+        attribute.timestamp,
+        attribute.deleted,
+        maximum(attribute_tag.id for attribute_tag in attribute_tags),
+        len(attribute_tags),
+    )
+    validators = Validators.of(user, "attribute", version)
 
-    return GetAttributeResponse(Attribute=attribute_data)
+    attribute_data = await _prepare_get_attribute_details_response(db, attribute_id, attribute, attribute_tags)
+
+    response = json_response(await render_model(GetAttributeResponse(Attribute=attribute_data)))
+    return validators.apply(response)
+
+
+async def _attribute_validators(db: Session, attribute_id: int | uuid.UUID, user: User | None) -> Validators | None:
+    """
+    Computes the validators of an attribute from its timestamp and its tags.
+
+    args:
+        db: the current database
+        attribute_id: the ID or UUID of the attribute
+        user: the requesting user
+
+    returns:
+        the validators, or None if the attribute does not exist or the user may not access it
+    """
+    query: Select = select(
+        Attribute.id,
+        Attribute.timestamp,
+        Attribute.deleted,
+        select(func.max(AttributeTag.id)).filter(AttributeTag.attribute_id == Attribute.id).scalar_subquery(),
+        select(func.count(AttributeTag.id)).filter(AttributeTag.attribute_id == Attribute.id).scalar_subquery(),
+    ).filter(Attribute.can_access(user))
+    if isinstance(attribute_id, int):
+        query = query.filter(Attribute.id == attribute_id)
+    else:
+        query = query.filter(Attribute.uuid == attribute_id)
+
+    version = (await db.execute(query)).one_or_none()
+    if version is None:
+        return None
+
+    return Validators.of(user, "attribute", version)
 
 
 @alog
@@ -587,7 +658,7 @@ async def _update_attribute(
     attribute.patch(**payload)
     attribute.timestamp = datetime.now()
 
-    await execute_workflow("attribute-after-save", db, attribute)
+    await workflow.execute_workflow("attribute-after-save", db, attribute)
 
     await db.flush()
     await db.refresh(attribute)
@@ -636,7 +707,11 @@ async def _get_attributes(db: Session, user: User | None) -> list[GetAllAttribut
 
 @alog
 async def _rest_search_attributes(
-    db: Session, body: SearchAttributesBody, user: User | None
+    db: Session,
+    body: SearchAttributesBody,
+    user: User | None,
+    response: Response,
+    cursor: str | None,
 ) -> SearchAttributesResponse:
     if body.returnFormat != "json":
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid output format.")
@@ -653,13 +728,17 @@ async def _rest_search_attributes(
         )
     )
 
+    if body.limit is not None or cursor is not None:
+        qry = _search_attributes_keyset.apply(qry, cursor)
     if body.limit is not None:
-        body.page = body.page or 1
         qry = qry.limit(body.limit)
-        qry = qry.offset((body.page - 1) * body.limit)
+        if cursor is None:
+            body.page = body.page or 1
+            qry = qry.offset((body.page - 1) * body.limit)
 
     result = await db.execute(qry)
     attributes: Sequence[Attribute] = result.scalars().all()
+    _search_attributes_keyset.set_next_cursor(response, attributes, body.limit)
 
     response_list = []
     for attribute in attributes:
@@ -703,7 +782,7 @@ async def _restore_attribute(db: Session, attribute_id: int | uuid.UUID, user: U
     await db.flush()
     await db.refresh(attribute)
 
-    await execute_workflow("attribute-after-save", db, attribute)
+    await workflow.execute_workflow("attribute-after-save", db, attribute)
 
     attribute_data = await _prepare_get_attribute_details_response(db, attribute.id, attribute)
 
@@ -804,15 +883,19 @@ def _prepare_attribute_response_get_all(attribute: Attribute) -> GetAllAttribute
 
 @alog
 async def _prepare_get_attribute_details_response(
-    db: Session, attribute_id: int | uuid.UUID, attribute: Attribute
+    db: Session,
+    attribute_id: int | uuid.UUID,
+    attribute: Attribute,
+    db_attribute_tags: Sequence[AttributeTag] | None = None,
 ) -> GetAttributeAttributes:
     attribute_dict = attribute.asdict()
 
     if "event_uuid" not in attribute_dict.keys():
         attribute_dict["event_uuid"] = attribute.event_uuid
 
-    result = await db.execute(select(AttributeTag).filter(AttributeTag.attribute_id == attribute.id))
-    db_attribute_tags = result.scalars().all()
+    if db_attribute_tags is None:
+        result = await db.execute(select(AttributeTag).filter(AttributeTag.attribute_id == attribute.id))
+        db_attribute_tags = result.scalars().all()
 
     attribute_dict["Tag"] = []
 
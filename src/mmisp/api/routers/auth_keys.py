@@ -14,7 +14,8 @@ if TYPE_CHECKING:
     from sqlalchemy import Row
 from sqlalchemy.future import select
 
-from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize, check_permissions
+from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize, check_permissions, invalidate_api_key_cache
+from mmisp.api.crypto import hash_secret
 from mmisp.api_schemas.auth_keys import (
     AddAuthKeyBody,
     AddAuthKeyResponse,
@@ -36,7 +37,6 @@ from mmisp.api_schemas.responses.standard_status_response import StandardStatusI
 from mmisp.db.database import Session, get_db
 from mmisp.db.models.auth_key import AuthKey
 from mmisp.db.models.user import User
-from mmisp.util.crypto import hash_secret
 from mmisp.util.uuid import is_uuid
 
 router = APIRouter(tags=["auth_keys"])
@@ -397,7 +397,7 @@ async def _auth_key_add(auth: Auth, db: Session, user_id: int, body: AddAuthKeyB
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
     auth_key_string = generate(size=40, alphabet=string.ascii_letters + string.digits)
-    hashed_auth_key = hash_secret(auth_key_string)
+    hashed_auth_key = await hash_secret(auth_key_string)
 
     expiration_int = parse_date(str(body.expiration)) if body.expiration else None
 
@@ -418,6 +418,7 @@ async def _auth_key_add(auth: Auth, db: Session, user_id: int, body: AddAuthKeyB
 
     await db.flush()
     await db.refresh(auth_key)
+    invalidate_api_key_cache()
     return AddAuthKeyResponse(
         AuthKey=AddAuthKeyResponseAuthKey(
             id=auth_key.id,
@@ -650,6 +651,7 @@ async def _auth_keys_edit(auth: Auth, db: Session, auth_key_id: int, body: EditA
     auth_key.patch(**update)
 
     await db.flush()
+    invalidate_api_key_cache(auth_key_id=auth_key.id)
     await db.refresh(auth_key)
     await db.refresh(user)
     return EditAuthKeyResponseCompl(
@@ -692,6 +694,7 @@ async def _auth_keys_delete(auth: Auth, db: Session, auth_key_id: int) -> None:
 
     await db.delete(auth_key)
     await db.flush()
+    invalidate_api_key_cache(auth_key_id=auth_key_id)
 
 
 @alog
@@ -1,10 +1,8 @@
 import logging
 from collections.abc import Sequence
-from datetime import datetime
 from typing import Annotated
 from urllib.parse import urlencode
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 from sqlalchemy.future import select
 
@@ -12,11 +10,16 @@ from mmisp.api.auth import (
     Auth,
     AuthStrategy,
     Permission,
+    auth_cache_statistics,
     authorize,
     check_permissions,
     decode_exchange_token,
     encode_token,
+    invalidate_principal_cache_on_commit,
 )
+from mmisp.api.bookkeeping import access_timestamps
+from mmisp.api.crypto import hash_secret, verify_secret
+from mmisp.api.lazy_imports import lazy_import
 from mmisp.api_schemas.authentication import (
     ChangeLoginInfoResponse,
     ChangePasswordBody,
@@ -37,7 +40,8 @@ from mmisp.db.database import Session, get_db
 from mmisp.db.models.identity_provider import OIDCIdentityProvider
 from mmisp.db.models.user import User
 from mmisp.lib.logger import alog
-from mmisp.util.crypto import hash_secret, verify_secret
+
+httpx = lazy_import("httpx")
 
 router = APIRouter(tags=["authentication"])
 
@@ -326,8 +330,7 @@ async def redirect_to_frontend(
     if not user.sub:
         user.sub = user_info["sub"]
         await db.flush()
-    user.last_login = int(datetime.now().timestamp())
-    await db.flush()
+    access_timestamps.record_login(user.id)
     return TokenResponse(
         token=encode_token(str(user.id)),
     )
@@ -381,6 +384,27 @@ async def change_password_UserId(
     return await _change_password_UserId(auth, db, user_id, body)
 
 
+@router.get(
+    "/auth/cacheStatistics",
+    summary="Hit and miss counters of the authentication caches",
+)
+@alog
+async def get_auth_cache_statistics(
+    auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID, [Permission.SITE_ADMIN]))],
+) -> dict[str, dict[str, int]]:
+    """Returns the hit and miss counters of the authentication caches of the worker answering the request.
+
+    args:
+
+    - the user's authentification status
+
+    returns:
+
+    - the counters per cache
+    """
+    return auth_cache_statistics()
+
+
 # --- endpoint logic ---
 
 
@@ -490,7 +514,7 @@ async def _change_password_UserId(
     if not user:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
-    user.password = hash_secret(body.password.get_secret_value())
+    user.password = await hash_secret(body.password.get_secret_value())
     user.change_pw = True
 
     await db.flush()
@@ -572,7 +596,7 @@ async def _password_login(db: Session, body: PasswordLoginBody) -> TokenResponse
         logger.info(f"External auth is required for user with {body.email}")
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
-    if not verify_secret(body.password.get_secret_value(), user.password):
+    if not await verify_secret(body.password.get_secret_value(), user.password):
         logger.info(f"Password verification failed for user with {body.email}")
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
@@ -583,9 +607,9 @@ async def _password_login(db: Session, body: PasswordLoginBody) -> TokenResponse
     if user.force_logout:
         user.force_logout = False
         await db.flush()
+        invalidate_principal_cache_on_commit(db, user_id=user.id)
 
-    user.last_login = int(datetime.now().timestamp())
-    await db.flush()
+    access_timestamps.record_login(user.id)
     return TokenResponse(token=encode_token(str(user.id)))
 
 
@@ -607,14 +631,14 @@ async def _set_own_password(db: Session, body: ChangePasswordBody) -> TokenRespo
         logger.info(f"External auth is required for user with {body.email}")
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
-    if not verify_secret(old_password, user.password):
+    if not await verify_secret(old_password, user.password):
         logger.info(f"Password verification failed for user with {body.email}")
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
     if old_password.lower() in new_password.lower():
         raise HTTPException(status.HTTP_400_BAD_REQUEST)
 
-    user.password = hash_secret(new_password)
+    user.password = await hash_secret(new_password)
     user.change_pw = False
 
     await db.flush()
@@ -1,22 +1,52 @@
 import logging
 import uuid
 from collections import defaultdict
-from collections.abc import Sequence
+from collections.abc import AsyncGenerator, Callable, Iterable, Sequence
+from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Annotated
+from typing import Annotated, Any, get_args
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import RedirectResponse
-from sqlalchemy import select
+from fastapi.responses import RedirectResponse, Response
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, with_loader_criteria
+from sqlalchemy.orm import noload, selectinload, with_loader_criteria
 from sqlalchemy.sql import Select
 from starlette.requests import Request
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.conditional import Validators, conditional_request, maximum
+from mmisp.api.event_filters import (
+    IndexEventsFilterBody,
+    SearchEventsFilterBody,
+    index_events_filters,
+    rest_search_events_filters,
+)
 from mmisp.api.config import config
+from mmisp.api.json_encoder import (
+    NotEncodable,
+    RawJSON,
+    RowEncoder,
+    boolean,
+    canonical_uuid,
+    choice,
+    column,
+    dumps,
+    empty_list,
+    epoch,
+    integer,
+    json_array_response,
+    json_response,
+    null,
+    optional_integer,
+    optional_string,
+    render_model,
+    string,
+)
+from mmisp.api.lazy_imports import lazy_import
+from mmisp.api.pagination import Keyset
+from mmisp.api.server_timing import server_timing
 from mmisp.api_schemas.events import (
     AddEditGetEventAttribute,
     AddEditGetEventDetails,
@@ -54,7 +84,7 @@ from mmisp.api_schemas.jobs import (
 from mmisp.api_schemas.sharing_groups import (
     EventSharingGroupResponse,
 )
-from mmisp.db.database import get_db
+from mmisp.db.database import get_db, sessionmanager
 from mmisp.db.models.attribute import Attribute, AttributeTag
 from mmisp.db.models.event import Event, EventReport, EventTag
 from mmisp.db.models.galaxy_cluster import GalaxyCluster, GalaxyReference
@@ -63,15 +93,21 @@ from mmisp.db.models.sharing_group import SharingGroup, SharingGroupOrg
 from mmisp.db.models.tag import Tag
 from mmisp.db.models.user import User
 from mmisp.lib.actions import action_publish_event
+from mmisp.lib.attributes import AttributeCategories, AttributeType
+from mmisp.lib.distribution import AttributeDistributionLevels
 from mmisp.lib.galaxies import parse_galaxy_authors
 from mmisp.lib.logger import alog, log
 
-from ..workflow import execute_blocking_workflow, execute_workflow
+httpx = lazy_import("httpx")
+workflow = lazy_import("mmisp.api.workflow")
 
 logger = logging.getLogger("mmisp")
 
 router = APIRouter(tags=["events"])
 
+_INDEX_EVENTS_LIMIT = 25
+_events_index_keyset = Keyset("events_index", Event.id)
+
 
 @router.post(
     "/events",
@@ -100,6 +136,7 @@ async def add_event(
 @router.get(
     "/events/{eventId}",
     status_code=status.HTTP_200_OK,
+    response_model=AddEditGetEventResponse,
     summary="Get event details",
 )
 @alog
@@ -107,18 +144,20 @@ async def get_event_details(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[AsyncSession, Depends(get_db)],
     event_id: Annotated[int | uuid.UUID, Path(alias="eventId")],
-) -> AddEditGetEventResponse:
+    request: Request,
+) -> Response:
     """Retrieve details of a specific event either by its event ID, or via its UUID.
 
     args:
         auth: the user's authentification status
         db: the current database
         event_id: the ID or UUID of the event
+        request: the request, for its conditional headers
 
     returns:
         the event details
     """
-    return await _get_event_details(db, event_id, auth.user)
+    return await _get_event_details(db, event_id, auth.user, request)
 
 
 @router.put(
@@ -195,14 +234,15 @@ async def get_all_events(
 @router.post(
     "/events/restSearch",
     status_code=status.HTTP_200_OK,
+    response_model=SearchEventsResponse,
     summary="Search events",
 )
 @alog
 async def rest_search_events(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[AsyncSession, Depends(get_db)],
-    body: SearchEventsBody,
-) -> SearchEventsResponse:
+    body: SearchEventsFilterBody,
+) -> Response:
     """Search for events based on various filters.
 
     args:
@@ -220,26 +260,30 @@ async def rest_search_events(
 @router.post(
     "/events/index",
     status_code=status.HTTP_200_OK,
+    response_model=list[IndexEventsAttributes],
     summary="Search events",
 )
 @alog
 async def index_events(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.ALL))],
     db: Annotated[AsyncSession, Depends(get_db)],
-    body: IndexEventsBody,
-) -> list[IndexEventsAttributes]:
+    body: IndexEventsFilterBody,
+    request: Request,
+    cursor: str | None = None,
+) -> Response:
     """Search for events based on various filters, which are more general than the ones in 'rest search'.
 
     args:
         auth: the user's authentification status
         db: the current database
         body: the request body
-
+        request: the request, for its conditional headers
+        cursor: the cursor of the page from the `X-Next-Cursor` header of the previous page, replaces `page`
 
     returns:
         the searched events
     """
-    return await _index_events(db, body, auth.user)
+    return await _index_events(db, body, auth.user, request, cursor)
 
 
 @router.post(
@@ -384,12 +428,13 @@ async def start_freeTextImport(
     data = FreeTextImportWorkerData(data=body_dict["value"])
     worker_body = FreeTextImportWorkerBody(user=user, data=data).model_dump()
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        response = await client.post(
-            f"{config.WORKER_URL}/job/processFreeText",
-            json=worker_body,
-            headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.post(
+                f"{config.WORKER_URL}/job/processFreeText",
+                json=worker_body,
+                headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
+            )
 
     response_data = response.json()
     job_id = response_data["job_id"]
@@ -435,6 +480,7 @@ async def add_event_depr(
     "/events/view/{eventId}",
     deprecated=True,
     status_code=status.HTTP_200_OK,
+    response_model=AddEditGetEventResponse,
     summary="Get event details (Deprecated)",
 )
 @alog
@@ -442,7 +488,8 @@ async def get_event_details_depr(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.ALL))],
     db: Annotated[AsyncSession, Depends(get_db)],
     event_id: Annotated[int | uuid.UUID, Path(alias="eventId")],
-) -> AddEditGetEventResponse:
+    request: Request,
+) -> Response:
     """Deprecated. Retrieve details of a specific attribute by its ID.
 
     args:
@@ -453,11 +500,13 @@ async def get_event_details_depr(
 
     - the event ID
 
+    - the request
+
     returns:
 
     - the event details
     """
-    return await _get_event_details(db, event_id, auth.user)
+    return await _get_event_details(db, event_id, auth.user, request)
 
 
 @router.put(
@@ -557,7 +606,7 @@ async def _add_event(auth: Auth, db: AsyncSession, body: AddEventBody) -> AddEdi
         }
     )
 
-    await execute_blocking_workflow("event-before-save", db, new_event)
+    await workflow.execute_blocking_workflow("event-before-save", db, new_event)
     db.add(new_event)
     await db.flush()
     await db.refresh(new_event)
@@ -573,7 +622,7 @@ async def _add_event(auth: Auth, db: AsyncSession, body: AddEventBody) -> AddEdi
     if event is None:
         raise ValueError("event is not available after adding")
 
-    await execute_workflow("event-after-save", db, event)
+    await workflow.execute_workflow("event-after-save", db, event)
 
     event_data = await _prepare_event_response(db, event, user)
 
@@ -581,7 +630,14 @@ async def _add_event(auth: Auth, db: AsyncSession, body: AddEventBody) -> AddEdi
 
 
 @alog
-async def _get_event_details(db: AsyncSession, event_id: int | uuid.UUID, user: User | None) -> AddEditGetEventResponse:
+async def _get_event_details(
+    db: AsyncSession, event_id: int | uuid.UUID, user: User | None, request: Request
+) -> Response:
+    if conditional_request(request):
+        validators = await _event_validators(db, event_id, user)
+        if validators is not None and validators.matches(request):
+            return validators.not_modified()
+
     event = await _get_event(
         event_id, db, user, include_basic_event_attributes=True, include_non_galaxy_attribute_tags=True
     )
@@ -592,9 +648,83 @@ async def _get_event_details(db: AsyncSession, event_id: int | uuid.UUID, user:
     if not event.can_access(user):
         raise HTTPException(status.HTTP_403_FORBIDDEN)
 
-    event_data = await _prepare_event_response(db, event, user)
+    validators = Validators.of(user, "event", _event_version(event))
+    response = json_response({"Event": await _render_event_response(db, event, user)})
+    return validators.apply(response)
 
-    return AddEditGetEventResponse(Event=event_data)
+
+def _event_version(event: Event) -> tuple:
+    """
+    The version of a loaded event, the same values `_event_validators` queries.
+
+    args:
+        event: the event with its accessible attributes, their tags, its objects and its tags loaded
+
+    returns:
+        the version of the event
+    """
+    attributes = event.attributes
+    objects = event.mispobjects
+    event_tags = event.eventtags
+    attribute_tags = [attribute_tag for attribute in attributes for attribute_tag in attribute.attributetags]
+    return (
+        event.id,
+        event.timestamp,
+        event.publish_timestamp,
+        event.published,
+        maximum(attribute.timestamp for attribute in attributes),
+        len(attributes),
+        maximum(misp_object.timestamp for misp_object in objects),
+        len(objects),
+        maximum(event_tag.id for event_tag in event_tags),
+        len(event_tags),
+        maximum(attribute_tag.id for attribute_tag in attribute_tags),
+        len(attribute_tags),
+    )
+
+
+async def _event_validators(db: AsyncSession, event_id: int | uuid.UUID, user: User | None) -> Validators | None:
+    """
+    Computes the validators of an event from its timestamps and the timestamps and counts of its children,
+    as editing attributes, objects and tags does not touch the timestamp of the event.
+    Only the attributes accessible by the user are considered, just like `_get_event` loads them.
+
+    args:
+        db: the current database
+        event_id: the ID or UUID of the event
+        user: the requesting user
+
+    returns:
+        the validators, or None if the event does not exist or the user may not access it
+    """
+    attributes = (Attribute.event_id == Event.id, Attribute.can_access(user))
+    attribute_ids = select(Attribute.id).filter(*attributes)
+    query: Select = select(
+        Event.id,
+        Event.timestamp,
+        Event.publish_timestamp,
+        Event.published,
+        select(func.max(Attribute.timestamp)).filter(*attributes).scalar_subquery(),
+        select(func.count(Attribute.id)).filter(*attributes).scalar_subquery(),
+        select(func.max(Object.timestamp)).filter(Object.event_id == Event.id).scalar_subquery(),
+        select(func.count(Object.id)).filter(Object.event_id == Event.id).scalar_subquery(),
+        select(func.max(EventTag.id)).filter(EventTag.event_id == Event.id).scalar_subquery(),
+        select(func.count(EventTag.id)).filter(EventTag.event_id == Event.id).scalar_subquery(),
+        select(func.max(AttributeTag.id)).filter(AttributeTag.attribute_id.in_(attribute_ids)).scalar_subquery(),
+        select(func.count(AttributeTag.id)).filter(AttributeTag.attribute_id.in_(attribute_ids)).scalar_subquery(),
+    )
+    if isinstance(event_id, uuid.UUID):
+        query = query.filter(Event.uuid == event_id)
+    else:
+        query = query.filter(Event.id == event_id)
+    if user is not None:
+        query = query.filter(Event.can_access(user))
+
+    version = (await db.execute(query)).one_or_none()
+    if version is None:
+        return None
+
+    return Validators.of(user, "event", version)
 
 
 @alog
@@ -613,10 +743,10 @@ async def _update_event(
 
     event.patch(**body.model_dump(exclude_unset=True))
     event.timestamp = datetime.now()
-    await execute_blocking_workflow("event-before-save", db, event)
+    await workflow.execute_blocking_workflow("event-before-save", db, event)
     await db.flush()
     await db.refresh(event)
-    await execute_workflow("event-after-save", db, event)
+    await workflow.execute_workflow("event-after-save", db, event)
 
     event_data = await _prepare_event_response(db, event, user)
 
@@ -707,13 +837,33 @@ async def _get_events(db: AsyncSession, user: User | None) -> list[GetAllEventsR
 
 
 @alog
-async def _rest_search_events(db: AsyncSession, body: SearchEventsBody, user: User | None) -> SearchEventsResponse:
+async def _rest_search_events(db: AsyncSession, body: SearchEventsBody, user: User | None) -> Response:
     if body.returnFormat != "json":
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid output format.")
 
-    qry = (
+    qry = _rest_search_events_query(body, user)
+    if body.limit is None and config.REST_SEARCH_BATCH_SIZE > 0:
+        return await json_array_response("response", _stream_events(qry, user, config.REST_SEARCH_BATCH_SIZE))
+
+    if body.limit is not None:
+        page = body.page or 1
+        qry = qry.limit(body.limit).offset(body.limit * (page - 1))
+
+    result = await db.execute(qry)
+    events: Sequence[Event] = result.scalars().all()
+
+    relations = await _load_event_relations(db, events)
+    response_list = []
+    for event in events:
+        response_list.append({"Event": await _render_event_response(db, event, user, relations)})
+
+    return json_response({"response": response_list})
+
+
+def _rest_search_events_query(body: SearchEventsBody, user: User | None) -> Select:
+    return (
         select(Event)
-        .filter(Event.can_access(user))
+        .filter(Event.can_access(user), *rest_search_events_filters(body, user))
         .options(
             selectinload(Event.org),
             selectinload(Event.orgc),
@@ -746,72 +896,138 @@ async def _rest_search_events(db: AsyncSession, body: SearchEventsBody, user: Us
             ),
         )
     )
-    if body.limit is not None:
-        page = body.page or 1
-        qry = qry.limit(body.limit).offset(body.limit * (page - 1))
-
-    result = await db.execute(qry)
-    events: Sequence[Event] = result.scalars().all()
 
-    response_list = []
-    for event in events:
-        response_list.append(AddEditGetEventResponse(Event=await _prepare_event_response(db, event, user)))
 
-    return SearchEventsResponse(response=response_list)
+async def _stream_events(qry: Select, user: User | None, batch_size: int) -> AsyncGenerator[list[dict[str, Any]], None]:
+    """
+    Renders the events of a query in batches of `batch_size` events, fetched by ascending id.
 
+    args:
+        qry: the query of the events
+        user: the user the events are rendered for
+        batch_size: the number of events per batch
 
-@alog
-async def _index_events(db: AsyncSession, body: IndexEventsBody, user: User | None) -> list[IndexEventsAttributes]:
-    limit = 25
-    offset = 0
+    returns:
+        the rendered events, one list per batch
+    """
+    assert sessionmanager is not None
+    # the session of the request is closed when the endpoint returns, before the response is streamed,
+    # this one is closed with the response
+    async with sessionmanager.session() as db:
+        last_id = 0
+        while True:
+            result = await db.execute(qry.filter(Event.id > last_id).order_by(Event.id).limit(batch_size))
+            events: Sequence[Event] = result.scalars().all()
+            if not events:
+                return
+
+            relations = await _load_event_relations(db, events)
+            yield [{"Event": await _render_event_response(db, event, user, relations)} for event in events]
+            if len(events) < batch_size:
+                return
+
+            last_id = events[-1].id
+            # the batch is sent, releasing its rows keeps the memory bounded by the batch size
+            db.expunge_all()
 
-    if body.limit:
-        limit = body.limit
-    if body.page:
-        offset = limit * (body.page - 1)
 
-    query: Select = (
-        select(Event)
-        .options(
-            selectinload(Event.org),
-            selectinload(Event.orgc),
-            selectinload(Event.tags),
-            selectinload(Event.eventtags_galaxy)
-            .selectinload(EventTag.tag)
-            .selectinload(Tag.galaxy_cluster)
-            .options(
-                selectinload(GalaxyCluster.org),
-                selectinload(GalaxyCluster.orgc),
-                selectinload(GalaxyCluster.galaxy),
-                selectinload(GalaxyCluster.galaxy_elements),
-            ),
-            selectinload(Event.eventtags),
-            selectinload(Event.attributes).options(
-                selectinload(Attribute.attributetags_galaxy)
-                .selectinload(AttributeTag.tag)
-                .selectinload(Tag.galaxy_cluster)
-                .options(
-                    selectinload(GalaxyCluster.org),
-                    selectinload(GalaxyCluster.orgc),
-                    selectinload(GalaxyCluster.galaxy),
-                    selectinload(GalaxyCluster.galaxy_elements),
-                )
-            ),
-            with_loader_criteria(Attribute, Attribute.can_access(user)),
-            selectinload(Event.mispobjects),
-            selectinload(Event.creator),
-            selectinload(Event.sharing_group),
-        )
-        .limit(limit)
-        .offset(offset)
+@alog
+async def _index_events(
+    db: AsyncSession, body: IndexEventsBody, user: User | None, request: Request, cursor: str | None = None
+) -> Response:
+    if conditional_request(request):
+        validators = await _index_events_validators(db, body, user, cursor)
+        if validators.matches(request):
+            return validators.not_modified()
+
+    # exactly the relationships read by _prepare_all_events_response_index
+    query: Select = _index_events_query(body, user, cursor).options(
+        selectinload(Event.org),
+        selectinload(Event.orgc),
+        selectinload(Event.eventtags).selectinload(EventTag.tag),
+        selectinload(Event.eventtags_galaxy)
+        .selectinload(EventTag.tag)
+        .selectinload(Tag.galaxy_cluster)
+        .selectinload(GalaxyCluster.galaxy),
+        noload(Event.tags),
+        noload(Event.creator),
     )
 
     result = await db.execute(query)
     events: Sequence[Event] = result.scalars().all()
 
+    validators = Validators.of(user, "events_index", [repr(body), cursor, *_index_events_version(events)])
     response_list = [_prepare_all_events_response_index(event, user) for event in events]
 
-    return response_list
+    content = await render_model(response_list, list[IndexEventsAttributes])
+    response = json_response(content)
+    _events_index_keyset.set_next_cursor(response, events, body.limit or _INDEX_EVENTS_LIMIT)
+    return validators.apply(response)
+
+
+def _index_events_query(body: IndexEventsBody, user: User | None, cursor: str | None = None) -> Select:
+    limit = body.limit or _INDEX_EVENTS_LIMIT
+    query = select(Event).filter(*index_events_filters(body, user))
+    if user is not None:
+        query = query.filter(Event.can_access(user))
+    query = _events_index_keyset.apply(query, cursor).limit(limit)
+
+    if cursor is None and body.page:
+        query = query.offset(limit * (body.page - 1))
+    return query
+
+
+async def _index_events_validators(
+    db: AsyncSession, body: IndexEventsBody, user: User | None, cursor: str | None = None
+) -> Validators:
+    """
+    Computes the validators of an event index from the latest timestamp of the events on the requested page,
+    the sum of their ids tracks events entering or leaving the page.
+
+    args:
+        db: the current database
+        body: the request body
+        user: the requesting user
+        cursor: the cursor of the requested page
+
+    returns:
+        the validators of the index
+    """
+    page = (
+        _index_events_query(body, user, cursor)
+        .with_only_columns(Event.id, Event.timestamp, Event.publish_timestamp)
+        .subquery()
+    )
+    version = (
+        await db.execute(
+            select(
+                func.count(page.c.id),
+                func.sum(page.c.id),
+                func.max(page.c.timestamp),
+                func.max(page.c.publish_timestamp),
+            )
+        )
+    ).one()
+
+    return Validators.of(user, "events_index", [repr(body), cursor, *version])
+
+
+def _index_events_version(events: Sequence[Event]) -> tuple:
+    """
+    The version of a loaded page of the event index, the same values `_index_events_validators` queries.
+
+    args:
+        events: the events on the page
+
+    returns:
+        the version of the page
+    """
+    return (
+        len(events),
+        sum(event.id for event in events) if events else None,
+        maximum(event.timestamp for event in events),
+        maximum(event.publish_timestamp for event in events),
+    )
 
 
 @alog
@@ -832,7 +1048,7 @@ async def _publish_event(
     if not event.can_edit(user):
         raise HTTPException(status.HTTP_403_FORBIDDEN)
 
-    await execute_blocking_workflow("event-publish", db, event)
+    await workflow.execute_blocking_workflow("event-publish", db, event)
 
     await action_publish_event(db, event)
 
@@ -939,8 +1155,110 @@ async def _remove_tag_from_event(
     return AddRemoveTagEventsResponse(saved=True, success="Tag removed", check_publish=True)
 
 
+@dataclass
+class _EventRelations:
+    """
+    The relationships of a page of events which are not loaded with the events themselves, grouped in memory.
+    """
+
+    event_reports: dict[int, list[EventReport]]
+    galaxy_clusters: dict[str, GalaxyCluster]
+    object_attributes: dict[int, list[Attribute]]
+
+
+async def _load_event_relations(db: AsyncSession, events: Sequence[Event]) -> _EventRelations:
+    """
+    Loads the event reports, the galaxy clusters of the galaxy tags and the attributes of the objects of the events
+    with one query each, independent of the number of events, tags and objects.
+
+    args:
+        db: the current db
+        events: the events with their galaxy tags and objects loaded
+
+    returns:
+        the relations of the events
+    """
+    event_reports: dict[int, list[EventReport]] = defaultdict(list)
+    event_ids = [event.id for event in events]
+    if event_ids:
+        result = await db.execute(
+            select(EventReport).filter(EventReport.event_id.in_(event_ids)).order_by(EventReport.id)
+        )
+        for event_report in result.scalars():
+            event_reports[event_report.event_id].append(event_report)
+
+    galaxy_clusters: dict[str, GalaxyCluster] = {}
+    tag_names = {eventtag.tag.name for event in events for eventtag in event.eventtags_galaxy}
+    if tag_names:
+        result = await db.execute(
+            select(GalaxyCluster)
+            .filter(GalaxyCluster.tag_name.in_(tag_names))
+            .order_by(GalaxyCluster.id)
+            .options(
+                selectinload(GalaxyCluster.org),
+                selectinload(GalaxyCluster.orgc),
+                selectinload(GalaxyCluster.galaxy),
+                selectinload(GalaxyCluster.galaxy_elements),
+            )
+        )
+        # the tag name is not unique, of several clusters of a tag the oldest one is rendered
+        for galaxy_cluster in result.scalars():
+            galaxy_clusters.setdefault(galaxy_cluster.tag_name, galaxy_cluster)
+
+    object_attributes = await _load_object_attributes(db, [object for event in events for object in event.mispobjects])
+
+    return _EventRelations(event_reports, galaxy_clusters, object_attributes)
+
+
+@alog
+async def _prepare_event_response(
+    db: AsyncSession, event: Event, user: User | None, relations: _EventRelations | None = None
+) -> AddEditGetEventDetails:
+    if relations is None:
+        relations = await _load_event_relations(db, [event])
+
+    event_dict = await _prepare_event_dict(db, event, user, relations)
+
+    if len(event.attributes) > 0:
+        event_dict["Attribute"] = await _prepare_attribute_response(db, event.attributes)
+
+    if len(event.mispobjects) > 0:
+        event_dict["Object"] = await _prepare_object_response(db, event.mispobjects, relations.object_attributes)
+
+    return AddEditGetEventDetails(**event_dict)
+
+
 @alog
-async def _prepare_event_response(db: AsyncSession, event: Event, user: User | None) -> AddEditGetEventDetails:
+async def _render_event_response(
+    db: AsyncSession, event: Event, user: User | None, relations: _EventRelations | None = None
+) -> dict[str, Any]:
+    """
+    Renders the event like `_prepare_event_response`, with the attributes encoded directly to JSON.
+
+    args:
+        relations: the relations of all rendered events, loaded for this event if not given
+
+    returns:
+        the JSON compatible event
+    """
+    if relations is None:
+        relations = await _load_event_relations(db, [event])
+
+    event_dict = await _prepare_event_dict(db, event, user, relations)
+    content = await render_model(AddEditGetEventDetails(**event_dict))
+
+    if len(event.attributes) > 0:
+        content["Attribute"] = await _render_attribute_response(db, event.attributes)
+
+    if len(event.mispobjects) > 0:
+        content["Object"] = await _render_object_response(db, event.mispobjects, relations.object_attributes)
+
+    return content
+
+
+async def _prepare_event_dict(
+    db: AsyncSession, event: Event, user: User | None, relations: _EventRelations
+) -> dict[str, Any]:
     event_dict = event.asdict()
 
     fields_to_convert = ["sharing_group_id", "timestamp", "publish_timestamp"]
@@ -960,8 +1278,6 @@ async def _prepare_event_response(db: AsyncSession, event: Event, user: User | N
     if orgc is not None:
         event_dict["Orgc"] = AddEditGetEventOrg(id=orgc.id, name=orgc.name, uuid=orgc.uuid, local=orgc.local)
 
-    attribute_list = event.attributes
-
     if event.sharing_group is not None:
         sgos = list(_compute_sgos_dict(x) for x in event.sharing_group.sharing_group_orgs)
 
@@ -972,21 +1288,12 @@ async def _prepare_event_response(db: AsyncSession, event: Event, user: User | N
             SharingGroupServer=[],
         )
 
-    if len(attribute_list) > 0:
-        event_dict["Attribute"] = await _prepare_attribute_response(db, attribute_list)
-
     event_tag_list = event.eventtags
 
     if len(event_tag_list) > 0:
         event_dict["Tag"] = await _prepare_tag_response(event_tag_list)
 
-    object_list = event.mispobjects
-
-    if len(object_list) > 0:
-        event_dict["Object"] = await _prepare_object_response(db, object_list)
-
-    result = await db.execute(select(EventReport).filter(EventReport.event_id == event.id))
-    event_report_list = result.scalars().all()
+    event_report_list = relations.event_reports.get(event.id, [])
 
     if len(event_report_list) > 0:
         event_dict["EventReport"] = _prepare_event_report_response(event_report_list)
@@ -994,18 +1301,7 @@ async def _prepare_event_response(db: AsyncSession, event: Event, user: User | N
     galaxy_cluster_by_galaxy = defaultdict(list)
 
     for eventtag in event.eventtags_galaxy:
-        tag = eventtag.tag
-        result = await db.execute(
-            select(GalaxyCluster)
-            .filter(GalaxyCluster.tag_name == tag.name)
-            .options(
-                selectinload(GalaxyCluster.org),
-                selectinload(GalaxyCluster.orgc),
-                selectinload(GalaxyCluster.galaxy),
-                selectinload(GalaxyCluster.galaxy_elements),
-            )
-        )
-        galaxy_cluster = result.scalars().one_or_none()
+        galaxy_cluster = relations.galaxy_clusters.get(eventtag.tag.name)
 
         if galaxy_cluster is not None:
             gc_cluster = await _prepare_single_galaxy_cluster_response(galaxy_cluster, eventtag)
@@ -1034,7 +1330,7 @@ async def _prepare_event_response(db: AsyncSession, event: Event, user: User | N
         logger.warning("User not found with id: %s Event id: %s", event.user_id, event.id)
         logger.warning("_prepare_event_response Event: %s", event.__dict__)
 
-    return AddEditGetEventDetails(**event_dict)
+    return event_dict
 
 
 @alog
@@ -1096,6 +1392,104 @@ async def _prepare_attribute_response(
     return attribute_response_list
 
 
+def _tag_column(name: str) -> Callable[[EventTag | AttributeTag], Any]:
+    get_tag = column("tag")
+    get = column(name)
+    return lambda link: get(get_tag(link))
+
+
+_attribute_tags = column("attributetags")
+
+
+def _encode_attribute_tags(attribute: Attribute) -> str:
+    encoded_tags = []
+    for link in _attribute_tags(attribute):
+        if link.tag is None:
+            continue
+        encoded_tag = _tag_encoder.encode(link)
+        if encoded_tag is None:
+            raise NotEncodable(link)
+        encoded_tags.append(encoded_tag)
+    return "[" + ",".join(encoded_tags) + "]"
+
+
+def _attribute_value(attribute: Attribute) -> Any:
+    # Attribute.value, read from the loaded columns
+    value1 = attribute.__dict__.get("value1")
+    value2 = attribute.__dict__.get("value2")
+    if type(value1) is not str or type(value2) is not str:
+        raise NotEncodable(attribute)
+    value = value1 if value2 == "" else f"{value1}|{value2}"
+
+    # checked like the response model does, invalid values are rendered through the model and fail there as well
+    attribute_type = AttributeType.map_dbkey_attributetype.get(attribute.__dict__.get("type", ""))
+    if attribute_type is None or not attribute_type.validator(value):
+        raise NotEncodable(attribute)
+    return value
+
+
+# encodes links of tags to attributes or events like _prepare_tag_response
+_tag_encoder = RowEncoder(
+    AddEditGetEventTag,
+    {
+        "id": integer(_tag_column("id")),
+        "name": string(_tag_column("name")),
+        "colour": string(_tag_column("colour")),
+        "exportable": boolean(_tag_column("exportable")),
+        "user_id": integer(_tag_column("user_id"), none_as_zero=True),
+        "hide_tag": boolean(_tag_column("hide_tag")),
+        "numerical_value": optional_integer(_tag_column("numerical_value")),
+        "is_galaxy": boolean(_tag_column("is_galaxy")),
+        "is_custom_galaxy": boolean(_tag_column("is_custom_galaxy")),
+        "local_only": boolean(_tag_column("local_only")),
+        "local": boolean(column("local")),
+        "relationship_type": lambda link: "null",
+    },
+)
+
+# encodes attributes like _prepare_attribute_response, for attributes without sharing group and galaxy clusters
+_attribute_encoder = RowEncoder(
+    AddEditGetEventAttribute,
+    {
+        "id": integer(column("id")),
+        "event_id": integer(column("event_id")),
+        "object_id": integer(column("object_id"), none_as_zero=True),
+        "object_relation": optional_string(column("object_relation")),
+        "category": choice(column("category"), AttributeCategories),
+        "type": choice(column("type"), get_args(AddEditGetEventAttribute.model_fields["type"].annotation)),
+        "value": string(_attribute_value),
+        "to_ids": boolean(column("to_ids")),
+        "uuid": canonical_uuid(column("uuid")),
+        "timestamp": epoch(column("timestamp")),
+        "distribution": choice(column("distribution"), AttributeDistributionLevels),
+        "sharing_group_id": integer(column("sharing_group_id"), none_as_zero=True),
+        "comment": optional_string(column("comment")),
+        "deleted": boolean(column("deleted")),
+        "disable_correlation": boolean(column("disable_correlation")),
+        "first_seen": null(column("first_seen")),
+        "last_seen": null(column("last_seen")),
+        "Galaxy": empty_list(column("attributetags_galaxy")),
+        "sharing_group": null(column("sharing_group")),
+        "ShadowAttribute": empty_list(),
+        "Tag": _encode_attribute_tags,
+    },
+)
+
+
+@alog
+async def _render_attribute_response(db: AsyncSession, attribute_list: Sequence[Attribute]) -> RawJSON:
+    encoded_attributes = []
+
+    for attribute in attribute_list:
+        encoded_attribute = _attribute_encoder.encode(attribute)
+        if encoded_attribute is None:
+            attribute_response = (await _prepare_attribute_response(db, [attribute]))[0]
+            encoded_attribute = dumps(await render_model(attribute_response))
+        encoded_attributes.append(encoded_attribute)
+
+    return RawJSON.array(encoded_attributes)
+
+
 @alog
 async def _prepare_tag_response(tag_list: Sequence[EventTag | AttributeTag]) -> list[AddEditGetEventTag]:
     tag_response_list = []
@@ -1196,28 +1590,18 @@ async def _prepare_galaxy_cluster_relation_response(
 
 
 @alog
-async def _prepare_object_response(db: AsyncSession, object_list: Sequence[Object]) -> list[AddEditGetEventObject]:
+async def _prepare_object_response(
+    db: AsyncSession, object_list: Sequence[Object], object_attributes: dict[int, list[Attribute]] | None = None
+) -> list[AddEditGetEventObject]:
+    if object_attributes is None:
+        object_attributes = await _load_object_attributes(db, object_list)
+
     response_object_list = []
 
     for object in object_list:
         object_dict = object.asdict()
 
-        result = await db.execute(
-            select(Attribute)
-            .options(
-                selectinload(Attribute.attributetags_galaxy)
-                .selectinload(AttributeTag.tag)
-                .selectinload(Tag.galaxy_cluster)
-                .options(
-                    selectinload(GalaxyCluster.org),
-                    selectinload(GalaxyCluster.orgc),
-                    selectinload(GalaxyCluster.galaxy),
-                    selectinload(GalaxyCluster.galaxy_elements),
-                )
-            )
-            .filter(Attribute.object_id == object.id)
-        )
-        object_attribute_list = result.scalars().all()
+        object_attribute_list = object_attributes.get(object.id, [])
 
         if len(object_attribute_list) > 0:
             object_dict["Attribute"] = await _prepare_attribute_response(db, object_attribute_list)
@@ -1227,15 +1611,70 @@ async def _prepare_object_response(db: AsyncSession, object_list: Sequence[Objec
     return response_object_list
 
 
+@alog
+async def _render_object_response(
+    db: AsyncSession, object_list: Sequence[Object], object_attributes: dict[int, list[Attribute]] | None = None
+) -> list[dict[str, Any]]:
+    if object_attributes is None:
+        object_attributes = await _load_object_attributes(db, object_list)
+
+    response_object_list = []
+
+    for object in object_list:
+        content = await render_model(AddEditGetEventObject(**object.asdict()))
+
+        object_attribute_list = object_attributes.get(object.id, [])
+
+        if len(object_attribute_list) > 0:
+            content["Attribute"] = await _render_attribute_response(db, object_attribute_list)
+
+        response_object_list.append(content)
+
+    return response_object_list
+
+
+async def _load_object_attributes(db: AsyncSession, object_list: Iterable[Object]) -> dict[int, list[Attribute]]:
+    """
+    Loads the attributes of all objects with one query.
+
+    returns:
+        the attributes per object id
+    """
+    object_attributes: dict[int, list[Attribute]] = defaultdict(list)
+    object_ids = [object.id for object in object_list]
+    if not object_ids:
+        return object_attributes
+
+    result = await db.execute(
+        select(Attribute)
+        .options(
+            selectinload(Attribute.attributetags_galaxy)
+            .selectinload(AttributeTag.tag)
+            .selectinload(Tag.galaxy_cluster)
+            .options(
+                selectinload(GalaxyCluster.org),
+                selectinload(GalaxyCluster.orgc),
+                selectinload(GalaxyCluster.galaxy),
+                selectinload(GalaxyCluster.galaxy_elements),
+            )
+        )
+        .filter(Attribute.object_id.in_(object_ids))
+        .order_by(Attribute.id)
+    )
+    for attribute in result.scalars():
+        object_attributes[attribute.object_id].append(attribute)
+    return object_attributes
+
+
 @log
-def _prepare_event_report_response(event_report_list: Sequence[EventReport]) -> AddEditGetEventEventReport:
+def _prepare_event_report_response(event_report_list: Sequence[EventReport]) -> list[AddEditGetEventEventReport]:
     response_event_report_list = []
 
     for event_report in event_report_list:
         event_report_dict = event_report.__dict__.copy()
         response_event_report_list.append(AddEditGetEventEventReport(**event_report_dict))
 
-    return AddEditGetEventEventReport.model_validate(response_event_report_list)
+    return response_event_report_list
 
 
 @log
@@ -1253,9 +1692,6 @@ def _prepare_all_events_response_index(event: Event, user: User | None) -> Index
     event_dict["GalaxyCluster"] = _prepare_all_events_galaxy_cluster_response(event.eventtags_galaxy)
     event_dict["date"] = str(event_dict["date"])
 
-    if event.sharing_group is not None:
-        event_dict["SharingGroup"] = event.sharing_group.asdict()
-
     return IndexEventsAttributes.model_validate(event_dict)
 
 
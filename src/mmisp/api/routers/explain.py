@@ -0,0 +1,40 @@
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+
+from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.explain import explain_reports
+from mmisp.lib.logger import alog
+
+router = APIRouter(tags=["explain"])
+
+
+@router.get(
+    "/explain/{explainId}",
+    summary="Get the SQL report of a request made with ?explain=1",
+)
+@alog
+async def get_explain_report(
+    auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID, [Permission.SITE_ADMIN]))],
+    explain_id: Annotated[str, Path(alias="explainId")],
+) -> dict[str, Any]:
+    """Returns the SQL statements of a request made with the explain query parameter,
+    with parameters, row counts, durations and the query plans of the slowest statements.
+
+    Reports are kept for a short time by the worker that answered the request and are also written to its log.
+
+    args:
+
+    - the user's authentification status
+
+    - the id from the x-explain-id header
+
+    returns:
+
+    - the report
+    """
+    report = explain_reports.get(explain_id)
+    if report is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Explain report not found")
+
+    return report.to_dict()
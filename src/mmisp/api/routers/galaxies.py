@@ -7,6 +7,7 @@ from starlette import status
 from starlette.requests import Request
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.response_cache import cached_response
 from mmisp.api_schemas.galaxies import (
     DeleteForceUpdateImportGalaxyResponse,
     ExportGalaxyGalaxyElement,
@@ -117,6 +118,7 @@ async def delete_galaxy(
     summary="Get all galaxies",
 )
 @alog
+@cached_response(Galaxy, GalaxyCluster)
 async def get_galaxies(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))], db: Annotated[Session, Depends(get_db)]
 ) -> list[GetAllSearchGalaxiesResponse]:
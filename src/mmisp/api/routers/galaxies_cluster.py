@@ -11,6 +11,7 @@ from starlette import status
 from starlette.requests import Request
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.lazy_imports import lazy_import
 from mmisp.api_schemas.events import (
     AddEditGetEventGalaxyClusterRelation,
     AddEditGetEventGalaxyClusterRelationTag,
@@ -46,13 +47,14 @@ from mmisp.db.models.galaxy_cluster import GalaxyCluster, GalaxyElement, GalaxyR
 from mmisp.db.models.organisation import Organisation
 from mmisp.db.models.tag import Tag
 from mmisp.db.models.user import User
-from mmisp.lib.fallbacks import GENERIC_MISP_ORGANISATION
 from mmisp.lib.galaxies import galaxy_tag_name, parse_galaxy_authors
 from mmisp.lib.galaxy_clusters import update_galaxy_cluster_elements
 from mmisp.lib.logger import alog, log
 from mmisp.lib.tags import get_or_create_instance_tag
 from mmisp.util.uuid import uuid
 
+fallbacks = lazy_import("mmisp.lib.fallbacks")
+
 router = APIRouter(tags=["galaxy_clusters"])
 
 
@@ -471,8 +473,8 @@ async def _get_galaxy_cluster_search_response(
     ]
 
     # Get the Organisations
-    org = galaxy_cluster.org if galaxy_cluster.org_id != 0 else GENERIC_MISP_ORGANISATION
-    orgc = galaxy_cluster.orgc if galaxy_cluster.orgc_id != 0 else GENERIC_MISP_ORGANISATION
+    org = galaxy_cluster.org if galaxy_cluster.org_id != 0 else fallbacks.GENERIC_MISP_ORGANISATION
+    orgc = galaxy_cluster.orgc if galaxy_cluster.orgc_id != 0 else fallbacks.GENERIC_MISP_ORGANISATION
 
     galaxy_cluster_dict["Org"] = await _get_organisation_for_cluster(db, org)
     galaxy_cluster_dict["Orgc"] = await _get_organisation_for_cluster(db, orgc)
@@ -642,8 +644,8 @@ async def _get_galaxy_cluster(db: Session, galaxy_cluster: GalaxyCluster | None)
     ]
 
     # Get the Organisations
-    org = galaxy_cluster.org if galaxy_cluster.org_id != 0 else GENERIC_MISP_ORGANISATION
-    orgc = galaxy_cluster.orgc if galaxy_cluster.orgc_id != 0 else GENERIC_MISP_ORGANISATION
+    org = galaxy_cluster.org if galaxy_cluster.org_id != 0 else fallbacks.GENERIC_MISP_ORGANISATION
+    orgc = galaxy_cluster.orgc if galaxy_cluster.orgc_id != 0 else fallbacks.GENERIC_MISP_ORGANISATION
 
     galaxy_cluster_dict["Org"] = await _get_organisation_for_cluster(db, org)
     galaxy_cluster_dict["Orgc"] = await _get_organisation_for_cluster(db, orgc)
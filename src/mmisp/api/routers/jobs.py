@@ -1,13 +1,16 @@
 import json
 from typing import Annotated
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException
 
 from mmisp.api.auth import Auth, AuthStrategy, authorize
 from mmisp.api.config import config
+from mmisp.api.lazy_imports import lazy_import
+from mmisp.api.server_timing import server_timing
 from mmisp.lib.logger import alog
 
+httpx = lazy_import("httpx")
+
 router = APIRouter(tags=["jobs"])
 
 
@@ -27,10 +30,11 @@ async def get_job(  # noqa
     Returns:
       the job result
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(
-            f"{config.WORKER_URL}/job/{job_type}/{id}", headers={"Authorization": f"Bearer {config.WORKER_KEY}"}
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(
+                f"{config.WORKER_URL}/job/{job_type}/{id}", headers={"Authorization": f"Bearer {config.WORKER_KEY}"}
+            )
 
     if response.status_code == 409:
         raise HTTPException(status_code=409, detail="Job is not yet finished. Please try again in a few seconds")
@@ -1,9 +1,11 @@
 from typing import Annotated, Any, List, Sequence
 
 from fastapi import APIRouter, Depends, HTTPException, Path, Response, status
-from sqlalchemy import desc, select
+from sqlalchemy import select
+from sqlalchemy.sql import Select
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.pagination import Keyset
 from mmisp.api_schemas.logs import LogsRequest
 from mmisp.db.database import Session, get_db
 from mmisp.db.lib import get_count_from_select
@@ -13,6 +15,8 @@ from mmisp.workflows.fastapi import log_to_json_dict
 
 router = APIRouter(tags=["logs"])
 
+_logs_keyset = Keyset("logs_index", Log.id, descending=True)
+
 
 @router.get(
     "/logs/index",
@@ -29,12 +33,14 @@ async def logs_index_get(
     model: str | None = None,
     action: str | None = None,
     model_id: str | None = None,
+    cursor: str | None = None,
 ) -> List[Any]:
     """
     List logs, filter can be applied.
 
     - **page** the page for pagination
     - **limit** the limit for pagination
+    - **cursor** the cursor of the page from the `X-Next-Cursor` header of the previous page, replaces `page`
     """
     request = LogsRequest(
         model=model,
@@ -47,9 +53,7 @@ async def logs_index_get(
     if limit is not None:
         request.limit = limit
 
-    count, logs = await query_logs(request, db)
-    response.headers["X-Result-Count"] = str(count)
-    return transform_logs_to_response(logs)
+    return await _logs_index(request, db, response, cursor)
 
 
 @router.post(
@@ -63,6 +67,7 @@ async def logs_index_post(
     db: Annotated[Session, Depends(get_db)],
     request: LogsRequest,
     response: Response,
+    cursor: str | None = None,
 ) -> List[Any]:
     """
     List logs, filter can be applied.
@@ -72,9 +77,19 @@ async def logs_index_post(
     - **model_id** the id of the model
     - **page** the page for pagination
     - **limit** the limit for pagination
+    - **cursor** the cursor of the page from the `X-Next-Cursor` header of the previous page, replaces `page`
     """
-    count, logs = await query_logs(request, db)
-    response.headers["X-Result-Count"] = str(count)
+    return await _logs_index(request, db, response, cursor)
+
+
+async def _logs_index(request: LogsRequest, db: Session, response: Response, cursor: str | None) -> List[Any]:
+    if cursor is None:
+        count, logs = await query_logs(request, db)
+        response.headers["X-Result-Count"] = str(count)
+    else:
+        # pages of a cursor are not counted, counting would read all matching logs
+        logs = await query_logs_after(request, db, cursor)
+    _logs_keyset.set_next_cursor(response, logs, request.limit)
     return transform_logs_to_response(logs)
 
 
@@ -89,8 +104,7 @@ def transform_logs_to_response(logs: Sequence[Log]) -> List[Any]:
     return result
 
 
-@alog
-async def query_logs(request: LogsRequest, db: Session) -> tuple[int, Sequence[Log]]:
+def _logs_query(request: LogsRequest) -> Select:
     query = select(Log)
 
     if request.model:
@@ -100,8 +114,13 @@ async def query_logs(request: LogsRequest, db: Session) -> tuple[int, Sequence[L
     if request.model_id:
         query = query.filter(Log.model_id == request.model_id)
 
+    return query
+
+
+@alog
+async def query_logs(request: LogsRequest, db: Session) -> tuple[int, Sequence[Log]]:
+    query = _logs_keyset.apply(_logs_query(request), None)
     query = query.offset((request.page - 1) * request.limit).limit(request.limit)
-    query = query.order_by(desc(Log.id))
 
     db_result = await db.execute(query)
 
@@ -109,6 +128,14 @@ async def query_logs(request: LogsRequest, db: Session) -> tuple[int, Sequence[L
     return count, db_result.scalars().all()
 
 
+@alog
+async def query_logs_after(request: LogsRequest, db: Session, cursor: str) -> Sequence[Log]:
+    query = _logs_keyset.apply(_logs_query(request), cursor).limit(request.limit)
+
+    db_result = await db.execute(query)
+    return db_result.scalars().all()
+
+
 @router.get(
     "/logs/index/{logId}",
     status_code=status.HTTP_200_OK,
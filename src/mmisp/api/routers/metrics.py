@@ -0,0 +1,38 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.metrics import metrics_registry, render_metrics
+from mmisp.lib.logger import alog
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/metrics",
+    summary="Per-route request metrics",
+    response_class=PlainTextResponse,
+)
+@alog
+async def get_metrics(
+    auth: Annotated[Auth, Depends(authorize(AuthStrategy.ALL, [Permission.SITE_ADMIN]))],
+) -> PlainTextResponse:
+    """Returns latency, status code, response size and database metrics per route and the number of recycled workers
+    in the Prometheus text format.
+
+    The metrics of all workers sharing the metrics directory are merged.
+
+    args:
+
+    - the user's authentification status
+
+    returns:
+
+    - the metrics
+    """
+    return PlainTextResponse(
+        render_metrics(metrics_registry.merged(), metrics_registry.merged_worker_recycles()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Path, status
 from sqlalchemy.future import select
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.response_cache import cached_response
 from mmisp.api_schemas.noticelists import (
     GetAllNoticelists,
     NoticelistAttributes,
@@ -114,6 +115,7 @@ async def update_noticelists(
     summary="Get all noticelists",
 )
 @alog
+@cached_response(Noticelist)
 async def get_all_noticelists(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from mmisp.api.auth import Auth, AuthStrategy, authorize
+from mmisp.api.response_cache import cached_response
 from mmisp.api_schemas.object_templates import RespItemObjectTemplateIndex, RespObjectTemplateView
 from mmisp.db.database import Session, get_db
 from mmisp.db.models.object import ObjectTemplate
@@ -25,6 +26,7 @@ router = APIRouter(tags=["object_templates"])
     summary="List all object templates",
 )
 @alog
+@cached_response(ObjectTemplate)
 async def index_object_templates(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID, permissions=[Permission.SITE_ADMIN]))],
     db: Annotated[Session, Depends(get_db)],
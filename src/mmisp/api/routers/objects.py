@@ -5,10 +5,14 @@ from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
-from sqlalchemy import delete, or_, select
+from fastapi.responses import Response
+from sqlalchemy import delete, func, or_, select
 from sqlalchemy.sql.expression import Select
+from starlette.requests import Request
 
 from mmisp.api.auth import Auth, AuthStrategy, authorize
+from mmisp.api.conditional import Validators, conditional_request, maximum
+from mmisp.api.json_encoder import json_response, render_model
 from mmisp.api_schemas.attributes import GetAllAttributesResponse
 from mmisp.api_schemas.events import ObjectEventResponse
 from mmisp.api_schemas.objects import (
@@ -23,6 +27,7 @@ from mmisp.db.database import Session, get_db
 from mmisp.db.models.attribute import Attribute
 from mmisp.db.models.event import Event
 from mmisp.db.models.object import Object, ObjectTemplate
+from mmisp.db.models.user import User
 from mmisp.lib.logger import alog, log
 
 router = APIRouter(tags=["objects"])
@@ -94,6 +99,7 @@ async def restsearch(
 @router.get(
     "/objects/{objectId}",
     status_code=status.HTTP_200_OK,
+    response_model=ObjectResponse,
     summary="View object details",
 )
 @alog
@@ -101,7 +107,8 @@ async def get_object_details(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
     object_id: Annotated[int, Path(alias="objectId")],
-) -> ObjectResponse:
+    request: Request,
+) -> Response:
     """View details of a specific object including its attributes and related event.
 
     args:
@@ -112,11 +119,13 @@ async def get_object_details(
 
     - the object id
 
+    - the request
+
     returns:
 
     - the details of the object
     """
-    return await _get_object_details(db, object_id)
+    return await _get_object_details(db, object_id, auth.user, request)
 
 
 @router.delete(
@@ -196,7 +205,8 @@ async def get_object_details_depr(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
     object_id: Annotated[int, Path(alias="objectId")],
-) -> ObjectResponse:
+    request: Request,
+) -> Response:
     """Deprecated. View details of a specific object using the old route.
 
     args:
@@ -207,11 +217,13 @@ async def get_object_details_depr(
 
     - the object id
 
+    - the request
+
     returns:
 
     - the details of the object
     """
-    return await _get_object_details(db, object_id)
+    return await _get_object_details(db, object_id, auth.user, request)
 
 
 @router.delete(
@@ -361,7 +373,12 @@ async def _restsearch(db: Session, body: ObjectSearchBody) -> ObjectSearchRespon
 
 
 @alog
-async def _get_object_details(db: Session, object_id: int) -> ObjectResponse:
+async def _get_object_details(db: Session, object_id: int, user: User | None, request: Request) -> Response:
+    if conditional_request(request):
+        validators = await _object_validators(db, object_id, user)
+        if validators is not None and validators.matches(request):
+            return validators.not_modified()
+
     object: Object | None = await db.get(Object, object_id)
 
     if not object:
@@ -375,6 +392,17 @@ async def _get_object_details(db: Session, object_id: int) -> ObjectResponse:
     )
     event: Event = result2.scalars().one()
 
+    # the same values _object_validators queries
+    version = (
+        object.id,
+        object.timestamp,
+        object.deleted,
+        maximum(attribute.timestamp for attribute in attributes),
+        len(attributes),
+        event.timestamp,
+    )
+    validators = Validators.of(user, "object", version)
+
     event_response: ObjectEventResponse = ObjectEventResponse(
         id=event.id, info=event.info, org_id=event.org_id, orgc_id=event.orgc_id
     )
@@ -386,7 +414,36 @@ async def _get_object_details(db: Session, object_id: int) -> ObjectResponse:
         **object.__dict__, attributes=attributes_response, event=event_response
     )
 
-    return ObjectResponse(Object=object_data)
+    response = json_response(await render_model(ObjectResponse(Object=object_data)))
+    return validators.apply(response)
+
+
+async def _object_validators(db: Session, object_id: int, user: User | None) -> Validators | None:
+    """
+    Computes the validators of an object from its timestamp, its attributes and the timestamp of its event.
+
+    args:
+        db: the current database
+        object_id: the ID of the object
+        user: the requesting user
+
+    returns:
+        the validators, or None if the object does not exist
+    """
+    query: Select = select(
+        Object.id,
+        Object.timestamp,
+        Object.deleted,
+        select(func.max(Attribute.timestamp)).filter(Attribute.object_id == Object.id).scalar_subquery(),
+        select(func.count(Attribute.id)).filter(Attribute.object_id == Object.id).scalar_subquery(),
+        select(Event.timestamp).filter(Event.id == Object.event_id).scalar_subquery(),
+    ).filter(Object.id == object_id)
+
+    version = (await db.execute(query)).one_or_none()
+    if version is None:
+        return None
+
+    return Validators.of(user, "object", version)
 
 
 @alog
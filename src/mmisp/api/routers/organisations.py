@@ -5,7 +5,14 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 from sqlalchemy.future import select
 
-from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize, check_permissions
+from mmisp.api.auth import (
+    Auth,
+    AuthStrategy,
+    Permission,
+    authorize,
+    check_permissions,
+    invalidate_principal_cache_on_commit,
+)
 from mmisp.api_schemas.organisations import (
     AddOrganisation,
     DeleteForceUpdateOrganisationResponse,
@@ -341,6 +348,7 @@ async def _delete_organisation(auth: Auth, db: Session, organisationID: str) ->
 
     await db.delete(organisation)
     await db.flush()
+    invalidate_principal_cache_on_commit(db, org_id=organisation.id)
 
     return DeleteForceUpdateOrganisationResponse(
         saved=True,
@@ -388,6 +396,7 @@ async def _update_organisation(
         org.landingpage = body.landingpage
 
     await db.flush()
+    invalidate_principal_cache_on_commit(db, org_id=org.id)
     await db.refresh(org)
     return GetOrganisationElement(
         id=org.id,
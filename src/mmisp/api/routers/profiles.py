@@ -0,0 +1,139 @@
+import asyncio
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
+from pyinstrument.session import Session
+
+from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.profile_store import (
+    PROFILE_FORMATS,
+    ProfileInfo,
+    RouteProfileSummary,
+    profile_store,
+    render_profile,
+)
+from mmisp.lib.logger import alog
+
+router = APIRouter(tags=["profiles"])
+
+ProfileFormat = Literal["speedscope", "html"]
+
+
+@router.get(
+    "/profiles",
+    summary="List recorded request profiles",
+)
+@alog
+async def get_profiles(
+    auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID, [Permission.SITE_ADMIN]))],
+) -> list[ProfileInfo]:
+    """Lists the recorded request profiles, newest first.
+
+    args:
+
+    - the user's authentification status
+
+    returns:
+
+    - the metadata of the stored profiles
+    """
+    return await asyncio.to_thread(profile_store.list_profiles)
+
+
+@router.get(
+    "/profiles/routes",
+    summary="Summarize recorded request profiles per route",
+)
+@alog
+async def get_profile_routes(
+    auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID, [Permission.SITE_ADMIN]))],
+) -> list[RouteProfileSummary]:
+    """Summarizes the recorded profiles per route, the routes with the most total time first.
+
+    args:
+
+    - the user's authentification status
+
+    returns:
+
+    - the number and duration of the profiles per route
+    """
+    return await asyncio.to_thread(profile_store.summarize)
+
+
+@router.get(
+    "/profiles/routes/aggregate",
+    summary="Download the combined profile of a route",
+)
+@alog
+async def get_aggregated_profile(
+    auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID, [Permission.SITE_ADMIN]))],
+    method: Annotated[str, Query()],
+    route: Annotated[str, Query()],
+    profile_format: Annotated[ProfileFormat, Query(alias="format")] = "speedscope",
+) -> Response:
+    """Combines all recorded profiles of a route into one profile.
+
+    args:
+
+    - the user's authentification status
+
+    - the http method of the route
+
+    - the path template of the route, e.g. /events/{event_id}
+
+    - the format of the profile, speedscope or html
+
+    returns:
+
+    - the rendered profile
+    """
+    session = await asyncio.to_thread(profile_store.aggregate, method.upper(), route)
+    if session is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="No profiles recorded for this route")
+
+    return await _profile_response(session, profile_format, "aggregate")
+
+
+@router.get(
+    "/profiles/{profileId}",
+    summary="Download a recorded request profile",
+)
+@alog
+async def get_profile(
+    auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID, [Permission.SITE_ADMIN]))],
+    profile_id: Annotated[str, Path(alias="profileId")],
+    profile_format: Annotated[ProfileFormat, Query(alias="format")] = "speedscope",
+) -> Response:
+    """Renders a recorded request profile.
+
+    args:
+
+    - the user's authentification status
+
+    - the id of the profile
+
+    - the format of the profile, speedscope or html
+
+    returns:
+
+    - the rendered profile
+    """
+    profile = await asyncio.to_thread(profile_store.get, profile_id)
+    if profile is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Profile not found")
+
+    return await _profile_response(profile[1], profile_format, profile_id)
+
+
+# --- endpoint logic ---
+
+
+async def _profile_response(session: Session, profile_format: str, name: str) -> Response:
+    _, media_type, extension = PROFILE_FORMATS[profile_format]
+    content = await asyncio.to_thread(render_profile, session, profile_format)
+    return Response(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="profile-{name}.{extension}"'},
+    )
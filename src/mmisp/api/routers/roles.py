@@ -4,7 +4,15 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 from sqlalchemy.future import select
 
-from mmisp.api.auth import Auth, AuthStrategy, authorize
+from mmisp.api.auth import (
+    Auth,
+    AuthStrategy,
+    authorize,
+    invalidate_principal_cache_on_commit,
+    permission_mask,
+    role_permission_mask,
+)
+from mmisp.api.response_cache import cached_response
 from mmisp.api_schemas.roles import (
     AddRoleBody,
     AddRoleResponse,
@@ -23,6 +31,7 @@ from mmisp.api_schemas.roles import (
     RoleAttributeResponse,
 )
 from mmisp.db.database import Session, get_db
+from mmisp.db.models.admin_setting import AdminSetting
 from mmisp.db.models.role import Role
 from mmisp.db.models.user import User
 from mmisp.lib.logger import alog
@@ -42,6 +51,7 @@ router = APIRouter(tags=["roles"])
     summary="Get all roles",
 )
 @alog
+@cached_response(Role, AdminSetting)
 async def get_all_roles(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
@@ -398,6 +408,7 @@ async def _delete_role(db: Session, role_id: int) -> DeleteRoleResponse:
         )
 
     await db.delete(role)
+    invalidate_principal_cache_on_commit(db, role_id=role_id)
     await db.commit()
 
     return DeleteRoleResponse(
@@ -433,6 +444,7 @@ async def _update_role(db: Session, role_id: int, body: EditRoleBody) -> EditRol
     role.patch(**body.model_dump(exclude_unset=True))
     role.modified = datetime.now(timezone.utc)
 
+    invalidate_principal_cache_on_commit(db, role_id=role_id)
     await db.commit()
     await db.refresh(role)
 
@@ -463,6 +475,7 @@ async def _reinstate_role(auth: Auth, db: Session, role_id: int) -> ReinstateRol
     if role_id == 6:
         role.default_role = False
 
+    invalidate_principal_cache_on_commit(db, role_id=role_id)
     await db.commit()
 
     return ReinstateRoleResponse(
@@ -488,11 +501,10 @@ async def _filter_roles(auth: Auth, db: Session, body: FilterRoleBody) -> list[F
     roles = result.scalars().all()
 
     filtered_roles: list[FilterRoleResponse] = []
+    required_mask = permission_mask(requested_permissions)
 
     for role in roles:
-        role_permissions = role.get_permissions()
-
-        if all(permission in role_permissions for permission in requested_permissions):
+        if role_permission_mask(role) & required_mask == required_mask:
             filtered_roles.append(FilterRoleResponse(Role=RoleAttributeResponse(**role.asdict())))
 
     return filtered_roles
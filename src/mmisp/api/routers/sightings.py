@@ -8,6 +8,7 @@ from sqlalchemy import and_, select
 from sqlalchemy.sql.expression import Select
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.lazy_imports import lazy_import
 from mmisp.api_schemas.responses.standard_status_response import StandardStatusResponse
 from mmisp.api_schemas.sightings import (
     SightingAttributesResponse,
@@ -23,7 +24,7 @@ from mmisp.db.models.organisation import Organisation
 from mmisp.db.models.sighting import Sighting
 from mmisp.lib.logger import alog, log
 
-from ..workflow import execute_workflow
+workflow = lazy_import("mmisp.api.workflow")
 
 router = APIRouter(tags=["sightings"])
 
@@ -311,7 +312,7 @@ async def _add_sighting(db: Session, body: SightingCreateBody) -> list[SightingA
             db.add(sighting)
             await db.flush()
             await db.refresh(sighting)
-            await execute_workflow("sighting-after-save", db, attribute)
+            await workflow.execute_workflow("sighting-after-save", db, attribute)
 
             organisation: Organisation | None = await db.get(Organisation, sighting.org_id)
 
@@ -365,7 +366,7 @@ async def _add_sightings_at_index(db: Session, attribute_id: int | uuid.UUID) ->
     db.add(sighting)
     await db.flush()
     await db.refresh(sighting)
-    await execute_workflow("sighting-after-save", db, attribute)
+    await workflow.execute_workflow("sighting-after-save", db, attribute)
 
     organisation: Organisation | None = await db.get(Organisation, sighting.org_id)
 
@@ -0,0 +1,38 @@
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Query
+
+from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.slow_queries import slow_query_log
+from mmisp.lib.logger import alog
+
+router = APIRouter(tags=["slow_queries"])
+
+
+@router.get(
+    "/slow_queries",
+    summary="Top slow SQL statements",
+)
+@alog
+async def get_slow_queries(
+    auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID, [Permission.SITE_ADMIN]))],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 25,
+) -> list[dict[str, Any]]:
+    """Returns the SQL statements slower than the slow query threshold, grouped by their normalized shape
+    and ordered by total time.
+
+    Every entry lists the number of slow executions, the total, mean and maximal duration,
+    the routes and users that executed it and the parameter types of the last execution.
+    The statements of all workers sharing the slow query directory are aggregated.
+
+    args:
+
+    - the user's authentification status
+
+    - the maximal number of statements
+
+    returns:
+
+    - the slowest statements
+    """
+    return [offender.to_dict() for offender in slow_query_log.top_offenders(limit)]
@@ -7,6 +7,7 @@ from sqlalchemy import delete, func
 from sqlalchemy.future import select
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.response_cache import cached_response
 from mmisp.api_schemas.tags import (
     TagCreateBody,
     TagDeleteResponse,
@@ -181,6 +182,7 @@ async def delete_tag(
     summary="Get all tags",
 )
 @alog
+@cached_response(Tag)
 async def get_tags(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
@@ -7,6 +7,7 @@ from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.response_cache import cached_response
 from mmisp.api_schemas.responses.standard_status_response import (
     StandardStatusIdentifiedResponse,
     StandardStatusResponse,
@@ -73,6 +74,7 @@ async def update_taxonomies(
     summary="Get all taxonomies",
 )
 @alog
+@cached_response(Taxonomy, TaxonomyPredicate, TaxonomyEntry)
 async def get_taxonomies(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
@@ -4,7 +4,16 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 from sqlalchemy.future import select
 
-from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize, check_permissions
+from mmisp.api.auth import (
+    Auth,
+    AuthStrategy,
+    Permission,
+    authorize,
+    check_permissions,
+    invalidate_api_key_cache,
+    invalidate_principal_cache_on_commit,
+)
+from mmisp.api.crypto import hash_secret
 from mmisp.api_schemas.organisations import OrganisationUsersResponse
 from mmisp.api_schemas.responses.standard_status_response import StandardStatusIdentifiedResponse
 from mmisp.api_schemas.roles import RoleUsersResponse
@@ -24,7 +33,6 @@ from mmisp.db.models.user import User
 from mmisp.db.models.user_setting import UserSetting
 from mmisp.lib.logger import alog
 from mmisp.lib.settings import get_user_setting, set_user_setting
-from mmisp.util.crypto import hash_secret
 
 router = APIRouter(tags=["users"])
 
@@ -371,7 +379,7 @@ async def _add_user(auth: Auth, db: Session, body: AddUserBody) -> AddUserRespon
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Role not found")
 
     user = User(
-        password=hash_secret(body.password),
+        password=await hash_secret(body.password),
         org_id=org.id,
         role_id=role.id,
         email=body.email,
@@ -603,6 +611,8 @@ async def _delete_user(user_id: str, auth: Auth, db: Session) -> StandardStatusI
 
     await db.delete(user)
     await db.flush()
+    invalidate_api_key_cache(user_id=user.id)
+    invalidate_principal_cache_on_commit(db, user_id=user.id)
 
     return StandardStatusIdentifiedResponse(
         saved=True,
@@ -636,6 +646,7 @@ async def _update_user(auth: Auth, db: Session, userID: str, body: UserAttribute
     user.patch(**settings)
 
     await db.flush()
+    invalidate_principal_cache_on_commit(db, user_id=user.id)
     await db.refresh(user)
 
     user_name = await get_user_setting(db, "user_name", user.id)
@@ -6,6 +6,7 @@ from sqlalchemy import delete, func, or_
 from sqlalchemy.future import select
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
+from mmisp.api.response_cache import cached_response
 from mmisp.api_schemas.responses.standard_status_response import StandardStatusResponse
 from mmisp.api_schemas.warninglists import (
     CheckValueResponse,
@@ -149,6 +150,7 @@ async def delete_warninglist(
     summary="Get all warninglists, or selected ones by value and status",
 )
 @alog
+@cached_response(Warninglist, WarninglistEntry, WarninglistType)
 async def get_all_or_selected_warninglists(
     auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
     db: Annotated[Session, Depends(get_db)],
@@ -1,10 +1,11 @@
 from typing import Annotated
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, Response
 
 from mmisp.api.auth import Auth, AuthStrategy, Permission, authorize
 from mmisp.api.config import config
+from mmisp.api.lazy_imports import lazy_import
+from mmisp.api.server_timing import server_timing
 from mmisp.api_schemas.worker import (
     GetWorkerJobqueue,
     GetWorkerJobs,
@@ -13,6 +14,8 @@ from mmisp.api_schemas.worker import (
     RemoveAddQueueToWorker,
 )
 
+httpx = lazy_import("httpx")
+
 router = APIRouter(tags=["worker"])
 
 
@@ -30,10 +33,11 @@ async def pause_workers(
     Raises:
         HTTPException: If an error occurs while pausing the workers.
     """
-    async with httpx.AsyncClient() as client:
-        api_response = await client.post(
-            f"{config.WORKER_URL}/worker/pause/{id}", headers={"Authorization": f"Bearer {config.WORKER_KEY}"}
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient() as client:
+            api_response = await client.post(
+                f"{config.WORKER_URL}/worker/pause/{id}", headers={"Authorization": f"Bearer {config.WORKER_KEY}"}
+            )
 
     response.status_code = api_response.status_code
     response.headers["x-worker-name-header"] = api_response.headers[
@@ -59,10 +63,11 @@ async def unpause_workers(
     Raises:
         HTTPException: If an error occurs while unpausing the workers.
     """
-    async with httpx.AsyncClient() as client:
-        api_response = await client.post(
-            f"{config.WORKER_URL}/worker/unpause/{id}", headers={"Authorization": f"Bearer {config.WORKER_KEY}"}
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient() as client:
+            api_response = await client.post(
+                f"{config.WORKER_URL}/worker/unpause/{id}", headers={"Authorization": f"Bearer {config.WORKER_KEY}"}
+            )
 
     response.status_code = api_response.status_code
 
@@ -93,12 +98,13 @@ async def add_queue(
     Raises:
         HTTPException: If the worker or queue cannot be found or if an error occurs during queue addition.
     """
-    async with httpx.AsyncClient() as client:
-        api_response = await client.post(
-            f"{config.WORKER_URL}/worker/addQueue/{id}",
-            headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
-            json=body.dict(),
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient() as client:
+            api_response = await client.post(
+                f"{config.WORKER_URL}/worker/addQueue/{id}",
+                headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
+                json=body.dict(),
+            )
 
     response.status_code = api_response.status_code
     response.headers["x-queue-name-header"] = api_response.headers["x-queue-name-header"]
@@ -128,12 +134,13 @@ async def remove_queue(
     Raises:
         HTTPException: If the worker or queue cannot be found or if an error occurs during queue removal.
     """
-    async with httpx.AsyncClient() as client:
-        api_response = await client.post(
-            f"{config.WORKER_URL}/worker/removeQueue/{id}",
-            headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
-            json=body.dict(),
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient() as client:
+            api_response = await client.post(
+                f"{config.WORKER_URL}/worker/removeQueue/{id}",
+                headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
+                json=body.dict(),
+            )
 
     response.status_code = api_response.status_code
     response.headers["x-queue-name-header"] = api_response.headers["x-queue-name-header"]
@@ -165,12 +172,13 @@ async def get_workers(
     Raises:
         HTTPException: If an error occurs while retrieving the worker list.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{config.WORKER_URL}/worker/list_workers",
-            headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
-            timeout=100,
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient() as client:
+            response = await client.get(
+                f"{config.WORKER_URL}/worker/list_workers",
+                headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
+                timeout=100,
+            )
 
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Unexpected error occurred")
@@ -195,12 +203,13 @@ async def get_jobqueue(
     Raises:
         HTTPException: If an error occurs while retrieving the job queues or the worker id is invalid.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{config.WORKER_URL}/worker/jobqueue/{id}",
-            headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
-            timeout=100,
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient() as client:
+            response = await client.get(
+                f"{config.WORKER_URL}/worker/jobqueue/{id}",
+                headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
+                timeout=100,
+            )
 
     if response.status_code == 404:
         raise HTTPException(status_code=404, detail="No worker exists with this name")
@@ -227,12 +236,13 @@ async def get_jobs(
     Raises:
         HTTPException: If an error occurs while retrieving the jobs for the worker or the id is invalid.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{config.WORKER_URL}/worker/jobs/{id}",
-            headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
-            timeout=100,
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient() as client:
+            response = await client.get(
+                f"{config.WORKER_URL}/worker/jobs/{id}",
+                headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
+                timeout=100,
+            )
 
     if response.status_code == 404:
         raise HTTPException(status_code=404, detail="No worker exists with this name")
@@ -258,12 +268,13 @@ async def get_returningJobs(
     Raises:
         HTTPException: If an error occurs while retrieving returning jobs for the worker or the id is invalid.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{config.WORKER_URL}/worker/returningJobs/",
-            headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
-            timeout=100,
-        )
+    with server_timing("worker"):
+        async with httpx.AsyncClient() as client:
+            response = await client.get(
+                f"{config.WORKER_URL}/worker/returningJobs/",
+                headers={"Authorization": f"Bearer {config.WORKER_KEY}"},
+                timeout=100,
+            )
 
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Unexpected error occurred")
@@ -0,0 +1,127 @@
+"""
+Modern MISP API - mmisp.api.server_timing
+
+Server-Timing response headers breaking the request time down into authorization, SQL,
+workflow execution, worker calls and response serialization.
+
+The timers are only active when SERVER_TIMING is enabled, otherwise `server_timing` does nothing.
+The serialization time covers the responses rendered through mmisp.api.json_encoder.
+The SQL time is taken from the SQL observer, see mmisp.api.sql_observer.
+"""
+
+import functools
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import ParamSpec, Self, TypeVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from mmisp.api.sql_observer import observe_request_sql
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+DESCRIPTIONS = {
+    "auth": "authorization",
+    "db": "SQL statements",
+    "workflow": "workflow execution",
+    "worker": "worker requests",
+    "serialize": "response serialization",
+    "total": "total",
+}
+
+
+class ServerTimings:
+    """
+    The accumulated durations of the current request, in seconds.
+    """
+
+    def __init__(self: Self) -> None:
+        self.durations: dict[str, float] = {}
+
+    def add(self: Self, name: str, duration: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def header(self: Self) -> str:
+        return ", ".join(
+            f'{name};desc="{DESCRIPTIONS.get(name, name)}";dur={duration * 1000:.1f}'
+            for name, duration in self.durations.items()
+        )
+
+
+current_server_timings: ContextVar[ServerTimings | None] = ContextVar("current_server_timings", default=None)
+
+
+@contextmanager
+def server_timing(name: str) -> Iterator[None]:
+    """
+    Adds the duration of the block to the Server-Timing metric `name` of the current request.
+
+    args:
+        name: the name of the metric
+    """
+    timings = current_server_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, perf_counter() - start)
+
+
+def timed(name: str) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    """
+    Decorator adding the duration of an async function to the Server-Timing metric `name`.
+
+    args:
+        name: the name of the metric
+    """
+
+    def decorator(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            with server_timing(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class ServerTimingMiddleware:
+    """
+    Adds the Server-Timing header to every http response.
+    """
+
+    def __init__(self: Self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = ServerTimings()
+        token = current_server_timings.set(timings)
+        start = perf_counter()
+
+        with observe_request_sql(scope) as request:
+
+            async def send_with_server_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    if request.count:
+                        timings.add("db", request.duration)
+                    timings.add("total", perf_counter() - start)
+                    MutableHeaders(scope=message).append("Server-Timing", timings.header())
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_server_timing)
+            finally:
+                current_server_timings.reset(token)
@@ -0,0 +1,319 @@
+"""
+Modern MISP API - mmisp.api.slow_queries
+
+Always-on capture of SQL statements slower than `SLOW_QUERY_THRESHOLD_MS`.
+
+Every slow statement is recorded with its normalized shape, the types of its parameters, the duration measured
+by the SQL observer, and the route and user of the request that executed it.
+The parameter values are never kept, as they may contain secrets like password or auth key hashes.
+The entries are kept in a ring buffer of `SLOW_QUERY_BUFFER_SIZE` entries per worker.
+Like the request metrics, every worker periodically writes its buffer to a file in `SLOW_QUERY_DIRECTORY`,
+so the slow query endpoint can aggregate the statements of all workers into the top offenders.
+The buffer is written after a request, never while a statement is recorded.
+The files are named by a worker id unique per process. On shutdown a worker moves its entries
+into the file of the retired workers, which keeps the latest `SLOW_QUERY_BUFFER_SIZE` of them,
+and removes its own file, so the directory does not grow with every replaced worker.
+"""
+
+import fcntl
+import json
+import os
+import secrets
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import monotonic, time
+from typing import Any, Self
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from mmisp.api.config import config
+from mmisp.api.query_detector import normalize_statement
+from mmisp.api.sql_observer import ExecutedStatement, statement_subscribers
+
+MAX_PARAMETER_LENGTH = 200
+NO_ROUTE = "none"
+RETIRED_WORKERS_FILE = "slow-queries-retired.json"
+_LOCK_FILE = "slow-queries.lock"
+
+
+@dataclass
+class SlowQueryContext:
+    """
+    The request running in the current context, used to attribute slow statements.
+    """
+
+    method: str
+    scope: Scope
+    user_id: int | None = None
+
+    @property
+    def route(self: Self) -> str:
+        # the matched route is stored in the scope by the router
+        return self.scope["route"].path if "route" in self.scope else self.scope["path"]
+
+
+current_slow_query_context: ContextVar[SlowQueryContext | None] = ContextVar("current_slow_query_context", default=None)
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    parameters: str
+    duration_ms: float
+    method: str
+    route: str
+    user_id: int | None
+    timestamp: float
+
+
+@dataclass
+class SlowQueryOffender:
+    """
+    A statement shape aggregated over all of its slow executions.
+    """
+
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    routes: dict[str, int] = field(default_factory=dict)
+    user_ids: list[int] = field(default_factory=list)
+    last_parameters: str = ""
+    last_seen: float = 0.0
+
+    @property
+    def mean_ms(self: Self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def add(self: Self, query: SlowQuery) -> None:
+        self.count += 1
+        self.total_ms += query.duration_ms
+        self.max_ms = max(self.max_ms, query.duration_ms)
+        route = f"{query.method} {query.route}" if query.method else query.route
+        self.routes[route] = self.routes.get(route, 0) + 1
+        if query.user_id is not None and query.user_id not in self.user_ids:
+            self.user_ids.append(query.user_id)
+        if query.timestamp >= self.last_seen:
+            self.last_seen = query.timestamp
+            self.last_parameters = query.parameters
+
+    def to_dict(self: Self) -> dict[str, Any]:
+        return {**asdict(self), "mean_ms": self.mean_ms}
+
+
+class SlowQueryLog:
+    """
+    Ring buffer of the slow statements of the current worker.
+    A threshold of zero or less disables the capture.
+    """
+
+    def __init__(self: Self, threshold_ms: float, size: int, directory: str = "", flush_interval: float = 5) -> None:
+        self.threshold_ms = threshold_ms
+        self.entries: deque[SlowQuery] = deque(maxlen=max(size, 0))
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._flushed_at = 0.0
+        self._worker_pid = 0
+        self._worker_id = ""
+
+    @property
+    def enabled(self: Self) -> bool:
+        return self.threshold_ms > 0 and self.entries.maxlen != 0
+
+    @property
+    def worker_id(self: Self) -> str:
+        """
+        returns:
+            the id of the current worker process, generated anew in every forked worker
+        """
+        pid = os.getpid()
+        if pid != self._worker_pid:
+            self._worker_pid = pid
+            self._worker_id = f"{pid}-{secrets.token_hex(4)}"
+        return self._worker_id
+
+    def record(self: Self, statement: str, parameters: Any, duration_ms: float) -> None:
+        """
+        Adds the statement to the buffer if it took at least the threshold.
+
+        args:
+            statement: the executed SQL statement
+            parameters: the bound parameters, only their types are kept
+            duration_ms: the execution time in milliseconds
+        """
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return
+
+        context = current_slow_query_context.get()
+        self.entries.append(
+            SlowQuery(
+                statement=normalize_statement(statement),
+                parameters=redact_parameters(parameters)[:MAX_PARAMETER_LENGTH],
+                duration_ms=duration_ms,
+                method=context.method if context is not None else "",
+                route=context.route if context is not None else NO_ROUTE,
+                user_id=context.user_id if context is not None else None,
+                timestamp=time(),
+            )
+        )
+
+    def flush_due(self: Self) -> bool:
+        return self.directory is not None and monotonic() - self._flushed_at >= self.flush_interval
+
+    def flush(self: Self) -> None:
+        """
+        Writes the buffer of this worker to the slow query directory.
+        The file is replaced atomically, so concurrent readers never see a partial file.
+        """
+        if self.directory is None:
+            return
+
+        self._flushed_at = monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write(self.directory / f"slow-queries-{self.worker_id}.json", list(self.entries))
+
+    def retire(self: Self) -> None:
+        """
+        Moves the entries of this worker into the file of the retired workers and removes its file.
+        Called when the worker shuts down, entries recorded afterwards are written to a new file.
+        """
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        retired_path = self.directory / RETIRED_WORKERS_FILE
+        with self._lock(fcntl.LOCK_EX):
+            entries = sorted([*_read(retired_path), *self.entries], key=lambda entry: entry.timestamp)
+            _write(retired_path, entries[-self.entries.maxlen :] if self.entries.maxlen else [])
+            (self.directory / f"slow-queries-{self.worker_id}.json").unlink(missing_ok=True)
+        self.clear()
+
+    def merged(self: Self) -> list[SlowQuery]:
+        """
+        returns:
+            the slow statements of all workers writing to the slow query directory,
+            or of this worker if there is none
+        """
+        if self.directory is None:
+            return list(self.entries)
+
+        self.flush()
+        entries: list[SlowQuery] = []
+        # a retiring worker moves its entries from its own file to the retired workers' one
+        with self._lock(fcntl.LOCK_SH):
+            for path in self.directory.glob("slow-queries-*.json"):
+                entries.extend(_read(path))
+        return entries
+
+    def top_offenders(self: Self, limit: int) -> list[SlowQueryOffender]:
+        """
+        Groups the slow statements of all workers by their shape.
+
+        args:
+            limit: the maximal number of offenders
+
+        returns:
+            the statement shapes with the highest total time, slowest first
+        """
+        offenders: dict[str, SlowQueryOffender] = {}
+        for entry in self.merged():
+            offender = offenders.get(entry.statement)
+            if offender is None:
+                offender = offenders[entry.statement] = SlowQueryOffender(entry.statement)
+            offender.add(entry)
+        return sorted(offenders.values(), key=lambda offender: offender.total_ms, reverse=True)[:limit]
+
+    @contextmanager
+    def _lock(self: Self, operation: int) -> Iterator[None]:
+        assert self.directory is not None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / _LOCK_FILE, "a") as lock:
+            fcntl.flock(lock, operation)
+            yield
+
+    def clear(self: Self) -> None:
+        self.entries.clear()
+
+
+def _read(path: Path) -> list[SlowQuery]:
+    try:
+        return [SlowQuery(**entry) for entry in json.loads(path.read_text())]
+    except (OSError, ValueError, TypeError):
+        return []
+
+
+def _write(path: Path, entries: list[SlowQuery]) -> None:
+    temporary_path = path.with_suffix(".tmp")
+    temporary_path.write_text(json.dumps([asdict(entry) for entry in entries]))
+    os.replace(temporary_path, path)
+
+
+def redact_parameters(parameters: Any) -> str:
+    """
+    args:
+        parameters: the bound parameters of a statement, a sequence, a mapping or a list of them
+
+    returns:
+        the parameters with every value replaced by the name of its type, e.g. `(int, str)`
+    """
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key!r}: {redact_parameters(value)}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, list):
+        return "[" + ", ".join(redact_parameters(value) for value in parameters) + "]"
+    if isinstance(parameters, tuple):
+        values = ", ".join(redact_parameters(value) for value in parameters)
+        return f"({values},)" if len(parameters) == 1 else f"({values})"
+    return type(parameters).__name__
+
+
+def record_slow_query_user(user_id: int | None) -> None:
+    """
+    Attributes the slow statements of the current request to the authenticated user.
+
+    args:
+        user_id: the id of the user
+    """
+    context = current_slow_query_context.get()
+    if context is not None:
+        context.user_id = user_id
+
+
+def _record_slow_query(executed: ExecutedStatement) -> None:
+    slow_query_log.record(executed.statement, executed.parameters, executed.duration * 1000)
+
+
+statement_subscribers.append(_record_slow_query)
+
+
+class SlowQueryMiddleware:
+    """
+    Makes the route of every http request available for the attribution of slow statements.
+    """
+
+    def __init__(self: Self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not slow_query_log.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        token = current_slow_query_context.set(SlowQueryContext(scope["method"], scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_slow_query_context.reset(token)
+            if slow_query_log.flush_due():
+                slow_query_log.flush()
+
+
+slow_query_log = SlowQueryLog(
+    config.SLOW_QUERY_THRESHOLD_MS,
+    config.SLOW_QUERY_BUFFER_SIZE,
+    config.SLOW_QUERY_DIRECTORY,
+    config.SLOW_QUERY_FLUSH_INTERVAL,
+)
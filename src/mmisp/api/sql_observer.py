@@ -0,0 +1,161 @@
+"""
+Modern MISP API - mmisp.api.sql_observer
+
+The single observer of the SQL statements executed by the API.
+
+One pair of SQLAlchemy engine events times every statement and attributes it to the http request running
+in the current context. The request metrics, the Server-Timing header, the explain mode, the slow query log
+and the N+1 query detection all read from this observation instead of timing the statements themselves.
+
+The observation of a request is started by the outermost middleware calling `observe_request_sql`,
+nested middlewares share it. The executed statements themselves are only collected while a consumer,
+e.g. the query detector or a `QueryCounter`, needs them.
+"""
+
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Self
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+_STATEMENT_START = "mmisp_statement_start"
+
+
+@dataclass(slots=True)
+class ExecutedStatement:
+    statement: str
+    parameters: Any
+    executemany: bool
+    rowcount: int
+    duration: float
+    """The execution time in seconds."""
+
+
+StatementSubscriber = Callable[[ExecutedStatement], None]
+
+
+@dataclass
+class RequestSql:
+    """
+    The SQL statements executed by one http request.
+    """
+
+    method: str = ""
+    scope: Scope | None = field(default=None, repr=False)
+    count: int = 0
+    duration: float = 0.0
+    """The time spent executing statements in seconds."""
+    statements: Counter[str] | None = None
+    """The executed statements, only collected after `collect_statements` was called."""
+    subscribers: list[StatementSubscriber] = field(default_factory=list, repr=False)
+
+    @property
+    def route(self: Self) -> str:
+        if self.scope is None:
+            return ""
+        # the matched route is stored in the scope by the router
+        return self.scope["route"].path if "route" in self.scope else self.scope["path"]
+
+    def collect_statements(self: Self) -> Counter[str]:
+        """
+        Starts collecting the executed statements of the request.
+
+        returns:
+            the executed statements with their number of executions
+        """
+        if self.statements is None:
+            self.statements = Counter()
+        return self.statements
+
+
+RequestObserver = Callable[[RequestSql], None]
+
+current_request_sql: ContextVar[RequestSql | None] = ContextVar("current_request_sql", default=None)
+
+statement_subscribers: list[StatementSubscriber] = []
+"""Called with every executed statement, whether it belongs to a request or not."""
+request_observers: list[RequestObserver] = []
+"""Called with the observation of every finished request, the statements are collected while there are any."""
+
+
+@contextmanager
+def observe_request_sql(scope: Scope) -> Iterator[RequestSql]:
+    """
+    Observes the SQL statements of the http request, or joins the observation of an outer middleware.
+
+    args:
+        scope: the scope of the request
+
+    returns:
+        the observation of the request
+    """
+    request = current_request_sql.get()
+    if request is not None:
+        yield request
+        return
+
+    request = RequestSql(method=scope["method"], scope=scope)
+    if request_observers:
+        request.collect_statements()
+    token = current_request_sql.set(request)
+    try:
+        yield request
+    finally:
+        current_request_sql.reset(token)
+        for observer in list(request_observers):
+            observer(request)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn: Any, *args: Any) -> None:
+    if statement_subscribers or current_request_sql.get() is not None:
+        conn.info[_STATEMENT_START] = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    start = conn.info.pop(_STATEMENT_START, None)
+    if start is None:
+        return
+
+    duration = perf_counter() - start
+    request = current_request_sql.get()
+    if request is not None:
+        request.count += 1
+        request.duration += duration
+        if request.statements is not None:
+            request.statements[statement] += 1
+
+    subscribers = statement_subscribers
+    if request is not None and request.subscribers:
+        subscribers = subscribers + request.subscribers
+    if subscribers:
+        executed = ExecutedStatement(statement, parameters, executemany, cursor.rowcount, duration)
+        for subscriber in subscribers:
+            subscriber(executed)
+
+
+class SqlObserverMiddleware:
+    """
+    Observes the SQL statements of every http request.
+    Added outside of all middlewares reading the observation, so they share one observation per request.
+    """
+
+    def __init__(self: Self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with observe_request_sql(scope):
+            await self.app(scope, receive, send)
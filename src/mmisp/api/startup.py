@@ -0,0 +1,84 @@
+"""
+Modern MISP API - mmisp.api.startup
+
+Profile of the startup of a worker.
+
+`python -m mmisp.api.startup` measures in a fresh interpreter how long importing the framework, the models
+and every router and constructing the app takes, i.e. the time every worker spends on boot before serving requests.
+The deferred phases are paid on the first requests of a worker instead, if `LAZY_IMPORTS` is enabled.
+"""
+
+import importlib
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any
+
+FRAMEWORK_MODULES = ("fastapi", "pydantic", "sqlalchemy.ext.asyncio", "starlette.applications")
+
+
+@dataclass
+class StartupPhase:
+    name: str
+    seconds: float
+    deferred: bool = False
+
+
+def _measure(phases: list[StartupPhase], name: str, func: Callable[[], Any], *, deferred: bool = False) -> None:
+    start = perf_counter()
+    func()
+    phases.append(StartupPhase(name, perf_counter() - start, deferred))
+
+
+def _import_all(names: list[str] | tuple[str, ...]) -> None:
+    for name in names:
+        importlib.import_module(name)
+
+
+def profile_startup() -> list[StartupPhase]:
+    """
+    Imports the API phase by phase. Must run in a fresh interpreter, already imported modules are not measured.
+
+    returns:
+        the duration of every phase
+    """
+    phases: list[StartupPhase] = []
+    _measure(phases, "framework", lambda: _import_all(FRAMEWORK_MODULES))
+    _measure(phases, "configuration", lambda: _import_all(["mmisp.api.config", "mmisp.db.config"]))
+    _measure(phases, "models", lambda: _import_all(["mmisp.db.all_models"]))
+    _measure(phases, "database and authentication", lambda: _import_all(["mmisp.db.database", "mmisp.api.auth"]))
+
+    from mmisp.api.routers import router_module_names
+
+    for name in router_module_names():
+        _measure(phases, name, lambda: _import_all([name]))
+
+    # the routers are already imported, so this is the middleware and the construction of the app
+    _measure(phases, "app", lambda: _import_all(["mmisp.api.main"]))
+
+    from sqlalchemy.orm import configure_mappers
+
+    from mmisp.api.config import config
+    from mmisp.api.lazy_imports import deferred_modules
+
+    _measure(phases, "mapper configuration", configure_mappers, deferred=config.LAZY_IMPORTS)
+    _measure(phases, "deferred modules", lambda: _import_all(sorted(deferred_modules)), deferred=config.LAZY_IMPORTS)
+    return phases
+
+
+def main() -> None:
+    if "mmisp.api.main" in sys.modules:
+        raise RuntimeError("the startup can only be profiled in a fresh interpreter")
+
+    phases = profile_startup()
+    boot = sum(phase.seconds for phase in phases if not phase.deferred)
+    width = max(len(phase.name) for phase in phases)
+    for phase in phases:
+        note = "  (first use)" if phase.deferred else ""
+        print(f"{phase.name:<{width}}  {phase.seconds * 1000:8.1f} ms{note}")
+    print(f"{'boot':<{width}}  {boot * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Modern MISP API - mmisp.api.warm_up
+
+Preparation of a worker before it accepts requests, enabled with `WARM_UP`.
+
+The connections of the pool are opened in advance and the responses of the reference data endpoints,
+e.g. describe types, taxonomies, galaxies and object templates, are put into the response cache,
+so the first requests of a fresh worker do not pay for connecting and for building these responses.
+The warm-up runs in every worker after forking, connections must not be shared between processes.
+"""
+
+import gc
+import importlib
+import inspect
+import logging
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from typing import Any, get_type_hints
+
+from fastapi.params import Param
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import configure_mappers
+from starlette.requests import Request
+
+from mmisp.api.auth import Auth
+from mmisp.api.lazy_imports import deferred_modules
+from mmisp.api.response_cache import cached_endpoints, response_cache
+from mmisp.db.database import sessionmanager
+
+logger = logging.getLogger("mmisp")
+
+
+def preload() -> None:
+    """
+    Imports everything a worker would import lazily, to be called before forking the workers,
+    so the modules are shared copy-on-write between them.
+    """
+    for name in sorted(deferred_modules):
+        importlib.import_module(name)
+    configure_mappers()
+    # objects created so far live as long as the process, keeping them out of the garbage collection
+    # avoids touching and thereby copying their memory pages in every worker
+    gc.freeze()
+
+
+async def open_pool_connections(engine: AsyncEngine) -> int:
+    """
+    Opens as many connections as the pool keeps and returns them to the pool.
+
+    args:
+        engine: the engine
+
+    returns:
+        the number of opened connections
+    """
+    size = getattr(engine.pool, "size", None)
+    count = size() if callable(size) else 1
+    async with AsyncExitStack() as stack:
+        for _ in range(count):
+            await stack.enter_async_context(engine.connect())
+    return count
+
+
+def _endpoint_arguments(endpoint: Callable[..., Awaitable[Any]], session: AsyncSession) -> dict[str, Any] | None:
+    hints = get_type_hints(endpoint)
+    arguments: dict[str, Any] = {}
+    for name, parameter in inspect.signature(endpoint).parameters.items():
+        hint = hints.get(name)
+        if hint is Auth:
+            arguments[name] = Auth(is_worker=True)
+        elif hint is AsyncSession:
+            arguments[name] = session
+        elif hint is Request or parameter.default is inspect.Parameter.empty:
+            return None
+        elif isinstance(parameter.default, Param):
+            arguments[name] = parameter.default.default
+        else:
+            arguments[name] = parameter.default
+    return arguments
+
+
+async def warm_up_response_cache() -> int:
+    """
+    Calls every cached endpoint without a required parameter, as it is called without query parameters.
+
+    returns:
+        the number of cached responses
+    """
+    if not response_cache.enabled:
+        return 0
+
+    assert sessionmanager is not None
+    warmed = 0
+    for endpoint in cached_endpoints:
+        async with sessionmanager.session() as session:
+            arguments = _endpoint_arguments(endpoint.__wrapped__, session)  # type:ignore[attr-defined]
+            if arguments is None:
+                continue
+            try:
+                await endpoint(**arguments)
+            except Exception:
+                logger.warning("could not warm up %s", endpoint.__qualname__, exc_info=True)
+                continue
+        warmed += 1
+    return warmed
+
+
+async def warm_up() -> None:
+    """
+    Opens the connections of the pool and fills the response cache.
+    Failures are logged, the worker starts with cold caches then.
+    """
+    assert sessionmanager is not None
+    if sessionmanager._engine is None:
+        return
+
+    try:
+        connections = await open_pool_connections(sessionmanager._engine)
+    except Exception:
+        logger.warning("could not open the connections of the pool", exc_info=True)
+        return
+    responses = await warm_up_response_cache()
+    logger.info("warmed up %d connections and %d cached responses", connections, responses)
@@ -2,6 +2,7 @@ from typing import List, Tuple
 
 from starlette import status
 
+from mmisp.api.server_timing import timed
 from mmisp.db.database import Session
 from mmisp.workflows.execution import VerbatimWorkflowInput, create_virtual_root_user, workflow_by_trigger_id
 from mmisp.workflows.execution import execute_workflow as do_execute
@@ -35,6 +36,7 @@ async def execute_blocking_workflow(wf_name: str, db: Session, input: VerbatimWo
             )
 
 
+@timed("workflow")
 async def execute_workflow(wf_name: str, db: Session, input: VerbatimWorkflowInput) -> Tuple[bool, List[str]] | None:
     """
     Executes a workflow and returns the user messages and the execution result.
@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime
 
 import pytest
 import pytest_asyncio
@@ -201,6 +202,37 @@ async def test_get_existing_attribute(
         assert response_json["Attribute"]["Tag"][0]["id"] == at.id
 
 
+@pytest.mark.asyncio
+async def test_get_attribute_not_modified(
+    db: AsyncSession, attribute_with_normal_tag, site_admin_user_token, client
+) -> None:
+    attribute, _ = attribute_with_normal_tag
+    attribute.timestamp = datetime.fromtimestamp(1700000000)
+    await db.commit()
+    headers = {"authorization": site_admin_user_token}
+
+    response = client.get(f"/attributes/{attribute.id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert "Last-Modified" not in response.headers
+
+    response = client.get(f"/attributes/{attribute.uuid}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 304
+    response = client.get(f"/attributes/{attribute.id}", headers=headers | {"If-None-Match": 'W/"other"'})
+    assert response.status_code == 200
+    response = client.get(
+        f"/attributes/{attribute.id}", headers=headers | {"If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"}
+    )
+    assert response.status_code == 200
+
+    attribute.timestamp = datetime.fromtimestamp(1700000060)
+    await db.commit()
+
+    response = client.get(f"/attributes/{attribute.id}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
 # --- Test get attribute by uuid
 @pytest.mark.asyncio
 async def test_get_existing_attribute_by_uuid(
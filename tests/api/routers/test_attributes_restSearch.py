@@ -58,3 +58,30 @@ async def test_invalid_search_attribute_data(site_admin_user_token, client) -> N
     headers = {"authorization": site_admin_user_token}
     response = client.post("/attributes/restSearch", json=request_body, headers=headers)
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_restsearch_cursor_pagination(
+    event, attribute, attribute2, attribute_multi, site_admin_user_token, client
+) -> None:
+    headers = {"authorization": site_admin_user_token}
+    request_body = {"returnFormat": "json", "eventid": event.id, "limit": 2}
+
+    pages = []
+    cursor = None
+    while True:
+        params = {"cursor": cursor} if cursor is not None else {}
+        response = client.post("/attributes/restSearch", json=request_body, headers=headers, params=params)
+        assert response.status_code == 200
+        pages.append([int(attribute["id"]) for attribute in response.json()["response"]["Attribute"]])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert pages == [sorted([attribute.id, attribute2.id]), [attribute_multi.id]]
+
+    response = client.post("/attributes/restSearch", json=request_body | {"page": 2}, headers=headers)
+    assert [int(attribute["id"]) for attribute in response.json()["response"]["Attribute"]] == pages[1]
+
+    response = client.post("/attributes/restSearch", json=request_body, headers=headers, params={"cursor": "invalid"})
+    assert response.status_code == 400
@@ -318,3 +318,22 @@ async def test_parse_date_invalid_format():
 async def test_parse_date_invalid_date():
     with pytest.raises(ValueError, match="Invalid date format"):
         parse_date("2024-02-30")
+
+
+@pytest.mark.asyncio
+async def test_delete_auth_key_invalidates_cached_key(site_admin_user_token, site_admin_user, client) -> None:
+    headers = {"authorization": site_admin_user_token}
+    response = client.post(f"/auth_keys/{site_admin_user.id}", json={"comment": "cached key"}, headers=headers)
+    assert response.status_code == 201
+    auth_key = response.json()["AuthKey"]
+
+    key_headers = {"authorization": auth_key["authkey_raw"]}
+    assert client.get("/auth_keys", headers=key_headers).status_code == 200
+
+    response = client.put(f"/auth_keys/{auth_key['id']}", headers=headers, json={"read_only": True})
+    assert response.status_code == 200
+    assert client.get("/auth_keys", headers=key_headers).status_code == 403
+
+    response = client.delete(f"/auth_keys/{auth_key['id']}", headers=headers)
+    assert response.status_code == 200
+    assert client.get("/auth_keys", headers=key_headers).status_code == 401
@@ -572,3 +572,23 @@ async def test_get_open_id_connect_provider_by_id(db: Session, client, site_admi
     assert json["client_id"] == oidc_provider.client_id
     assert json["scope"] == oidc_provider.scope
     await db.delete(oidc_provider)
+
+
+@pytest.mark.asyncio
+async def test_get_auth_cache_statistics(client, site_admin_user_token) -> None:
+    assert client.get("/auth_keys", headers={"authorization": "invalid_key"}).status_code == 401
+    assert client.get("/auth_keys", headers={"authorization": "invalid_key"}).status_code == 401
+
+    response = client.get("/auth/cacheStatistics", headers={"authorization": site_admin_user_token})
+    assert response.status_code == 200
+    statistics = response.json()
+
+    assert statistics["rejected_token_cache"]["hits"] >= 1
+    assert statistics["rejected_token_cache"]["size"] >= 1
+    assert "api_key_cache" in statistics
+
+
+@pytest.mark.asyncio
+async def test_get_auth_cache_statistics_no_permission(client, instance_owner_org_admin_user_token) -> None:
+    response = client.get("/auth/cacheStatistics", headers={"authorization": instance_owner_org_admin_user_token})
+    assert response.status_code == 403
@@ -1,13 +1,28 @@
 import uuid
+from datetime import date, datetime
+from typing import Annotated
 
 import pytest
+import pytest_asyncio
 import respx
 import sqlalchemy as sa
+from fastapi import Depends
 from httpx import Response
 from icecream import ic
 
+from mmisp.api.auth import Auth, AuthStrategy, authorize
 from mmisp.api.config import config
+from mmisp.api.json_encoder import NotEncodable
+from mmisp.api.routers import events
+from mmisp.api_schemas.events import AddEditGetEventResponse
+from mmisp.db.database import Session, get_db
+from mmisp.db.models.attribute import Attribute, AttributeTag
+from mmisp.db.models.event import Event, EventReport, EventTag
+from mmisp.db.models.galaxy_cluster import GalaxyCluster
 from mmisp.db.models.log import Log
+from mmisp.db.models.object import Object
+from mmisp.lib.distribution import AttributeDistributionLevels, EventDistributionLevels
+from mmisp.tests.generators.model_generators.attribute_generator import generate_attribute, generate_domain_attribute
 
 
 @respx.mock
@@ -126,6 +141,98 @@ async def test_get_existing_event(
     assert response_json["Event"]["Galaxy"][0]["GalaxyCluster"][0]["event_tag_id"] == eventtag.id
 
 
+@pytest.mark.asyncio
+async def test_get_event_renders_oldest_galaxy_cluster_of_tag(
+    db, event, galaxy, galaxy_cluster, tag, site_admin_user_token, eventtag, client
+) -> None:
+    duplicate = GalaxyCluster(
+        collection_uuid="da4b7a8d-d314-42e8-9c85-2eb476e90dbf",
+        type="test type",
+        value="duplicate",
+        tag_name=tag.name,
+        description="duplicate",
+        galaxy_id=galaxy.id,
+        authors=["admin"],
+    )
+    db.add(duplicate)
+    await db.commit()
+
+    response = client.get(f"/events/{event.id}", headers={"authorization": site_admin_user_token})
+
+    await db.delete(duplicate)
+    await db.commit()
+
+    assert response.status_code == 200
+    assert [cluster["id"] for cluster in response.json()["Event"]["Galaxy"][0]["GalaxyCluster"]] == [galaxy_cluster.id]
+
+
+@pytest.mark.asyncio
+async def test_get_existing_event_query_count(
+    event, attribute, galaxy_cluster, tag, site_admin_user_token, eventtag, client, query_counter
+) -> None:
+    headers = {"authorization": site_admin_user_token}
+
+    response = client.get(f"/events/{event.id}", headers=headers)
+
+    assert response.status_code == 200
+    query_counter.assert_max_statements(30)
+
+
+@pytest.mark.asyncio
+async def test_get_event_not_modified(
+    db, event, attribute, tag, eventtag, site_admin_user_token, client, query_counter
+) -> None:
+    attributetag = AttributeTag(attribute_id=attribute.id, event_id=event.id, tag_id=tag.id, local=False)
+    db.add(attributetag)
+    await db.commit()
+    headers = {"authorization": site_admin_user_token}
+
+    response = client.get(f"/events/{event.id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    # without a precondition the version is derived from the loaded event
+    (request,) = query_counter.requests
+    assert request.statements is not None
+    assert not any("max(attributes.timestamp)" in statement for statement in request.statements)
+    full_statements = query_counter.count
+
+    query_counter.reset()
+    response = client.get(f"/events/{event.id}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert query_counter.count < full_statements
+
+    response = client.get(f"/events/view/{event.id}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 304
+
+    # editing an attribute does not touch the timestamp of the event
+    attribute.timestamp = datetime.fromtimestamp(1700000000)
+    await db.commit()
+
+    response = client.get(f"/events/{event.id}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    etag = response.headers["ETag"]
+
+    # removing a tag does not touch any timestamp
+    await db.delete(attributetag)
+    await db.commit()
+
+    response = client.get(f"/events/{event.id}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "Last-Modified" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_get_event_not_modified_unknown_event(site_admin_user_token, client) -> None:
+    headers = {"authorization": site_admin_user_token, "If-None-Match": "*"}
+    response = client.get("/events/0", headers=headers)
+    assert response.status_code == 404
+
+
 @pytest.mark.asyncio
 async def test_get_event_sharing_group(event_unpublished_sharing_group, site_admin_user_token, client) -> None:
     event = event_unpublished_sharing_group
@@ -227,7 +334,7 @@ async def test_update_existing_event_by_uuid(event, site_admin_user_token, clien
 
 @pytest.mark.asyncio
 async def test_update_existing_event_has_rolled_back_transaction(
-    event, site_admin_user_token, client, failing_before_save_workflow, db
+    synchronous_audit_log, event, site_admin_user_token, client, failing_before_save_workflow, db
 ) -> None:
     request_body = {"info": "updated info"}
     event_id = event.id
@@ -320,6 +427,195 @@ async def test_valid_search_attribute_data(organisation, event, attribute, site_
     assert "Event" in response_json_attribute
 
 
+def test_attribute_encoder_validates_values() -> None:
+    valid = Attribute(type="ip-src", value1="198.51.100.7", value2="")
+    invalid = Attribute(type="ip-src", value1="not an ip", value2="")
+
+    assert events._attribute_value(valid) == "198.51.100.7"
+    # rendered through the response model, which rejects the value like before
+    with pytest.raises(NotEncodable):
+        events._attribute_value(invalid)
+
+
+@pytest.mark.asyncio
+async def test_event_response_matches_response_model(
+    app, db, event, attribute_with_normal_tag, sharing_group, eventtag, site_admin_user_token, client, monkeypatch
+) -> None:
+    # rendered through the response model, because of its sharing group
+    attribute = generate_attribute(event.id)
+    attribute.comment = 'naïve "comment" ✓\n\x01'
+    attribute.distribution = AttributeDistributionLevels.SHARING_GROUP
+    attribute.sharing_group_id = sharing_group.id
+    db.add(attribute)
+    await db.commit()
+
+    encoded = []
+    encode = events._attribute_encoder.encode
+    monkeypatch.setattr(events._attribute_encoder, "encode", lambda row: encoded.append(encode(row)) or encoded[-1])
+
+    async def get_event_through_response_model(
+        auth: Annotated[Auth, Depends(authorize(AuthStrategy.HYBRID))],
+        db: Annotated[Session, Depends(get_db)],
+        event_id: int,
+    ) -> AddEditGetEventResponse:
+        event = await events._get_event(
+            event_id, db, auth.user, include_basic_event_attributes=True, include_non_galaxy_attribute_tags=True
+        )
+        assert event is not None
+        return AddEditGetEventResponse(Event=await events._prepare_event_response(db, event, auth.user))
+
+    app.add_api_route("/test/response_model/events/{event_id}", get_event_through_response_model)
+    headers = {"authorization": site_admin_user_token}
+
+    expected = client.get(f"/test/response_model/events/{event.id}", headers=headers)
+    response = client.get(f"/events/{event.id}", headers=headers)
+
+    assert expected.status_code == 200
+    assert len(expected.json()["Event"]["Attribute"]) == 2
+    assert response.content == expected.content
+    assert response.headers["content-type"] == expected.headers["content-type"]
+    assert len(encoded) == 2
+    assert sum(attribute is None for attribute in encoded) == 1
+
+    response = client.post("/events/restSearch", json={"returnFormat": "json"}, headers=headers)
+    assert response.status_code == 200
+    assert expected.content in response.content
+
+    await db.delete(attribute)
+    await db.commit()
+
+
+async def _add_event(db, organisation, site_admin_user) -> Event:
+    event = Event(
+        org_id=organisation.id,
+        orgc_id=organisation.id,
+        user_id=site_admin_user.id,
+        uuid=uuid.uuid4(),
+        sharing_group_id=0,
+        threat_level_id=1,
+        info="event with relations",
+        date=date(year=2024, month=2, day=13),
+        analysis=1,
+        distribution=EventDistributionLevels.ALL_COMMUNITIES,
+    )
+    db.add(event)
+    await db.flush()
+    return event
+
+
+async def _add_event_with_relations(db, organisation, site_admin_user, galaxy_tag) -> list:
+    event = await _add_event(db, organisation, site_admin_user)
+    eventtag = EventTag(event_id=event.id, tag_id=galaxy_tag.id, local=False)
+    event_report = EventReport(
+        event_id=event.id, name="report", content="content", distribution=0, sharing_group_id=0, timestamp=0
+    )
+    db.add_all([eventtag, event_report])
+    await db.commit()
+    return [event_report, eventtag, event]
+
+
+@pytest.mark.asyncio
+async def test_rest_search_events_query_count_independent_of_page_size(
+    db, organisation, site_admin_user, galaxy_cluster, tag, site_admin_user_token, client, query_counter
+) -> None:
+    headers = {"authorization": site_admin_user_token}
+    created = await _add_event_with_relations(db, organisation, site_admin_user, tag)
+    # warm up the authentication caches
+    client.post("/events/restSearch", json={"returnFormat": "json"}, headers=headers)
+
+    query_counter.reset()
+    response = client.post("/events/restSearch", json={"returnFormat": "json"}, headers=headers)
+    assert response.status_code == 200
+    single_event_statements = query_counter.count
+
+    for _ in range(3):
+        created += await _add_event_with_relations(db, organisation, site_admin_user, tag)
+    query_counter.reset()
+    response = client.post("/events/restSearch", json={"returnFormat": "json"}, headers=headers)
+    assert response.status_code == 200
+    assert query_counter.count == single_event_statements
+
+    rendered = [
+        entry["Event"] for entry in response.json()["response"] if entry["Event"]["info"] == "event with relations"
+    ]
+    assert len(rendered) == 4
+    for event in rendered:
+        assert event["EventReport"][0]["name"] == "report"
+        assert event["Galaxy"][0]["GalaxyCluster"][0]["tag_name"] == tag.name
+
+    for row in created:
+        await db.delete(row)
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_rest_search_events_streams_in_batches(
+    db, organisation, site_admin_user, site_admin_user_token, client, monkeypatch
+) -> None:
+    headers = {"authorization": site_admin_user_token}
+    created = [await _add_event(db, organisation, site_admin_user) for _ in range(5)]
+    await db.commit()
+    monkeypatch.setattr(config, "REST_SEARCH_BATCH_SIZE", 2)
+
+    streamed = client.post("/events/restSearch", json={"returnFormat": "json"}, headers=headers)
+    paginated = client.post("/events/restSearch", json={"returnFormat": "json", "limit": 1000}, headers=headers)
+
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"] == "application/json"
+    assert "content-length" not in streamed.headers
+    streamed_events = [entry["Event"] for entry in streamed.json()["response"]]
+    ids = [int(event["id"]) for event in streamed_events]
+    assert ids == sorted(ids)
+    assert {event.id for event in created} <= set(ids)
+    assert streamed_events == sorted(
+        [entry["Event"] for entry in paginated.json()["response"]], key=lambda event: int(event["id"])
+    )
+
+    for event in created:
+        await db.delete(event)
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_load_object_attributes_groups_by_object(db, organisation, site_admin_user) -> None:
+    event = await _add_event(db, organisation, site_admin_user)
+    misp_objects = [
+        Object(
+            name="test",
+            meta_category="network",
+            description="test",
+            template_uuid=str(uuid.uuid4()),
+            template_version=1,
+            event_id=event.id,
+            sharing_group_id=0,
+            comment="test",
+            first_seen=0,
+            last_seen=0,
+        )
+        for _ in range(3)
+    ]
+    db.add_all(misp_objects)
+    await db.flush()
+
+    object_attributes = []
+    for misp_object, count in zip(misp_objects, [2, 1, 0]):
+        for _ in range(count):
+            attribute = generate_attribute(event.id)
+            attribute.object_id = misp_object.id
+            object_attributes.append(attribute)
+    db.add_all(object_attributes)
+    await db.commit()
+
+    attributes = await events._load_object_attributes(db, misp_objects)
+
+    assert [len(attributes.get(misp_object.id, [])) for misp_object in misp_objects] == [2, 1, 0]
+    assert attributes[misp_objects[0].id][0].id < attributes[misp_objects[0].id][1].id
+
+    for row in [*object_attributes, *misp_objects, event]:
+        await db.delete(row)
+    await db.commit()
+
+
 @pytest.mark.asyncio
 async def test_invalid_search_attribute_data(site_admin_user_token, client) -> None:
     json = {"returnFormat": "invalid format"}
@@ -330,7 +626,7 @@ async def test_invalid_search_attribute_data(site_admin_user_token, client) -> N
 
 @pytest.mark.asyncio
 async def test_index_events_valid_data(organisation, event, site_admin_user_token, client) -> None:
-    json = {"distribution": 1}
+    json = {"distribution": EventDistributionLevels.ALL_COMMUNITIES}
     headers = {"authorization": site_admin_user_token}
     response = client.post("/events/index", json=json, headers=headers)
     assert response.status_code == 200
@@ -340,6 +636,27 @@ async def test_index_events_valid_data(organisation, event, site_admin_user_toke
     assert "GalaxyCluster" in response_json[0]
 
 
+@pytest.mark.asyncio
+async def test_index_events_not_modified(db, event, site_admin_user_token, client) -> None:
+    json = {"limit": 10}
+    headers = {"authorization": site_admin_user_token}
+    response = client.post("/events/index", json=json, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = client.post("/events/index", json=json, headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.post("/events/index", json={"limit": 5}, headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 200
+
+    event.timestamp = datetime.fromtimestamp(1700000000)
+    await db.commit()
+
+    response = client.post("/events/index", json=json, headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 200
+
+
 @pytest.mark.asyncio
 async def test_publish_existing_event(organisation, event, site_admin_user_token, client) -> None:
     event_id = event.id
@@ -378,7 +695,7 @@ async def test_publish_existing_event_by_uuid(organisation, event, site_admin_us
 
 @pytest.mark.asyncio
 async def test_publish_existing_event_workflow_blocked(
-    organisation, event, site_admin_user_token, client, blocking_publish_workflow, db
+    synchronous_audit_log, organisation, event, site_admin_user_token, client, blocking_publish_workflow, db
 ) -> None:
     event_id = event.id
 
@@ -421,7 +738,7 @@ async def test_publish_existing_event_workflow_blocked(
 
 @pytest.mark.asyncio
 async def test_unsupported_module_breaks_publish(
-    organisation, event, site_admin_user_token, client, unsupported_workflow, db
+    synchronous_audit_log, organisation, event, site_admin_user_token, client, unsupported_workflow, db
 ):
     event_id = event.id
 
@@ -618,3 +935,186 @@ async def test_remove_existing_tag_from_event_by_uuid(event, tag, eventtag, site
     response_json = response.json()
     assert response_json["saved"]
     assert response_json["success"] == "Tag removed"
+
+
+@pytest.mark.asyncio
+async def test_index_events_cursor_pagination(db, organisation, site_admin_user, site_admin_user_token, client) -> None:
+    headers = {"authorization": site_admin_user_token}
+    created = [await _add_event(db, organisation, site_admin_user) for _ in range(3)]
+    await db.commit()
+
+    first = client.post("/events/index", json={"limit": 2}, headers=headers | {"Origin": "https://misp.example"})
+    ids = [int(event["id"]) for event in first.json()]
+    cursor = first.headers["X-Next-Cursor"]
+    # browsers only let cross-origin clients read the exposed headers
+    exposed = first.headers["Access-Control-Expose-Headers"].split(", ")
+    assert {"x-next-cursor", "etag"} <= set(exposed)
+    while cursor is not None:
+        response = client.post("/events/index", json={"limit": 2}, headers=headers, params={"cursor": cursor})
+        assert response.status_code == 200
+        ids.extend(int(event["id"]) for event in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+
+    assert ids == sorted(ids)
+    assert {event.id for event in created} <= set(ids)
+
+    second_page = client.post("/events/index", json={"limit": 2, "page": 2}, headers=headers)
+    assert [int(event["id"]) for event in second_page.json()] == ids[2:4]
+
+    for event in created:
+        await db.delete(event)
+    await db.commit()
+
+
+@pytest_asyncio.fixture
+async def index_events(db, organisation, site_admin_user, tag):
+    alpha = await _add_event(db, organisation, site_admin_user)
+    alpha.info = "alpha index event"
+    alpha.published = True
+    alpha.threat_level_id = 1
+    alpha.timestamp = datetime.now()
+    beta = await _add_event(db, organisation, site_admin_user)
+    beta.info = "beta index event"
+    beta.published = False
+    beta.threat_level_id = 3
+    beta.date = date(year=2023, month=1, day=1)
+    beta.timestamp = datetime.fromtimestamp(1600000000)
+    await db.flush()
+
+    attribute = generate_attribute(alpha.id)
+    attribute.value1 = "198.51.100.7"
+    attribute.to_ids = True
+    domain = generate_domain_attribute(beta.id, "beta.example.com")
+    domain.value1 = "beta.example.com"
+    domain.to_ids = False
+    eventtag = EventTag(event_id=alpha.id, tag_id=tag.id, local=False)
+    db.add_all([attribute, domain, eventtag])
+    await db.flush()
+    attributetag = AttributeTag(attribute_id=domain.id, event_id=beta.id, tag_id=tag.id, local=False)
+    db.add(attributetag)
+    await db.commit()
+
+    yield {"alpha": alpha.id, "beta": beta.id}
+
+    for row in [attributetag, eventtag, domain, attribute, alpha, beta]:
+        await db.delete(row)
+    await db.commit()
+
+
+def _format_filter(value, names: dict):
+    if isinstance(value, list):
+        return [entry.format(**names) if isinstance(entry, str) else entry for entry in value]
+    if isinstance(value, str):
+        return value.format(**names)
+    return value
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({"eventinfo": "alpha index"}, {"alpha"}),
+        ({"published": False}, {"beta"}),
+        ({"threatlevel": "3"}, {"beta"}),
+        ({"datefrom": "2024-01-01"}, {"alpha"}),
+        ({"dateuntil": "2023-12-31"}, {"beta"}),
+        ({"timestamp": "7d"}, {"alpha"}),
+        ({"timestamp": [1500000000, "1650000000"]}, {"beta"}),
+        ({"attribute": "198.51.100"}, {"alpha"}),
+        ({"tags": ["!{tag_name}"]}, {"beta"}),
+        ({"tag": "{tag_id}|unknown"}, {"alpha"}),
+        ({"org": "{org}", "published": True}, {"alpha"}),
+        ({"org": "!{org}"}, set()),
+    ],
+)
+@pytest.mark.asyncio
+async def test_index_events_filters(
+    filters, expected, index_events, tag, organisation, site_admin_user_token, client
+) -> None:
+    names = {"tag_id": tag.id, "tag_name": tag.name, "org": organisation.name}
+    body = {key: _format_filter(value, names) for key, value in filters.items()}
+    headers = {"authorization": site_admin_user_token}
+    response = client.post("/events/index", json=body | {"limit": 100}, headers=headers)
+
+    assert response.status_code == 200
+    ids = {int(event["id"]) for event in response.json()}
+    assert {name for name, event_id in index_events.items() if event_id in ids} == expected
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({"eventid": "{alpha}"}, {"alpha"}),
+        ({"published": False}, {"beta"}),
+        ({"threat_level_id": 3}, {"beta"}),
+        ({"from_": "2024-01-01"}, {"alpha"}),
+        ({"to": "2023-12-31"}, {"beta"}),
+        ({"from_": "1704067200"}, {"alpha"}),
+        ({"timestamp": "1650000000"}, {"alpha"}),
+        ({"timestamp": ["2020-01-01T00:00:00+00:00", "2022-01-01T00:00:00+00:00"]}, {"beta"}),
+        ({"uuid": "{alpha_uuid}"}, {"alpha"}),
+        ({"uuid": "{domain_uuid}"}, {"beta"}),
+        ({"org": "!{org}"}, set()),
+        ({"tags": ["{tag_name}"]}, {"alpha", "beta"}),
+        ({"tags": ["!{tag_name}"]}, {"beta"}),
+        ({"tags": ["{tag_name}&&unknown"]}, set()),
+        ({"tag": "unknown|{tag_id}"}, {"alpha", "beta"}),
+        ({"event_tags": ["{tag_name}"]}, {"alpha"}),
+        ({"type": "domain"}, {"beta"}),
+        ({"type": "!domain"}, {"alpha"}),
+        ({"category": "Network activity", "value": "198.51.100.7"}, {"alpha"}),
+        ({"type": "ip-src", "value": "beta.example.com"}, set()),
+        ({"value": "%.example.com"}, {"beta"}),
+        ({"to_ids": True}, {"alpha"}),
+        ({"searchall": "beta index"}, {"beta"}),
+        ({"searchall": "198.51.100"}, {"alpha"}),
+    ],
+)
+@pytest.mark.asyncio
+async def test_rest_search_events_filters(
+    filters, expected, db, index_events, tag, organisation, site_admin_user_token, client
+) -> None:
+    alpha_uuid = (await db.execute(sa.select(Event.uuid).filter(Event.id == index_events["alpha"]))).scalar_one()
+    domain_uuid = (
+        await db.execute(sa.select(Attribute.uuid).filter(Attribute.event_id == index_events["beta"]))
+    ).scalar_one()
+    names = {
+        "alpha": index_events["alpha"],
+        "alpha_uuid": alpha_uuid,
+        "domain_uuid": domain_uuid,
+        "tag_id": tag.id,
+        "tag_name": tag.name,
+        "org": organisation.name,
+    }
+    body = {key: _format_filter(value, names) for key, value in filters.items()}
+    headers = {"authorization": site_admin_user_token}
+    response = client.post("/events/restSearch", json=body | {"returnFormat": "json"}, headers=headers)
+
+    assert response.status_code == 200
+    ids = {int(entry["Event"]["id"]) for entry in response.json()["response"]}
+    assert {name for name, event_id in index_events.items() if event_id in ids} == expected
+
+
+@pytest.mark.asyncio
+async def test_rest_search_events_invalid_uuid(site_admin_user_token, client) -> None:
+    headers = {"authorization": site_admin_user_token}
+    response = client.post("/events/restSearch", json={"returnFormat": "json", "uuid": "alpha"}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_index_events_loads_only_rendered_relations(index_events, site_admin_user_token, client, query_counter):
+    headers = {"authorization": site_admin_user_token}
+    response = client.post("/events/index", json={"eventinfo": "index event"}, headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    statements = " ".join(query_counter.requests[-1].statements)
+    assert "FROM attributes" not in statements
+    assert "FROM objects" not in statements
+
+
+@pytest.mark.asyncio
+async def test_index_events_invalid_date(site_admin_user_token, client) -> None:
+    headers = {"authorization": site_admin_user_token}
+    response = client.post("/events/index", json={"datefrom": "yesterday"}, headers=headers)
+    assert response.status_code == 400
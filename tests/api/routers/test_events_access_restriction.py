@@ -2,7 +2,10 @@ import pytest
 from deepdiff import DeepDiff
 from icecream import ic
 
+from mmisp.db.models.attribute import AttributeTag
 from mmisp.tests.maps import (
+    access_test_objects_user_attribute_access_expect_denied,
+    access_test_objects_user_attribute_access_expect_granted,
     access_test_objects_user_event_access_expect_denied,
     access_test_objects_user_event_access_expect_granted,
     access_test_objects_user_event_publish_expect_denied,
@@ -10,6 +13,22 @@ from mmisp.tests.maps import (
     user_to_events,
 )
 
+# one hidden attribute of a visible event per user, whose value is no part of the value of a visible attribute
+hidden_attribute_by_user = {
+    user: attribute
+    for user, attribute in reversed(access_test_objects_user_attribute_access_expect_denied)
+    if any(
+        attribute.startswith(event.replace("event", "attribute", 1) + "_")
+        for event_user, event in access_test_objects_user_event_access_expect_granted
+        if event_user == user
+    )
+    and not any(
+        attribute in visible
+        for visible_user, visible in access_test_objects_user_attribute_access_expect_granted
+        if visible_user == user
+    )
+}
+
 
 @pytest.mark.parametrize("user_key, event_key", access_test_objects_user_event_access_expect_denied)
 @pytest.mark.asyncio
@@ -32,6 +51,10 @@ async def test_get_event_success(access_test_objects, user_key, event_key, clien
     response_json = response.json()
     assert response_json["Event"]["id"] == event_id
 
+    # the version query sees the same attributes as the user
+    response = client.get(f"/events/{event_id}", headers=headers | {"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
 
 @pytest.mark.parametrize("user_key, events", user_to_events)
 @pytest.mark.asyncio
@@ -50,6 +73,49 @@ async def test_get_all_events(access_test_objects, user_key, events, client) ->
     assert diff == {}
 
 
+@pytest.mark.parametrize("user_key, events", user_to_events)
+@pytest.mark.asyncio
+async def test_index_events(access_test_objects, user_key, events, client) -> None:
+    headers = {"authorization": access_test_objects[f"{user_key}_token"]}
+    response = client.post("/events/index", json={"limit": 499}, headers=headers)
+
+    assert response.status_code == 200
+    event_keys = [event["info"] for event in response.json()]
+    assert DeepDiff(events, event_keys, ignore_order=True) == {}
+
+
+@pytest.mark.parametrize("user_key, attribute_key", sorted(hidden_attribute_by_user.items()))
+@pytest.mark.asyncio
+async def test_index_events_attribute_filter_ignores_hidden_attributes(
+    access_test_objects, user_key, attribute_key, client
+) -> None:
+    headers = {"authorization": access_test_objects[f"{user_key}_token"]}
+    response = client.post("/events/index", json={"attribute": attribute_key}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@pytest.mark.parametrize("user_key, attribute_key", sorted(hidden_attribute_by_user.items()))
+@pytest.mark.asyncio
+async def test_rest_search_tag_filter_ignores_tags_of_hidden_attributes(
+    db, access_test_objects, tag, user_key, attribute_key, client
+) -> None:
+    attribute = access_test_objects[attribute_key]
+    attribute_tag = AttributeTag(attribute_id=attribute.id, event_id=attribute.event_id, tag_id=tag.id, local=False)
+    db.add(attribute_tag)
+    await db.commit()
+
+    headers = {"authorization": access_test_objects[f"{user_key}_token"]}
+    response = client.post("/events/restSearch", json={"returnFormat": "json", "tags": [tag.name]}, headers=headers)
+
+    await db.delete(attribute_tag)
+    await db.commit()
+
+    assert response.status_code == 200
+    assert response.json()["response"] == []
+
+
 # @pytest.mark.asyncio
 # async def test_valid_search_attribute_data_read_only_user(access_test_objects, client) -> None:
 #    headers = {"authorization": access_test_objects["default_read_only_user_token"]}
@@ -35,6 +35,66 @@ async def test_logs_noresult(site_admin_user_token, client, log_entry, db) -> No
     assert len(json_dict) == 0
 
 
+@pytest.mark.asyncio
+async def test_logs_index_cursor_pagination(site_admin_user_token, client, log_entries) -> None:
+    headers = {"authorization": site_admin_user_token}
+    params = {"model": "Workflow", "limit": 2}
+
+    ids = []
+    cursor = None
+    while True:
+        response = client.get("/logs/index", headers=headers, params=params | ({"cursor": cursor} if cursor else {}))
+        assert response.status_code == 200
+        assert ("X-Result-Count" in response.headers) == (cursor is None)
+        ids.extend(int(entry["Log"]["id"]) for entry in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert ids == sorted([log.id for log in log_entries], reverse=True)
+
+    response = client.post("/logs/index", headers=headers, json={"model": "Workflow", "limit": 2, "page": 3})
+    assert response.headers["X-Result-Count"] == "5"
+    assert [int(entry["Log"]["id"]) for entry in response.json()] == ids[4:]
+
+
+@pytest.mark.asyncio
+async def test_logs_index_rejects_cursor_of_other_endpoint(site_admin_user_token, client, event) -> None:
+    headers = {"authorization": site_admin_user_token}
+    response = client.post("/events/index", headers=headers, json={"limit": 1})
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get("/logs/index", headers=headers, params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+@pytest_asyncio.fixture()
+async def log_entries(db: Session):
+    await db.execute(sa.delete(Log))
+    await db.commit()
+    logs = [
+        Log(
+            model="Workflow",
+            model_id=12345678,
+            action="action",
+            user_id=1,
+            email="admin@admin.test",
+            org="awhlud",
+            change="data(a -> b)",
+            ip="127.000.000.1",
+        )
+        for _ in range(5)
+    ]
+    db.add_all(logs)
+    await db.commit()
+
+    yield logs
+
+    for log in logs:
+        await db.delete(log)
+    await db.commit()
+
+
 @pytest_asyncio.fixture()
 async def log_entry(db: Session):
     # Ensure clean slate, other tests also log and there's
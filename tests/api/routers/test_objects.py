@@ -213,6 +213,33 @@ async def test_get_object_details_valid_id(
     await delete_attributes_from_object_resp(db, response.json())
 
 
+@pytest.mark.asyncio
+async def test_get_object_details_not_modified(
+    object_data: dict[str, Any], db: AsyncSession, object_template, event, site_admin_user_token, client
+) -> None:
+    object_data["event_id"] = event.id
+    headers = {"authorization": site_admin_user_token}
+    response = client.post(f"/objects/{event.id}/{object_template.id}", json=object_data, headers=headers)
+    assert response.status_code == 201
+    object_id = response.json()["Object"]["id"]
+
+    response = client.get(f"/objects/{object_id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/objects/view/{object_id}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 304
+
+    await db.execute(sa.text("UPDATE objects SET timestamp = timestamp + 60 WHERE id = :id"), {"id": object_id})
+    await db.commit()
+
+    response = client.get(f"/objects/{object_id}", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    await delete_attributes_from_object_resp(db, response.json())
+
+
 @pytest.mark.asyncio
 async def test_get_object_details_response_format(
     object_data: dict[str, Any],
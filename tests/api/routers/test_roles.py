@@ -2,6 +2,7 @@ import pytest
 from sqlalchemy import delete
 from sqlalchemy.future import select
 
+from mmisp.api.auth import principal_cache, user_login_allowed
 from mmisp.db.models.role import Role
 from mmisp.lib.permissions import Permission
 from mmisp.lib.settings import get_admin_setting, set_admin_setting
@@ -319,6 +320,20 @@ async def test_update_role_success(client, site_admin_user_token, random_test_ro
     assert response_json["Role"]["perm_view_feed_correlations"] is False
 
 
+@pytest.mark.asyncio
+async def test_update_role_invalidates_principal_cache(
+    client, site_admin_user_token, random_test_role, random_test_user, db
+):
+    await user_login_allowed(db, random_test_user.id, True)
+    assert principal_cache.get(random_test_user.id) is not None
+
+    headers = {"authorization": site_admin_user_token}
+    response = client.put("/admin/roles/edit/42", json={"perm_add": True}, headers=headers)
+
+    assert response.status_code == 200
+    assert principal_cache.get(random_test_user.id) is None
+
+
 @pytest.mark.asyncio
 async def test_update_role_not_found(client, site_admin_user_token):
     headers = {"authorization": site_admin_user_token}
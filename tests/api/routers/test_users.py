@@ -508,3 +508,20 @@ async def test_users_view_all_unauthorized(db: Session, read_only_user_token, cl
     response = client.get("/users/view/all", headers=headers)
 
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates_cached_principal(
+    site_admin_user_token, read_only_user_token, client, view_only_user
+) -> None:
+    user_headers = {"authorization": read_only_user_token}
+    assert client.get("/users/view/me", headers=user_headers).status_code == 200
+
+    response = client.put(
+        f"/users/{view_only_user.id}", headers={"authorization": site_admin_user_token}, json={"disabled": True}
+    )
+    assert response.status_code == 200
+
+    response = client.get("/users/view/me", headers=user_headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "User has been disabled"
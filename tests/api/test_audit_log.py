@@ -0,0 +1,57 @@
+import pytest
+import sqlalchemy as sa
+
+from mmisp.api.audit_log import AuditLogWriter
+from mmisp.db.models.log import Log
+
+
+def _log_entry(title: str) -> Log:
+    return Log(
+        title=title,
+        model="AuditLogTest",
+        model_id=0,
+        action="test",
+        user_id=0,
+        email="SYSTEM",
+        org="SYSTEM",
+        description="",
+        change="",
+        ip="",
+    )
+
+
+async def _titles(db) -> list[str]:
+    result = await db.execute(sa.select(Log.title).where(Log.model == "AuditLogTest").order_by(Log.id))
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_audit_log_writer_writes_batches_on_stop(db) -> None:
+    writer = AuditLogWriter(queue_size=100, batch_size=2)
+    writer.start()
+
+    await writer.enqueue([_log_entry(f"entry {i}") for i in range(5)])
+    await writer.stop()
+
+    assert writer.pending() == 0
+    assert writer.written == 5
+    assert writer.batches >= 3
+    assert await _titles(db) == [f"entry {i}" for i in range(5)]
+
+    await db.execute(sa.delete(Log).where(Log.model == "AuditLogTest"))
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_audit_log_writer_without_queue_writes_immediately(db) -> None:
+    writer = AuditLogWriter(queue_size=0, batch_size=10)
+    writer.start()
+
+    await writer.enqueue([_log_entry("immediate")])
+
+    assert writer.written == 1
+    assert await _titles(db) == ["immediate"]
+
+    await writer.stop()
+    await db.execute(sa.delete(Log).where(Log.model == "AuditLogTest"))
+    await db.commit()
@@ -5,18 +5,31 @@ import pytest
 from fastapi import HTTPException
 from icecream import ic
 
+from mmisp.api import auth as auth_module
 from mmisp.api.auth import (
     Auth,
     AuthStrategy,
     Permission,
+    Principal,
+    api_key_cache,
+    auth_cache_statistics,
+    auth_key_prefix_filter,
     authorize,
     check_permissions,
     decode_exchange_token,
     encode_exchange_token,
     encode_token,
+    invalidate_api_key_cache,
+    invalidate_principal_cache,
+    invalidate_principal_cache_on_commit,
+    permission_mask,
+    principal_cache,
+    rejected_token_cache,
+    role_permission_mask,
 )
 from mmisp.api.config import config
-from mmisp.db.database import get_db
+from mmisp.db.database import Session, get_db
+from mmisp.db.models.role import Role
 
 
 @pytest.mark.asyncio
@@ -292,3 +305,211 @@ async def test_authorize_all_strategy_with_jwt(db, site_admin_user_token, site_a
     assert not auth.is_worker
 
     ["" async for _ in it_db]
+
+
+@pytest.mark.asyncio
+async def test_authorize_auth_key_cache_skips_verification(db, site_admin_user, auth_key, monkeypatch) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    clear_key, auth_key = auth_key
+
+    auth: Auth | Any = await authorize(AuthStrategy.API_KEY)(db=adb, authorization=clear_key)
+    assert auth.auth_key_id == auth_key.id
+
+    async def fail_verify(*args) -> bool:
+        pytest.fail("verify_secret called on cache hit")
+
+    monkeypatch.setattr("mmisp.api.auth.verify_secret", fail_verify)
+
+    auth = await authorize(AuthStrategy.API_KEY)(db=adb, authorization=clear_key)
+    assert auth.user_id == site_admin_user.id
+    assert auth.auth_key_id == auth_key.id
+
+    ["" async for _ in it_db]
+
+
+@pytest.mark.asyncio
+async def test_authorize_auth_key_cache_respects_expiration(db, auth_key) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    clear_key, auth_key = auth_key
+
+    await authorize(AuthStrategy.API_KEY)(db=adb, authorization=clear_key)
+    assert len(api_key_cache) == 1
+
+    invalidate_api_key_cache(auth_key_id=auth_key.id)
+    assert len(api_key_cache) == 0
+
+    auth_key.expiration = time() - 10
+    await db.commit()
+
+    with pytest.raises(HTTPException):
+        await authorize(AuthStrategy.API_KEY)(db=adb, authorization=clear_key)
+
+    ["" async for _ in it_db]
+
+
+@pytest.mark.asyncio
+async def test_authorize_rejected_token_is_cached(db, monkeypatch) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    rejections = auth_key_prefix_filter.rejections
+    with pytest.raises(HTTPException):
+        await authorize(AuthStrategy.HYBRID)(db=adb, authorization="invalid_key")
+    assert auth_key_prefix_filter.rejections == rejections + 1
+
+    async def fail_might_match(*args) -> bool:
+        pytest.fail("rejected token checked again")
+
+    monkeypatch.setattr(auth_key_prefix_filter, "might_match", fail_might_match)
+
+    hits = rejected_token_cache.hits
+    with pytest.raises(HTTPException):
+        await authorize(AuthStrategy.HYBRID)(db=adb, authorization="invalid_key")
+    assert rejected_token_cache.hits == hits + 1
+
+    ["" async for _ in it_db]
+
+
+@pytest.mark.asyncio
+async def test_authorize_unknown_key_prefix_skips_verification(db, auth_key, monkeypatch) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    clear_key, _ = auth_key
+
+    async def fail_verify(*args) -> bool:
+        pytest.fail("verify_secret called for unknown key prefix")
+
+    monkeypatch.setattr("mmisp.api.auth.verify_secret", fail_verify)
+
+    rejections = auth_key_prefix_filter.rejections
+    with pytest.raises(HTTPException):
+        await authorize(AuthStrategy.API_KEY)(db=adb, authorization="x" + clear_key[1:-1] + "x")
+    assert auth_cache_statistics()["auth_key_prefix_filter"]["rejections"] == rejections + 1
+
+    ["" async for _ in it_db]
+
+
+@pytest.mark.asyncio
+async def test_authorize_principal_cache_skips_database(
+    db, site_admin_user_token, site_admin_user, monkeypatch
+) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    await authorize(AuthStrategy.JWT)(db=adb, authorization=site_admin_user_token)
+    assert principal_cache.get(site_admin_user.id) is not None
+
+    async def fail_load(*args) -> None:
+        pytest.fail("principal loaded from the database on cache hit")
+
+    monkeypatch.setattr("mmisp.api.auth._load_principal", fail_load)
+
+    auth: Auth | Any = await authorize(AuthStrategy.JWT, [Permission.SITE_ADMIN])(
+        db=adb, authorization=site_admin_user_token
+    )
+    assert auth.user_id == site_admin_user.id
+    assert auth.org_id == site_admin_user.org_id
+    assert auth.role_id == site_admin_user.role_id
+    assert auth.user.role.perm_site_admin
+
+    ["" async for _ in it_db]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_principal_cache(db, site_admin_user_token, site_admin_user) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    await authorize(AuthStrategy.JWT)(db=adb, authorization=site_admin_user_token)
+
+    invalidate_principal_cache(org_id=site_admin_user.org_id + 1000)
+    assert principal_cache.get(site_admin_user.id) is not None
+
+    invalidate_principal_cache(role_id=site_admin_user.role_id)
+    assert principal_cache.get(site_admin_user.id) is None
+
+    ["" async for _ in it_db]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_principal_cache_on_commit(db, site_admin_user_token, site_admin_user) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    await authorize(AuthStrategy.JWT)(db=adb, authorization=site_admin_user_token)
+
+    invalidate_principal_cache_on_commit(adb, user_id=site_admin_user.id)
+    await adb.rollback()
+    assert principal_cache.get(site_admin_user.id) is not None
+
+    invalidate_principal_cache_on_commit(adb, user_id=site_admin_user.id)
+    assert principal_cache.get(site_admin_user.id) is not None
+    await adb.commit()
+    assert principal_cache.get(site_admin_user.id) is None
+
+    ["" async for _ in it_db]
+
+
+@pytest.mark.asyncio
+async def test_principal_loaded_across_invalidation_is_not_cached(
+    db, site_admin_user_token, site_admin_user, monkeypatch
+) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+    load_principal = auth_module._load_principal
+
+    async def load_during_commit(db: Session, user_id: int) -> Principal | None:
+        principal = await load_principal(db, user_id)
+        invalidate_principal_cache(user_id=user_id)
+        return principal
+
+    invalidate_principal_cache(user_id=site_admin_user.id)
+    monkeypatch.setattr("mmisp.api.auth._load_principal", load_during_commit)
+    auth: Auth | Any = await authorize(AuthStrategy.JWT)(db=adb, authorization=site_admin_user_token)
+
+    assert auth.user_id == site_admin_user.id
+    assert principal_cache.get(site_admin_user.id) is None
+
+    ["" async for _ in it_db]
+
+
+@pytest.mark.asyncio
+async def test_role_permission_mask(site_admin_user) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    role = await adb.get(Role, site_admin_user.role_id)
+    mask = role_permission_mask(role)
+
+    for permission in Permission:
+        assert bool(mask & permission_mask([permission])) == (permission in role.get_permissions())
+
+    ["" async for _ in it_db]
+
+
+def test_role_permission_mask_reads_mapped_columns() -> None:
+    role = Role(name="test", perm_add=True, perm_sync=True)
+
+    assert role_permission_mask(role) == permission_mask([Permission.ADD, Permission.SYNC])
+
+
+@pytest.mark.asyncio
+async def test_authorize_does_not_modify_required_permissions(db, auth_key) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    clear_key, _ = auth_key
+    permissions = [Permission.ADD]
+
+    authorizer = authorize(AuthStrategy.API_KEY, permissions)
+    await authorizer(db=adb, authorization=clear_key)
+    await authorizer(db=adb, authorization=clear_key)
+
+    assert permissions == [Permission.ADD]
+
+    ["" async for _ in it_db]
@@ -0,0 +1,58 @@
+from time import time
+
+import pytest
+
+from mmisp.api.auth import AuthStrategy, authorize
+from mmisp.api.bookkeeping import AccessTimestampBuffer, access_timestamps
+from mmisp.db.database import get_db
+
+
+def test_access_timestamp_buffer_coalesces_updates() -> None:
+    buffer = AccessTimestampBuffer(interval=0)
+
+    buffer.record_api_access(1, 100)
+    buffer.record_api_access(1, 300)
+    buffer.record_api_access(1, 200)
+    buffer.record_login(1, 100)
+    buffer.record_api_access(2, 100)
+
+    assert buffer.pending() == 3
+    assert buffer._pending["last_api_access"] == {1: 300, 2: 100}
+
+
+@pytest.mark.asyncio
+async def test_access_timestamp_buffer_flush(db, site_admin_user) -> None:
+    buffer = AccessTimestampBuffer(interval=0)
+    now = int(time())
+
+    buffer.record_api_access(site_admin_user.id, now + 10)
+    buffer.record_login(site_admin_user.id, now + 10)
+
+    assert await buffer.flush() == 2
+    assert buffer.pending() == 0
+
+    await db.refresh(site_admin_user)
+    assert site_admin_user.last_api_access == now + 10
+    assert site_admin_user.last_login == now + 10
+
+    buffer.record_api_access(site_admin_user.id, now - 20)
+    await buffer.flush()
+
+    await db.refresh(site_admin_user)
+    assert site_admin_user.last_api_access == now + 10
+
+
+@pytest.mark.asyncio
+async def test_authorize_auth_key_records_api_access(db, site_admin_user, auth_key) -> None:
+    it_db = get_db()
+    adb = await anext(it_db)
+
+    clear_key, _ = auth_key
+    access_timestamps.clear()
+
+    await authorize(AuthStrategy.API_KEY)(db=adb, authorization=clear_key)
+
+    assert site_admin_user.id in access_timestamps._pending["last_api_access"]
+
+    access_timestamps.clear()
+    ["" async for _ in it_db]
@@ -0,0 +1,54 @@
+from datetime import datetime
+from decimal import Decimal
+
+from starlette.requests import Request
+
+from mmisp.api.conditional import Validators, conditional_request, maximum
+
+
+def _request(**headers: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+        }
+    )
+
+
+def test_validators_depend_on_version_and_kind() -> None:
+    validators = Validators.of(None, "event", [1, datetime.fromtimestamp(1700000000)])
+
+    assert validators.etag.startswith('W/"')
+    assert validators.etag == Validators.of(None, "event", [1, 1700000000]).etag
+    assert validators.etag != Validators.of(None, "event", [1, 1700000001]).etag
+    assert validators.etag != Validators.of(None, "attribute", [1, 1700000000]).etag
+    assert validators.etag == Validators.of(None, "event", [Decimal(1), 1700000000]).etag
+    assert validators.headers == {"ETag": validators.etag}
+
+
+def test_validators_match_if_none_match() -> None:
+    validators = Validators.of(None, "event", [1])
+    strong = validators.etag.removeprefix("W/")
+
+    assert validators.matches(_request(if_none_match=validators.etag))
+    assert validators.matches(_request(if_none_match=f'"other", {strong}'))
+    assert validators.matches(_request(if_none_match="*"))
+    assert not validators.matches(_request(if_none_match='W/"other"'))
+    assert not validators.matches(_request())
+
+
+def test_if_modified_since_is_ignored() -> None:
+    validators = Validators.of(None, "event", [1])
+    request = _request(if_modified_since="Tue, 14 Nov 2023 22:13:20 GMT")
+
+    assert not conditional_request(request)
+    assert not validators.matches(request)
+    assert conditional_request(_request(if_none_match="*"))
+
+
+def test_maximum_ignores_none() -> None:
+    assert maximum([None, 3, 1]) == 3
+    assert maximum([None]) is None
+    assert maximum([]) is None
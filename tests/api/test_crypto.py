@@ -0,0 +1,52 @@
+import asyncio
+from threading import Event
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from starlette.testclient import TestClient
+
+from mmisp.api.crypto import HashingExecutor, hash_secret, hashing_executor, verify_secret
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_secret() -> None:
+    secret_hash = await hash_secret("test secret")
+
+    assert await verify_secret("test secret", secret_hash)
+    assert not await verify_secret("wrong secret", secret_hash)
+
+
+@pytest.mark.asyncio
+async def test_hashing_executor_rejects_when_full() -> None:
+    executor = HashingExecutor(threads=1, queue_size=1)
+    release = Event()
+
+    def blocking(value: str) -> str:
+        release.wait(5)
+        return value
+
+    running = [asyncio.create_task(executor.run(blocking, str(i))) for i in range(2)]
+    await asyncio.sleep(0)
+    assert executor.in_flight == 2
+
+    with pytest.raises(HTTPException) as exception_info:
+        await executor.run(blocking, "rejected")
+
+    assert exception_info.value.status_code == 503
+    assert exception_info.value.headers == {"Retry-After": "1"}
+    assert executor.rejected == 1
+
+    release.set()
+    assert await asyncio.gather(*running) == ["0", "1"]
+    assert executor.in_flight == 0
+
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hashing_executor_is_shut_down_with_the_app(app: FastAPI) -> None:
+    with TestClient(app):
+        assert await hashing_executor.run(str.upper, "secret") == "SECRET"
+        assert hashing_executor._executor is not None
+
+    assert hashing_executor._executor is None
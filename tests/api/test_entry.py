@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from mmisp.api.config import Runner, config
+from mmisp.api.entry import available_cores, main, worker_count
+
+
+def test_worker_count_default() -> None:
+    assert type(config).model_fields["WORKER_COUNT"].default == 4
+
+
+def test_worker_count_configured(monkeypatch) -> None:
+    monkeypatch.setattr(config, "WORKER_COUNT", 3)
+
+    assert worker_count() == 3
+
+
+def test_worker_count_from_available_cores(monkeypatch) -> None:
+    monkeypatch.setattr(config, "WORKER_COUNT", 0)
+
+    assert worker_count() == available_cores()
+    assert 1 <= available_cores() <= (os.cpu_count() or 1)
+
+
+def test_uvicorn_refuses_recycling(monkeypatch) -> None:
+    monkeypatch.setattr(config, "RUNNER", Runner.UVICORN)
+    monkeypatch.setattr(config, "WORKER_MAX_REQUESTS", 1000)
+
+    with pytest.raises(SystemExit, match="uvicorn does not replace recycled workers"):
+        main()
@@ -0,0 +1,101 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from mmisp.api.event_filters import (
+    SearchEventsFilterBody,
+    index_events_filters,
+    parse_date,
+    parse_timestamp,
+    rest_search_events_filters,
+    split_values,
+    tag_filters,
+)
+from mmisp.api_schemas.events import IndexEventsBody, SearchEventsBody
+
+
+def test_split_values() -> None:
+    assert split_values("tlp:white|!tlp:red| 5 |!") == (["tlp:white", "5"], ["tlp:red"])
+    assert split_values(["a", "!b"]) == (["a"], ["b"])
+    assert split_values(None) == ([], [])
+
+
+def test_tag_filters_are_semi_joins() -> None:
+    included, excluded = [str(condition) for condition in tag_filters("7|tlp:%|!tlp:red", None)]
+
+    assert included.startswith("events.id IN (SELECT event_tags.event_id")
+    assert "tags.name LIKE" in included
+    assert "tags.id IN" in included
+    assert excluded.startswith("(events.id NOT IN (SELECT event_tags.event_id")
+
+
+def test_tag_filters_require_all_tags_joined_with_and() -> None:
+    (condition,) = tag_filters(["tlp:white&&osint", "tlp:green"], None, attribute_tags=True)
+
+    assert str(condition).count("SELECT event_tags.event_id") == 3
+    assert str(condition).count("SELECT attribute_tags.event_id") == 3
+    # the tags of attributes only count if the user can access the attribute
+    assert str(condition).count("JOIN attributes ON attributes.id = attribute_tags.attribute_id") == 3
+
+
+def test_index_events_filters_without_filters() -> None:
+    assert index_events_filters(IndexEventsBody(page=2, limit=10), None) == []
+
+
+def test_index_events_filters_reject_invalid_values() -> None:
+    with pytest.raises(HTTPException) as exception:
+        index_events_filters(IndexEventsBody(threatlevel="high"), None)
+
+    assert exception.value.status_code == 400
+
+
+def test_rest_search_events_filters_without_filters() -> None:
+    body = SearchEventsBody(returnFormat="json", page=1, limit=10, metadata=True, includeContext=True)
+    assert rest_search_events_filters(body, None) == []
+
+
+def test_rest_search_events_filters_match_attributes_once() -> None:
+    body = SearchEventsBody(returnFormat="json", type="ip-src|!domain", category="Network activity", value="1.2.%")
+
+    (condition,) = [str(condition) for condition in rest_search_events_filters(body, None)]
+
+    assert condition.count("SELECT attributes.event_id") == 1
+    assert "attributes.value1 LIKE" in condition
+    assert "attributes.deleted IS false" in condition
+
+
+def test_rest_search_events_filters_reject_invalid_values() -> None:
+    for body in [SearchEventsBody(returnFormat="json", uuid="1"), SearchEventsBody(returnFormat="json", to="today")]:
+        with pytest.raises(HTTPException) as exception:
+            rest_search_events_filters(body, None)
+
+        assert exception.value.status_code == 400
+
+
+def test_parse_timestamps_and_dates() -> None:
+    assert parse_timestamp(1700000000, "timestamp") == datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc)
+    assert parse_timestamp("1700000000", "timestamp") == parse_timestamp(1700000000, "timestamp")
+    assert parse_timestamp("2023-11-14T22:13:20+00:00", "timestamp") == parse_timestamp(1700000000, "timestamp")
+    assert abs((datetime.now(timezone.utc) - parse_timestamp("7d", "timestamp")).days - 7) <= 1
+    assert parse_date("1700000000", "from") == parse_date("2023-11-14", "from") == date(2023, 11, 14)
+
+
+def test_timestamp_ranges() -> None:
+    body = SearchEventsFilterBody(returnFormat="json", timestamp=[1600000000, "1d"], publish_timestamp="1700000000")
+
+    conditions = [str(condition) for condition in rest_search_events_filters(body, None)]
+
+    assert conditions == [
+        "events.timestamp >= :timestamp_1",
+        "events.timestamp <= :timestamp_1",
+        "events.publish_timestamp >= :publish_timestamp_1",
+    ]
+
+
+@pytest.mark.parametrize("timestamp", ["soon", [1, 2, 3], "7y"])
+def test_timestamp_filters_reject_invalid_values(timestamp) -> None:
+    with pytest.raises(HTTPException) as exception:
+        rest_search_events_filters(SearchEventsFilterBody(returnFormat="json", timestamp=timestamp), None)
+
+    assert exception.value.status_code == 400
@@ -0,0 +1,42 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_explain_request(event, site_admin_user_token, client) -> None:
+    headers = {"authorization": site_admin_user_token}
+
+    response = client.get(f"/events/{event.id}", params={"explain": "1"}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["x-explain-summary"].startswith("statements=")
+    explain_id = response.headers["x-explain-id"]
+
+    response = client.get(f"/explain/{explain_id}", headers=headers)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["path"] == f"/events/{event.id}"
+    assert report["statements"]
+    statement = report["statements"][0]
+    assert statement["statement"].startswith("SELECT")
+    assert statement["duration_ms"] >= 0
+    assert any(statement["plan"] for statement in report["statements"])
+
+
+@pytest.mark.asyncio
+async def test_explain_request_no_permission(event, read_only_user_token, client) -> None:
+    response = client.get(
+        f"/events/{event.id}", params={"explain": "1"}, headers={"authorization": read_only_user_token}
+    )
+
+    assert "x-explain-id" not in response.headers
+
+
+def test_get_explain_report_unknown(site_admin_user_token, client) -> None:
+    response = client.get("/explain/unknown", headers={"authorization": site_admin_user_token})
+    assert response.status_code == 404
+
+
+def test_get_explain_report_no_permission(read_only_user_token, client) -> None:
+    response = client.get("/explain/unknown", headers={"authorization": read_only_user_token})
+    assert response.status_code == 403
@@ -0,0 +1,188 @@
+from collections.abc import AsyncIterator
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from starlette.requests import ClientDisconnect
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.types import Message
+
+from mmisp.api.json_encoder import (
+    RawJSON,
+    RowEncoder,
+    boolean,
+    canonical_uuid,
+    choice,
+    column,
+    dumps,
+    epoch,
+    integer,
+    json_array_response,
+    json_response,
+    optional_string,
+)
+from mmisp.lib.distribution import AttributeDistributionLevels
+
+
+class Item(BaseModel):
+    id: int
+    uuid: str
+    comment: str | None = None
+    published: bool
+    distribution: AttributeDistributionLevels
+    timestamp: int
+
+
+def _encoder() -> RowEncoder:
+    return RowEncoder(
+        Item,
+        {
+            "id": integer(column("id")),
+            "uuid": canonical_uuid(column("uuid")),
+            "comment": optional_string(column("comment")),
+            "published": boolean(column("published")),
+            "distribution": choice(column("distribution"), AttributeDistributionLevels),
+            "timestamp": epoch(column("timestamp")),
+        },
+    )
+
+
+def _row(**overrides: object) -> SimpleNamespace:
+    values: dict[str, object] = {
+        "id": 1,
+        "uuid": "da4b7a8d-d314-42e8-9c85-2eb476e90dbf",
+        "comment": 'naïve "comment" ✓\n\x01 ',
+        "published": True,
+        "distribution": 4,
+        "timestamp": datetime.fromtimestamp(1700000000),
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_row_encoder_matches_json_response() -> None:
+    row = _row()
+    expected = JSONResponse({**Item(**{**row.__dict__, "timestamp": 1700000000}).model_dump(mode="json")}).body
+
+    assert _encoder().encode(row) == expected.decode()
+
+
+def test_row_encoder_reports_values_it_cannot_encode() -> None:
+    encoder = _encoder()
+
+    assert encoder.encode(_row(id=True)) is None
+    assert encoder.encode(_row(uuid="DA4B7A8D-D314-42E8-9C85-2EB476E90DBF")) is None
+    assert encoder.encode(_row(distribution=9)) is None
+    assert encoder.encode(_row(published=1)) is None
+    assert encoder.encode(SimpleNamespace(id=1)) is None
+
+
+def test_row_encoder_is_disabled_for_incomplete_encoders() -> None:
+    encoder = RowEncoder(Item, {"id": integer(column("id"))})
+
+    assert not encoder.enabled
+    assert encoder.encode(_row()) is None
+
+
+def test_dumps_embeds_raw_json() -> None:
+    content = {"Event": {"info": 'ü"', "Attribute": RawJSON.array(['{"id":1}', '{"id":2}']), "Tag": [None, 1.5]}}
+
+    assert dumps(content) == '{"Event":{"info":"ü\\"","Attribute":[{"id":1},{"id":2}],"Tag":[null,1.5]}}'
+    assert json_response({"a": [1, "ü"]}).body == JSONResponse({"a": [1, "ü"]}).body
+
+
+async def _batches(*batches: list) -> AsyncIterator[list]:
+    for batch in batches:
+        yield batch
+
+
+async def _streamed(response: StreamingResponse) -> list[bytes]:
+    return [chunk async for chunk in response.body_iterator]  # type:ignore[misc]
+
+
+@pytest.mark.asyncio
+async def test_json_array_response_streams_batches() -> None:
+    response = await json_array_response("response", _batches([{"id": 1}, RawJSON('{"id":2}')], [], [{"id": 3}]))
+    chunks = await _streamed(response)
+
+    assert response.media_type == "application/json"
+    assert chunks == [b'{"response":[{"id":1},{"id":2}', b',{"id":3}', b"]}"]
+    assert b"".join(chunks) == json_response({"response": [{"id": 1}, {"id": 2}, {"id": 3}]}).body
+
+
+@pytest.mark.asyncio
+async def test_json_array_response_without_items() -> None:
+    assert await _streamed(await json_array_response("response", _batches())) == [b'{"response":[]}']
+
+
+async def _failing_batches(*batches: list) -> AsyncIterator[list]:
+    for batch in batches:
+        yield batch
+    raise RuntimeError("rendering failed")
+
+
+def test_json_array_response_error_in_first_batch() -> None:
+    app = FastAPI()
+
+    @app.get("/items")
+    async def get_items() -> Response:
+        return await json_array_response("response", _failing_batches())
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        response = client.get("/items")
+
+    assert response.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_json_array_response_error_after_first_batch(caplog) -> None:
+    response = await json_array_response("response", _failing_batches([{"id": 1}]))
+
+    with pytest.raises(RuntimeError, match="rendering failed"):
+        await _streamed(response)
+    assert "it is truncated" in caplog.text
+
+
+async def _closing_batches(closed: list[bool], *batches: list) -> AsyncIterator[list]:
+    try:
+        for batch in batches:
+            yield batch
+    finally:
+        closed.append(True)
+
+
+async def _receive() -> Message:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+@pytest.mark.asyncio
+async def test_json_array_response_closes_batches_when_sent() -> None:
+    closed: list[bool] = []
+    response = await json_array_response("response", _closing_batches(closed, [{"id": 1}], [{"id": 2}]))
+    messages: list[Message] = []
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    await response({"type": "http", "asgi": {"spec_version": "2.4"}}, _receive, send)
+
+    assert closed == [True]
+    assert b"".join(message.get("body", b"") for message in messages) == b'{"response":[{"id":1},{"id":2}]}'
+
+
+@pytest.mark.asyncio
+async def test_json_array_response_closes_batches_on_disconnect() -> None:
+    closed: list[bool] = []
+    response = await json_array_response("response", _closing_batches(closed, [{"id": 1}], [{"id": 2}]))
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.body":
+            raise OSError("client disconnected")
+
+    with pytest.raises(ClientDisconnect):
+        await response({"type": "http", "asgi": {"spec_version": "2.4"}}, _receive, send)
+
+    assert closed == [True]
@@ -0,0 +1,131 @@
+import tempfile
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from mmisp.api.config import APIConfig
+from mmisp.api.metrics import MetricsMiddleware, MetricsRegistry, render_metrics
+from mmisp.api.sql_observer import RequestSql
+from mmisp.db.database import sessionmanager
+
+
+def _measured_app(registry: MetricsRegistry) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int) -> dict:
+        assert sessionmanager is not None
+        async with sessionmanager.session() as db:
+            await db.execute(text("SELECT 1"))
+            await db.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    return app
+
+
+def test_metrics_middleware_records_route_metrics() -> None:
+    registry = MetricsRegistry()
+    with TestClient(_measured_app(registry)) as client:
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/unknown")
+
+    metrics = registry.routes[("GET", "/items/{item_id}")]
+    assert metrics.count == 2
+    assert metrics.status_codes == {"200": 2}
+    assert metrics.response_bytes == 2 * len(b'{"id":1}')
+    assert metrics.statements == 4
+    assert metrics.db_time > 0
+    assert sum(metrics.buckets) == 2
+
+    assert registry.routes[("GET", "unmatched")].status_codes == {"404": 1}
+
+
+def test_metrics_merge_across_workers(tmp_path, monkeypatch) -> None:
+    first_worker = MetricsRegistry(str(tmp_path))
+    second_worker = MetricsRegistry(str(tmp_path))
+
+    monkeypatch.setattr("os.getpid", lambda: 1)
+    first_worker.observe("GET", "/events", 0.02, 200, 100, RequestSql(count=3, duration=0.01))
+    first_worker.flush()
+
+    monkeypatch.setattr("os.getpid", lambda: 2)
+    second_worker.observe("GET", "/events", 2.0, 500, 10, RequestSql(count=1, duration=0.5))
+
+    merged = second_worker.merged()[("GET", "/events")]
+    assert merged.count == 2
+    assert merged.status_codes == {"200": 1, "500": 1}
+    assert merged.response_bytes == 110
+    assert merged.statements == 4
+
+    rendered = render_metrics(second_worker.merged())
+    assert 'mmisp_http_request_duration_seconds_bucket{method="GET",route="/events",le="0.025"} 1' in rendered
+    assert 'mmisp_http_request_duration_seconds_bucket{method="GET",route="/events",le="+Inf"} 2' in rendered
+    assert 'mmisp_http_requests_total{method="GET",route="/events",status="500"} 1' in rendered
+    assert 'mmisp_db_statements_total{method="GET",route="/events"} 4' in rendered
+
+
+def test_retired_workers_are_folded(tmp_path, monkeypatch) -> None:
+    first_worker = MetricsRegistry(str(tmp_path))
+    second_worker = MetricsRegistry(str(tmp_path))
+
+    monkeypatch.setattr("os.getpid", lambda: 1)
+    first_worker.observe("GET", "/events", 0.02, 200, 100, RequestSql(count=3, duration=0.01))
+    first_worker.record_worker_recycle("rss")
+    first_worker.retire()
+
+    # the pid of the retired worker is reused
+    monkeypatch.setattr("os.getpid", lambda: 1)
+    second_worker.observe("GET", "/events", 0.02, 200, 100, RequestSql(count=1, duration=0.01))
+    second_worker.flush()
+    second_worker.retire()
+    second_worker.observe("GET", "/events", 0.02, 200, 100, RequestSql(count=1, duration=0.01))
+
+    assert sorted(path.name for path in tmp_path.glob("metrics-*.json")) == ["metrics-retired.json"]
+    merged = second_worker.merged()[("GET", "/events")]
+    assert merged.count == 3
+    assert merged.statements == 5
+    assert second_worker.merged_worker_recycles() == {"rss": 1}
+
+
+def test_worker_recycles_merge_across_workers(tmp_path, monkeypatch) -> None:
+    first_worker = MetricsRegistry(str(tmp_path))
+    second_worker = MetricsRegistry(str(tmp_path))
+
+    monkeypatch.setattr("os.getpid", lambda: 1)
+    first_worker.record_worker_recycle("rss")
+
+    monkeypatch.setattr("os.getpid", lambda: 2)
+    second_worker.record_worker_recycle("rss")
+    second_worker.record_worker_recycle("requests")
+
+    assert second_worker.merged_worker_recycles() == {"rss": 2, "requests": 1}
+    rendered = render_metrics(second_worker.merged(), second_worker.merged_worker_recycles())
+    assert 'mmisp_worker_recycles_total{reason="rss"} 2' in rendered
+
+
+def test_metrics_directory_is_shared_by_default(monkeypatch) -> None:
+    monkeypatch.delenv("METRICS_DIRECTORY", raising=False)
+    settings = {"HASH_SECRET": "secret", "WORKER_KEY": "key", "WORKER_URL": "http://worker"}
+
+    assert Path(APIConfig(**settings).METRICS_DIRECTORY) == Path(tempfile.gettempdir()) / "mmisp-metrics"
+    assert MetricsRegistry(APIConfig(**settings, METRICS_DIRECTORY="").METRICS_DIRECTORY).directory is None
+
+
+def test_get_metrics(client, site_admin_user_token) -> None:
+    headers = {"authorization": site_admin_user_token}
+    client.get("/auth/cacheStatistics", headers=headers)
+
+    response = client.get("/metrics", headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'mmisp_http_requests_total{method="GET",route="/auth/cacheStatistics",status="200"}' in response.text
+
+
+def test_get_metrics_no_permission(client, read_only_user_token) -> None:
+    response = client.get("/metrics", headers={"authorization": read_only_user_token})
+    assert response.status_code == 403
@@ -0,0 +1,46 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from mmisp.api.middleware import DryRunMiddleware, LogMiddleware
+from mmisp.db.database import dry_run
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    chunks_sent: list[int] = []
+
+    @app.get("/dry_run")
+    async def get_dry_run() -> dict:
+        return {"dry_run": dry_run.get()}
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            for i in range(3):
+                chunks_sent.append(i)
+                yield f"{i}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(DryRunMiddleware)
+    app.add_middleware(LogMiddleware)
+    app.state.chunks_sent = chunks_sent
+    return app
+
+
+def test_dry_run_middleware() -> None:
+    with TestClient(_app()) as client:
+        assert client.get("/dry_run").json() == {"dry_run": False}
+        assert client.get("/dry_run", params={"dry_run": "1"}).json() == {"dry_run": True}
+        assert client.get("/dry_run").json() == {"dry_run": False}
+
+
+def test_middlewares_pass_streaming_responses_through() -> None:
+    app = _app()
+    with TestClient(app) as client:
+        with client.stream("GET", "/stream") as response:
+            assert response.status_code == 200
+            assert list(response.iter_lines()) == ["0", "1", "2"]
+
+    assert app.state.chunks_sent == [0, 1, 2]
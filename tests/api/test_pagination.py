@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from starlette.responses import Response
+
+from mmisp.api.pagination import NEXT_CURSOR_HEADER, Keyset
+from mmisp.db.models.log import Log
+
+keyset = Keyset("logs_index", Log.id, descending=True)
+
+
+def test_cursor_round_trip() -> None:
+    cursor = keyset.encode(1234)
+
+    assert "1234" not in cursor
+    assert keyset.decode(cursor) == 1234
+
+
+@pytest.mark.parametrize("cursor", ["", "invalid", "ü", Keyset("events_index", Log.id).encode(1)])
+def test_invalid_cursor_is_rejected(cursor: str) -> None:
+    with pytest.raises(HTTPException) as exception:
+        keyset.decode(cursor)
+
+    assert exception.value.status_code == 400
+
+
+def test_apply_continues_after_cursor() -> None:
+    first_page = str(keyset.apply(select(Log), None))
+    next_page = str(keyset.apply(select(Log), keyset.encode(10)))
+
+    assert first_page.endswith("ORDER BY logs.id DESC")
+    assert "WHERE" not in first_page
+    assert "WHERE logs.id < " in next_page
+
+
+def test_next_cursor_only_for_full_pages() -> None:
+    rows = [SimpleNamespace(id=3), SimpleNamespace(id=2)]
+    response = Response()
+
+    keyset.set_next_cursor(response, rows, 2)
+
+    assert keyset.decode(response.headers[NEXT_CURSOR_HEADER]) == 2
+    assert keyset.next_cursor(rows, 3) is None
+    assert keyset.next_cursor([], 2) is None
+    assert keyset.next_cursor(rows, None) is None
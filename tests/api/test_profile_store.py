@@ -0,0 +1,103 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mmisp.api.profile_middleware import ProfileMiddleware
+from mmisp.api.profile_store import ProfileStore, profile_store
+from mmisp.api.routers import profiles
+
+
+def _profiled_app(store: ProfileStore, sample_rate: float = 0.0) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int) -> dict:
+        return {"id": item_id}
+
+    app.add_middleware(ProfileMiddleware, store=store, sample_rate=sample_rate)
+    return app
+
+
+@pytest.fixture
+def profile_client(app):
+    app.include_router(profiles.router)
+    with TestClient(app) as c:
+        yield c
+    profile_store.clear()
+
+
+def test_profile_middleware_stores_profiles_in_ring_buffer() -> None:
+    store = ProfileStore(size=2)
+    with TestClient(_profiled_app(store)) as client:
+        assert "x-profile-id" not in client.get("/items/1").headers
+
+        profile_ids = [client.get(f"/items/{i}", params={"profile": "1"}).headers["x-profile-id"] for i in range(3)]
+
+    infos = store.list_profiles()
+    assert [info.id for info in infos] == profile_ids[:0:-1]
+    assert infos[0].route == "/items/{item_id}"
+    assert infos[0].path == "/items/2"
+    assert infos[0].status_code == 200
+    assert store.get(profile_ids[0]) is None
+
+
+def test_profile_middleware_samples_requests() -> None:
+    store = ProfileStore(size=10)
+    with TestClient(_profiled_app(store, sample_rate=1.0)) as client:
+        assert "x-profile-id" in client.get("/items/1").headers
+
+    assert len(store.list_profiles()) == 1
+
+
+def test_profile_store_on_disk(tmp_path) -> None:
+    store = ProfileStore(size=2, directory=str(tmp_path))
+    with TestClient(_profiled_app(store)) as client:
+        profile_ids = [client.get(f"/items/{i}", params={"profile": "1"}).headers["x-profile-id"] for i in range(3)]
+
+    # a second worker sharing the directory sees the profiles of the first one
+    other_worker = ProfileStore(size=2, directory=str(tmp_path))
+    assert {info.id for info in other_worker.list_profiles()} == set(profile_ids[1:])
+    assert len(list(tmp_path.iterdir())) == 4
+
+    profile = other_worker.get(profile_ids[2])
+    assert profile is not None
+    assert profile[0].path == "/items/2"
+    assert other_worker.get(profile_ids[0]) is None
+
+
+def test_profile_endpoints(profile_client, site_admin_user_token) -> None:
+    with TestClient(_profiled_app(profile_store)) as client:
+        profile_id = client.get("/items/1", params={"profile": "1"}).headers["x-profile-id"]
+        client.get("/items/2", params={"profile": "1"})
+
+    headers = {"authorization": site_admin_user_token}
+
+    response = profile_client.get("/profiles", headers=headers)
+    assert response.status_code == 200
+    assert profile_id in [profile["id"] for profile in response.json()]
+
+    response = profile_client.get("/profiles/routes", headers=headers)
+    assert response.status_code == 200
+    assert response.json()[0]["route"] == "/items/{item_id}"
+    assert response.json()[0]["count"] == 2
+
+    response = profile_client.get(f"/profiles/{profile_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+
+    response = profile_client.get(f"/profiles/{profile_id}", params={"format": "html"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+
+    response = profile_client.get(
+        "/profiles/routes/aggregate", params={"method": "get", "route": "/items/{item_id}"}, headers=headers
+    )
+    assert response.status_code == 200
+
+    response = profile_client.get("/profiles/unknown", headers=headers)
+    assert response.status_code == 404
+
+
+def test_profile_endpoints_no_permission(profile_client, read_only_user_token) -> None:
+    response = profile_client.get("/profiles", headers={"authorization": read_only_user_token})
+    assert response.status_code == 403
@@ -0,0 +1,76 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from mmisp.api.config import APIConfig, config
+from mmisp.api.query_detector import QueryCounter, QueryDetectorMiddleware, normalize_statement
+from mmisp.db.database import sessionmanager
+
+
+def _app(repeat_threshold: int, statement_budget: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{count}")
+    async def get_items(count: int) -> int:
+        assert sessionmanager is not None
+        async with sessionmanager.session() as db:
+            for i in range(count):
+                await db.execute(text(f"SELECT {i}"))
+        return count
+
+    app.add_middleware(QueryDetectorMiddleware, repeat_threshold=repeat_threshold, statement_budget=statement_budget)
+    return app
+
+
+def test_normalize_statement() -> None:
+    assert normalize_statement("SELECT *\n  FROM events WHERE id = 5 AND info = 'it''s'") == (
+        "SELECT * FROM events WHERE id = ? AND info = ?"
+    )
+    assert normalize_statement("SELECT * FROM tags WHERE tags.id IN (?, ?, ?)") == normalize_statement(
+        "SELECT * FROM tags WHERE tags.id IN (?)"
+    )
+    assert normalize_statement("SELECT * FROM tags WHERE tags.id IN (__[POSTCOMPILE_id_1])") == (
+        "SELECT * FROM tags WHERE tags.id IN (?)"
+    )
+
+
+def test_query_detector_warns_about_repeated_statements(caplog) -> None:
+    with TestClient(_app(repeat_threshold=5, statement_budget=8)) as client:
+        with caplog.at_level(logging.WARNING, logger="mmisp"):
+            client.get("/items/4")
+            assert not caplog.records
+
+            client.get("/items/10")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert "GET /items/{count} executed 10 SQL statements, the budget is 8" in messages
+    assert "Possible N+1 query in GET /items/{count}, 10 executions of: SELECT ?" in messages
+
+
+def test_query_counter() -> None:
+    with TestClient(_app(repeat_threshold=0, statement_budget=0)) as client:
+        with QueryCounter() as counter:
+            client.get("/items/3")
+            client.get("/items/2")
+        client.get("/items/20")
+
+    assert counter.count == 5
+    assert [request.route for request in counter.requests] == ["/items/{count}", "/items/{count}"]
+    counter.assert_max_statements(3)
+    counter.assert_no_repeated_statements(4)
+
+
+def test_query_detector_is_off_by_default(app: FastAPI) -> None:
+    assert config.SQL_REPEAT_THRESHOLD == config.SQL_STATEMENT_BUDGET == 0
+    assert QueryDetectorMiddleware not in [middleware.cls for middleware in app.user_middleware]
+
+
+def test_query_detector_defaults_follow_debug() -> None:
+    settings = {"HASH_SECRET": "secret", "WORKER_KEY": "key", "WORKER_URL": "http://worker"}
+
+    debug = APIConfig(**settings, DEBUG=True)
+    assert (debug.SQL_REPEAT_THRESHOLD, debug.SQL_STATEMENT_BUDGET) == (10, 200)
+    assert APIConfig(**settings, DEBUG=True, SQL_STATEMENT_BUDGET=0).SQL_STATEMENT_BUDGET == 0
+    assert APIConfig(**settings, SQL_REPEAT_THRESHOLD=5).SQL_REPEAT_THRESHOLD == 5
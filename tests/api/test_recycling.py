@@ -0,0 +1,95 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mmisp.api.metrics import MetricsRegistry
+from mmisp.api.recycling import RecyclingMiddleware, WorkerRecycler, resident_set_size
+
+
+class AuditLog:
+    def __init__(self) -> None:
+        self.entries: list = []
+
+    async def enqueue(self, entries) -> None:
+        self.entries.extend(entries)
+
+
+@pytest.fixture(autouse=True)
+def audit_log(monkeypatch) -> AuditLog:
+    audit_log = AuditLog()
+    monkeypatch.setattr("mmisp.api.recycling.audit_log_writer", audit_log)
+    return audit_log
+
+
+class Terminations:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self) -> None:
+        self.count += 1
+
+
+@pytest.mark.asyncio
+async def test_recycle_after_requests_with_jitter(monkeypatch, audit_log) -> None:
+    monkeypatch.setattr("mmisp.api.recycling.metrics_registry", MetricsRegistry())
+    terminations = Terminations()
+    recycler = WorkerRecycler(0, 3, 2, terminate=terminations)
+
+    for _ in range(10):
+        await recycler.request_finished()
+
+    assert recycler.reason == "requests"
+    assert 3 <= recycler.request_limit <= 5
+    assert terminations.count == 1
+    assert [entry.action for entry in audit_log.entries] == ["recycle_worker"]
+    assert audit_log.entries[0].description == "requests"
+
+
+@pytest.mark.asyncio
+async def test_recycle_on_rss(monkeypatch) -> None:
+    registry = MetricsRegistry()
+    monkeypatch.setattr("mmisp.api.recycling.metrics_registry", registry)
+    terminations = Terminations()
+    # every python process is larger than 1 MiB
+    recycler = WorkerRecycler(1, 0, terminate=terminations)
+
+    await recycler.request_finished()
+    await recycler.request_finished()
+
+    assert resident_set_size() > 1024 * 1024
+    assert recycler.reason == "rss"
+    assert terminations.count == 1
+    assert registry.worker_recycles == {"rss": 1}
+
+
+@pytest.mark.asyncio
+async def test_recycling_disabled() -> None:
+    terminations = Terminations()
+    recycler = WorkerRecycler(0, 0, terminate=terminations)
+
+    for _ in range(10):
+        await recycler.request_finished()
+
+    assert not recycler.enabled
+    assert recycler.reason is None
+    assert terminations.count == 0
+
+
+def test_recycling_middleware_completes_request(monkeypatch) -> None:
+    monkeypatch.setattr("mmisp.api.recycling.metrics_registry", MetricsRegistry())
+    terminations = Terminations()
+    recycler = WorkerRecycler(0, 2, terminate=terminations)
+    app = FastAPI()
+
+    @app.get("/items")
+    async def get_items() -> list[int]:
+        return [1, 2]
+
+    app.add_middleware(RecyclingMiddleware, recycler=recycler)
+    with TestClient(app) as client:
+        first = client.get("/items")
+        second = client.get("/items")
+
+    assert first.json() == second.json() == [1, 2]
+    assert recycler.requests == 2
+    assert terminations.count == 1
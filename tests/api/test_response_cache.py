@@ -0,0 +1,62 @@
+import pytest
+
+from mmisp.api.response_cache import TableVersions
+from mmisp.db.models.tag import Tag
+from mmisp.tests.generators.model_generators.tag_generator import generate_tag
+
+
+def test_table_versions_shared_through_directory(tmp_path) -> None:
+    first_worker = TableVersions(str(tmp_path))
+    second_worker = TableVersions(str(tmp_path))
+    first_worker.watch(["tags"])
+
+    before = second_worker.current(["tags", "roles"])
+    first_worker.bump(["tags", "events"])
+    after = second_worker.current(["tags", "roles"])
+
+    assert before == ("", "")
+    assert after[0] != before[0]
+    assert after[1] == before[1]
+    # only watched tables are versioned
+    assert not (tmp_path / "events.version").exists()
+
+
+@pytest.mark.asyncio
+async def test_cached_response_invalidated_by_write(db, site_admin_user_token, client, empty_response_cache) -> None:
+    headers = {"authorization": site_admin_user_token}
+
+    first = client.get("/tags", headers=headers)
+    hits = empty_response_cache.hits
+    second = client.get("/tags", headers=headers)
+    assert empty_response_cache.hits == hits + 1
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+
+    tag = generate_tag()
+    db.add(tag)
+    await db.commit()
+
+    third = client.get("/tags", headers=headers)
+    assert tag.id in [entry["id"] for entry in third.json()["Tag"]]
+
+    await db.delete(tag)
+    await db.commit()
+
+    fourth = client.get("/tags", headers=headers)
+    assert fourth.content == first.content
+    assert await db.get(Tag, tag.id) is None
+
+
+@pytest.mark.asyncio
+async def test_cached_response_matches_uncached_response(
+    site_admin_user_token, client, empty_response_cache, monkeypatch
+) -> None:
+    headers = {"authorization": site_admin_user_token}
+
+    client.get("/roles", headers=headers)
+    cached = client.get("/roles", headers=headers)
+    monkeypatch.setattr(empty_response_cache, "ttl", 0)
+    uncached = client.get("/roles", headers=headers)
+
+    assert cached.status_code == uncached.status_code == 200
+    assert cached.content == uncached.content
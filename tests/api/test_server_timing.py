@@ -0,0 +1,60 @@
+from typing import Annotated
+
+import fastapi.routing
+from fastapi import Depends, FastAPI, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from mmisp.api.auth import Auth, AuthStrategy, authorize
+from mmisp.api.json_encoder import json_response
+from mmisp.api.server_timing import ServerTimingMiddleware, server_timing
+from mmisp.db.database import Session, get_db
+
+
+def _timed_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/timed")
+    async def get_timed(
+        auth: Annotated[Auth, Depends(authorize(AuthStrategy.JWT))],
+        db: Annotated[Session, Depends(get_db)],
+    ) -> Response:
+        await db.execute(text("SELECT 1"))
+        with server_timing("worker"):
+            pass
+        return json_response({"user_id": auth.user_id})
+
+    app.add_middleware(ServerTimingMiddleware)
+    return app
+
+
+def _parse(header: str) -> dict[str, float]:
+    metrics = {}
+    for metric in header.split(", "):
+        name, *parameters = metric.split(";")
+        metrics[name] = float(next(p for p in parameters if p.startswith("dur="))[4:])
+    return metrics
+
+
+def test_server_timing_header(site_admin_user, site_admin_user_token) -> None:
+    with TestClient(_timed_app()) as client:
+        response = client.get("/timed", headers={"authorization": site_admin_user_token})
+
+    assert response.status_code == 200
+    metrics = _parse(response.headers["Server-Timing"])
+    assert set(metrics) == {"auth", "db", "worker", "serialize", "total"}
+    assert metrics["total"] >= metrics["auth"]
+    assert 'db;desc="SQL statements";dur=' in response.headers["Server-Timing"]
+
+
+def test_server_timing_is_inactive_without_middleware() -> None:
+    with server_timing("worker"):
+        pass
+
+
+def test_server_timing_middleware_keeps_fastapi_serialization() -> None:
+    serialize_response = fastapi.routing.serialize_response
+
+    ServerTimingMiddleware(FastAPI())
+
+    assert fastapi.routing.serialize_response is serialize_response
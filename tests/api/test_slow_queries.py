@@ -0,0 +1,159 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from mmisp.api.slow_queries import SlowQuery, SlowQueryLog, SlowQueryMiddleware, slow_query_log
+from mmisp.db.database import sessionmanager
+
+
+def _slow_query(
+    statement: str, duration_ms: float, route: str = "/events", user_id: int | None = 1, timestamp: float = 0.0
+) -> SlowQuery:
+    return SlowQuery(statement, "(int,)", duration_ms, "GET", route, user_id, timestamp)
+
+
+def test_slow_query_log_records_statements_above_threshold(monkeypatch) -> None:
+    log = SlowQueryLog(threshold_ms=50, size=2)
+    monkeypatch.setattr("mmisp.api.slow_queries.slow_query_log", log)
+
+    log.record("SELECT * FROM events WHERE id = 5", (5,), 10)
+    log.record("SELECT * FROM events WHERE id = 5", (5,), 60)
+    log.record("SELECT * FROM tags WHERE id IN (?, ?)", (1, 2), 70)
+    log.record("SELECT * FROM attributes", (), 80)
+
+    # the oldest entry is dropped from the ring buffer
+    assert [entry.statement for entry in log.entries] == [
+        "SELECT * FROM tags WHERE id IN (?)",
+        "SELECT * FROM attributes",
+    ]
+    assert log.entries[0].route == "none"
+    assert log.entries[0].parameters == "(int, int)"
+
+
+def test_slow_query_log_redacts_parameters() -> None:
+    log = SlowQueryLog(threshold_ms=50, size=10)
+
+    log.record("UPDATE users SET password = ? WHERE id = ?", ("$2y$10$secret", 1), 60)
+    log.record("SELECT * FROM auth_keys WHERE authkey_start = :start", {"start": "secret"}, 60)
+    log.record("INSERT INTO tags (name) VALUES (?)", [("secret",), (None,)], 60)
+
+    assert [entry.parameters for entry in log.entries] == ["(str, int)", "{'start': str}", "[(str,), (NoneType,)]"]
+    assert all("secret" not in entry.parameters for entry in log.entries)
+
+
+def test_slow_query_log_does_not_write_while_recording(tmp_path) -> None:
+    log = SlowQueryLog(threshold_ms=50, size=10, directory=str(tmp_path))
+
+    log.record("SELECT 1", (), 60)
+
+    assert log.flush_due()
+    assert not list(tmp_path.glob("slow-queries-*.json"))
+
+
+def test_slow_query_log_disabled() -> None:
+    log = SlowQueryLog(threshold_ms=0, size=10)
+    log.record("SELECT 1", (), 1000)
+    assert not log.entries
+
+
+def test_slow_query_middleware_attributes_route(monkeypatch) -> None:
+    log = SlowQueryLog(threshold_ms=1e-9, size=10)
+    monkeypatch.setattr("mmisp.api.slow_queries.slow_query_log", log)
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int) -> int:
+        assert sessionmanager is not None
+        async with sessionmanager.session() as db:
+            await db.execute(text("SELECT :id"), {"id": item_id})
+        return item_id
+
+    app.add_middleware(SlowQueryMiddleware)
+    with TestClient(app) as client:
+        client.get("/items/3")
+
+    assert [(entry.method, entry.route) for entry in log.entries] == [("GET", "/items/{item_id}")]
+    assert log.entries[0].statement == "SELECT ?"
+
+
+def test_slow_query_middleware_flushes_after_the_request(tmp_path, monkeypatch) -> None:
+    log = SlowQueryLog(threshold_ms=1e-9, size=10, directory=str(tmp_path))
+    monkeypatch.setattr("mmisp.api.slow_queries.slow_query_log", log)
+
+    app = FastAPI()
+
+    @app.get("/items")
+    async def get_items() -> int:
+        assert sessionmanager is not None
+        async with sessionmanager.session() as db:
+            await db.execute(text("SELECT 1"))
+        return 1
+
+    app.add_middleware(SlowQueryMiddleware)
+    with TestClient(app) as client:
+        client.get("/items")
+
+    assert [path.name for path in tmp_path.glob("slow-queries-*.json")] == [f"slow-queries-{log.worker_id}.json"]
+
+
+def test_top_offenders_merge_across_workers(tmp_path, monkeypatch) -> None:
+    first_worker = SlowQueryLog(1, 10, str(tmp_path))
+    second_worker = SlowQueryLog(1, 10, str(tmp_path))
+
+    monkeypatch.setattr("os.getpid", lambda: 1)
+    first_worker.entries.extend([_slow_query("SELECT a", 300), _slow_query("SELECT b", 100, "/logs", 2)])
+    first_worker.flush()
+
+    monkeypatch.setattr("os.getpid", lambda: 2)
+    second_worker.entries.extend([_slow_query("SELECT b", 250, "/attributes", 3), _slow_query("SELECT c", 5)])
+
+    offenders = second_worker.top_offenders(2)
+
+    assert [offender.statement for offender in offenders] == ["SELECT b", "SELECT a"]
+    assert offenders[0].count == 2
+    assert offenders[0].total_ms == 350
+    assert offenders[0].max_ms == 250
+    assert offenders[0].routes == {"GET /logs": 1, "GET /attributes": 1}
+    assert sorted(offenders[0].user_ids) == [2, 3]
+
+
+def test_retired_workers_keep_the_latest_entries(tmp_path, monkeypatch) -> None:
+    first_worker = SlowQueryLog(1, 2, str(tmp_path))
+    second_worker = SlowQueryLog(1, 2, str(tmp_path))
+
+    monkeypatch.setattr("os.getpid", lambda: 1)
+    first_worker.entries.extend([_slow_query("SELECT a", 300, timestamp=1), _slow_query("SELECT b", 100, timestamp=3)])
+    first_worker.flush()
+    first_worker.retire()
+
+    # the pid of the retired worker is reused
+    second_worker.entries.append(_slow_query("SELECT c", 200, timestamp=2))
+    second_worker.flush()
+    second_worker.retire()
+
+    assert sorted(path.name for path in tmp_path.glob("slow-queries-*.json")) == ["slow-queries-retired.json"]
+    assert not second_worker.entries
+    assert sorted(offender.statement for offender in second_worker.top_offenders(10)) == ["SELECT b", "SELECT c"]
+
+
+def test_get_slow_queries(site_admin_user, site_admin_user_token, client, monkeypatch) -> None:
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 1e-9)
+    slow_query_log.clear()
+    headers = {"authorization": site_admin_user_token}
+
+    client.get("/users/view/me", headers=headers)
+    response = client.get("/slow_queries", params={"limit": 5}, headers=headers)
+    slow_query_log.clear()
+
+    assert response.status_code == 200
+    offenders = response.json()
+    assert 0 < len(offenders) <= 5
+    assert offenders[0]["total_ms"] >= offenders[-1]["total_ms"]
+    assert any("GET /users/view/me" in offender["routes"] for offender in offenders)
+    assert any(site_admin_user.id in offender["user_ids"] for offender in offenders)
+
+
+def test_get_slow_queries_no_permission(read_only_user_token, client) -> None:
+    response = client.get("/slow_queries", headers={"authorization": read_only_user_token})
+    assert response.status_code == 403
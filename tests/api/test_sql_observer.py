@@ -0,0 +1,60 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from mmisp.api.metrics import MetricsMiddleware, MetricsRegistry
+from mmisp.api.query_detector import QueryCounter
+from mmisp.api.server_timing import ServerTimingMiddleware
+from mmisp.api.sql_observer import RequestSql, SqlObserverMiddleware, current_request_sql, request_observers
+from mmisp.db.database import sessionmanager
+
+
+def _app(registry: MetricsRegistry, observations: list[RequestSql]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{count}")
+    async def get_items(count: int) -> int:
+        observation = current_request_sql.get()
+        assert observation is not None
+        observations.append(observation)
+        assert sessionmanager is not None
+        async with sessionmanager.session() as db:
+            for i in range(count):
+                await db.execute(text(f"SELECT {i}"))
+        return count
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(SqlObserverMiddleware)
+    return app
+
+
+def test_middlewares_share_one_observation() -> None:
+    registry = MetricsRegistry()
+    observations: list[RequestSql] = []
+
+    with TestClient(_app(registry, observations)) as client:
+        with QueryCounter() as counter:
+            response = client.get("/items/3")
+
+    (request,) = counter.requests
+    assert observations == [request]
+    assert request.count == 3
+    assert request.route == "/items/{count}"
+    assert request.statements is not None
+    assert request.statements.total() == 3
+    assert registry.routes[("GET", "/items/{count}")].statements == 3
+    assert registry.routes[("GET", "/items/{count}")].db_time == request.duration
+    assert "db;" in response.headers["server-timing"]
+    assert current_request_sql.get() is None
+    assert not request_observers
+
+
+def test_statements_are_only_collected_for_consumers() -> None:
+    observations: list[RequestSql] = []
+
+    with TestClient(_app(MetricsRegistry(), observations)) as client:
+        client.get("/items/2")
+
+    assert observations[0].count == 2
+    assert observations[0].statements is None
@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from mmisp.api.lazy_imports import LazyModule
+
+# seconds a worker may spend importing the api, can be raised on slow machines
+STARTUP_BUDGET = float(os.environ.get("MMISP_STARTUP_BUDGET", "8"))
+
+COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+import mmisp.api.main
+seconds = time.perf_counter() - start
+from mmisp.api.lazy_imports import deferred_modules
+print(json.dumps({"seconds": seconds, "deferred": sorted(deferred_modules), "loaded": sorted(sys.modules)}))
+"""
+
+
+@pytest.fixture(scope="module")
+def cold_start() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START],
+        env=os.environ | {"LAZY_IMPORTS": "true"},
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_cold_start_within_budget(cold_start) -> None:
+    assert cold_start["seconds"] < STARTUP_BUDGET
+
+
+def test_cold_start_defers_heavy_imports(cold_start) -> None:
+    assert "httpx" in cold_start["deferred"]
+    assert set(cold_start["deferred"]).isdisjoint(cold_start["loaded"])
+    assert "pyinstrument" not in cold_start["loaded"]
+
+
+def test_lazy_module_imported_on_first_use() -> None:
+    module = LazyModule("mmisp.api.startup")
+
+    assert module.StartupPhase("app", 1.0).seconds == 1.0
+    assert "mmisp.api.startup" in sys.modules
@@ -0,0 +1,28 @@
+import pytest
+
+from mmisp.api.response_cache import cached_endpoints
+from mmisp.api.warm_up import open_pool_connections, warm_up_response_cache
+from mmisp.db.database import sessionmanager
+
+
+@pytest.mark.asyncio
+async def test_open_pool_connections(db) -> None:
+    engine = sessionmanager._engine
+
+    count = await open_pool_connections(engine)
+
+    assert count == engine.pool.size()
+    assert engine.pool.checkedin() >= count
+
+
+@pytest.mark.asyncio
+async def test_warm_up_response_cache(db, site_admin_user_token, client, empty_response_cache) -> None:
+    warmed = await warm_up_response_cache()
+
+    assert warmed == len(cached_endpoints)
+    paths = ["/tags", "/taxonomies", "/galaxies", "/object_templates", "/attributes/describeTypes", "/warninglists"]
+    hits = empty_response_cache.hits
+    for path in paths:
+        response = client.get(path, headers={"authorization": site_admin_user_token})
+        assert response.status_code == 200
+    assert empty_response_cache.hits == hits + len(paths)
@@ -15,8 +15,11 @@ from pytest import Config, Item, hookimpl
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import mmisp.util.crypto
-from mmisp.api.auth import encode_token
+from mmisp.api.audit_log import audit_log_writer
+from mmisp.api.auth import clear_auth_caches, encode_token
 from mmisp.api.main import init_app
+from mmisp.api.query_detector import QueryCounter
+from mmisp.api.response_cache import response_cache, table_versions
 from mmisp.db.models.admin_setting import AdminSetting
 from mmisp.db.models.organisation import Organisation
 from mmisp.db.models.role import Role
@@ -78,6 +81,35 @@ def app():
         yield app
 
 
+@pytest.fixture(autouse=True)
+def reset_auth_caches():
+    # fixtures modify the database directly, bypassing the routers which invalidate the caches
+    clear_auth_caches()
+    yield
+    clear_auth_caches()
+
+
+@pytest.fixture
+def query_counter():
+    # collects the sql statements of all requests made through the client during the test
+    with QueryCounter() as counter:
+        yield counter
+
+
+@pytest.fixture
+def empty_response_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(table_versions, "directory", tmp_path)
+    response_cache.clear()
+    yield response_cache
+    response_cache.clear()
+
+
+@pytest.fixture
+def synchronous_audit_log(monkeypatch):
+    # write audit log entries during the request, so tests can read them right after the response
+    monkeypatch.setattr(audit_log_writer, "queue_size", 0)
+
+
 @pytest_asyncio.fixture
 async def sharing_group_org_two(db, sharing_group, instance_org_two):
     ic(instance_org_two)